@@ -4,42 +4,379 @@ Configuration Manager for Weather Variables
 
 Loads and validates variables.yaml configuration.
 Provides helper functions for variable extraction and processing.
+
+Parsing the YAML takes tens of milliseconds, and every CLI and worker process
+loads it. So the parsed, validated configuration is kept as a compiled
+snapshot (JSON) in CONFIG_CACHE_DIR (default: a per-user cache directory).
+The snapshot holds the config, the enabled/priority/GRIB search indexes,
+the parsed color ramp stops and the validation result. It is reused while
+the YAML's content hash matches, and only from a directory owned by the
+current user that no one else can write to. Conversions are compiled from
+its validated formulas on load.
 """
 
+import ast
+import hashlib
+import json
+import os
+import stat
+import tempfile
 import yaml
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Union
 import logging
 
+import numpy as np
+
+# Integer types supported for quantized COG output (scripts/processing/quantize.py)
+QUANTIZE_DTYPES = ('int16', 'uint16')
+
+# COG compression codecs accepted in processing.compression and per-variable overrides
+COG_CODECS = ('NONE', 'DEFLATE', 'ZSTD', 'LZW', 'LERC', 'LERC_DEFLATE', 'LERC_ZSTD')
+
+# Compiled snapshot format; bump when its contents change
+SNAPSHOT_VERSION = 1
+
+# libyaml's loader when available (cold loads only)
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def get_snapshot_dir() -> Path:
+    """
+    Directory of compiled config snapshots.
+
+    CONFIG_CACHE_DIR if set, else $XDG_CACHE_HOME/weather-config or
+    ~/.cache/weather-config (a per-user directory under the system temp
+    dir if there is no home directory).
+    """
+    if os.environ.get('CONFIG_CACHE_DIR'):
+        return Path(os.environ['CONFIG_CACHE_DIR'])
+    if os.environ.get('XDG_CACHE_HOME'):
+        return Path(os.environ['XDG_CACHE_HOME']) / 'weather-config'
+    try:
+        return Path.home() / '.cache' / 'weather-config'
+    except RuntimeError:
+        return Path(tempfile.gettempdir()) / f"weather-config-cache-{os.getuid()}"
+
+
+def is_private_dir(path: Path) -> bool:
+    """
+    Check that a directory is owned by the current user and that no one
+    else can write to it (so no one else can plant a snapshot in it).
+    """
+    try:
+        info = path.stat()
+    except OSError:
+        return False
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        return False
+    return stat.S_ISDIR(info.st_mode) and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def parse_color_stops(color_ramp: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read a color ramp's stops.
+
+    Args:
+        color_ramp: Color ramp configuration from variables.yaml
+
+    Returns:
+        (values, colors): stop values sorted ascending, and their RGB
+        colors as an (n, 3) float array
+
+    Raises:
+        ValueError: If the ramp has no stops or a malformed one
+    """
+    stops = sorted(color_ramp.get('colors', []), key=lambda stop: stop['value'])
+    if not stops:
+        raise ValueError("Color ramp has no color stops")
+
+    values = np.array([float(stop['value']) for stop in stops])
+    colors = np.array([
+        [int(stop['color'].lstrip('#')[i:i + 2], 16) for i in (0, 2, 4)]
+        for stop in stops
+    ], dtype=np.float64)
+    return values, colors
+
+
+class CompiledConversion:
+    """
+    Unit conversion formula compiled once for whole-array evaluation.
+
+    The formula is parsed into an AST and checked against a whitelist
+    (arithmetic on `value`, numeric constants and a few NumPy functions)
+    before being compiled, so evaluating it can't reach anything else.
+    Calling it on a NumPy array applies the formula to every element in a
+    single vectorized pass.
+
+    Usage:
+        conversion = CompiledConversion('kelvin_to_celsius', 'value - 273.15')
+        celsius = conversion(kelvin_array)
+    """
+
+    # Operators allowed in formulas
+    ALLOWED_NODES = (
+        ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name,
+        ast.Load, ast.Call,
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+        ast.USub, ast.UAdd,
+    )
+
+    # Functions allowed in formulas, mapped to their NumPy implementations
+    FUNCTIONS = {
+        'abs': np.abs,
+        'sqrt': np.sqrt,
+        'exp': np.exp,
+        'log': np.log,
+        'log10': np.log10,
+    }
+
+    def __init__(self, name: str, formula: str):
+        """
+        Validate and compile a conversion formula.
+
+        Args:
+            name: Conversion name (e.g., 'kelvin_to_celsius')
+            formula: Expression in terms of `value` (e.g., 'value - 273.15')
+
+        Raises:
+            ValueError: If the formula can't be parsed or uses anything
+                        outside the whitelist
+        """
+        self.name = name
+        self.formula = formula
+
+        try:
+            tree = ast.parse(formula, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid formula for conversion {name}: {e}")
+
+        self._validate(tree)
+        self._code = compile(tree, f'<conversion:{name}>', 'eval')
+
+    def _validate(self, tree: ast.AST) -> None:
+        """Reject any node outside the whitelist."""
+        for node in ast.walk(tree):
+            if not isinstance(node, self.ALLOWED_NODES):
+                raise ValueError(
+                    f"Conversion {self.name}: unsupported syntax '{type(node).__name__}'"
+                )
+            if isinstance(node, ast.Constant) and (
+                isinstance(node.value, bool) or not isinstance(node.value, (int, float))
+            ):
+                raise ValueError(f"Conversion {self.name}: only numeric constants are allowed")
+            if isinstance(node, ast.Name) and node.id != 'value' and node.id not in self.FUNCTIONS:
+                raise ValueError(f"Conversion {self.name}: unknown name '{node.id}'")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in self.FUNCTIONS:
+                    raise ValueError(f"Conversion {self.name}: only {sorted(self.FUNCTIONS)} may be called")
+                if node.keywords or len(node.args) != 1:
+                    raise ValueError(f"Conversion {self.name}: functions take exactly one argument")
+
+    def __call__(self, value: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        Apply the conversion.
+
+        Args:
+            value: Scalar or NumPy array of source values
+
+        Returns:
+            Converted scalar or array (same shape as the input)
+        """
+        namespace = {'__builtins__': {}, 'value': value, **self.FUNCTIONS}
+        return eval(self._code, namespace)
+
+    def apply_inplace(
+        self,
+        array: np.ndarray,
+        nodata: Optional[float] = None,
+        block_rows: int = 256
+    ) -> int:
+        """
+        Convert valid pixels of an array in place.
+
+        Works through the array in row blocks so the validity mask and
+        intermediate results never exceed one block; nodata (or NaN)
+        pixels are left untouched. Results are cast to the array's dtype.
+
+        Args:
+            array: Array to convert (modified in place)
+            nodata: Nodata value to skip; NaN is always skipped
+            block_rows: Rows converted per block (first axis)
+
+        Returns:
+            Number of pixels converted
+        """
+        converted = 0
+
+        for start in range(0, array.shape[0], block_rows):
+            block = array[start:start + block_rows]
+            valid = ~np.isnan(block)
+            if nodata is not None and not np.isnan(nodata):
+                valid &= block != nodata
+            count = int(np.count_nonzero(valid))
+            if count == block.size:
+                block[...] = self(block)
+            elif count:
+                block[valid] = self(block[valid])
+            converted += count
+
+        return converted
+
+    def __repr__(self) -> str:
+        return f"CompiledConversion({self.name!r}, {self.formula!r})"
+
 
 class VariableConfig:
     """Manages weather variable configuration."""
 
-    def __init__(self, config_path: Optional[Path] = None):
+    def __init__(self, config_path: Optional[Path] = None, use_snapshot: bool = True):
         """
         Initialize configuration manager.
 
         Args:
             config_path: Path to variables.yaml file.
                         If None, uses default location.
+            use_snapshot: Load from (and save) the compiled snapshot; False
+                          always parses the YAML
         """
         if config_path is None:
             # Default to config/variables.yaml relative to this script
             config_path = Path(__file__).parent / "variables.yaml"
 
         self.config_path = Path(config_path)
-        self.config = self._load_config()
         self.logger = logging.getLogger(__name__)
-
-    def _load_config(self) -> Dict[str, Any]:
-        """Load and parse YAML configuration file."""
+        self._compiled_conversions: Dict[str, CompiledConversion] = {}
+
+        snapshot = self._load_snapshot() if use_snapshot else None
+        self.from_snapshot = snapshot is not None
+        if snapshot is None:
+            snapshot = self._compile_snapshot()
+            if use_snapshot:
+                self._save_snapshot(snapshot)
+        self._apply_snapshot(snapshot)
+
+    @property
+    def snapshot_path(self) -> Path:
+        """Compiled snapshot file of this configuration."""
+        resolved = str(self.config_path.resolve())
+        digest = hashlib.sha1(resolved.encode()).hexdigest()[:12]
+        return get_snapshot_dir() / f"{self.config_path.stem}-{digest}.json"
+
+    def _load_config(self) -> Tuple[Dict[str, Any], bytes]:
+        """Load and parse YAML configuration file; returns (config, raw bytes)."""
         if not self.config_path.exists():
             raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
 
-        with open(self.config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        content = self.config_path.read_bytes()
+        config = yaml.load(content, Loader=YAML_LOADER)
+
+        return config, content
+
+    def _compile_snapshot(self) -> Dict[str, Any]:
+        """Parse the YAML and build its snapshot (indexes, color stops, validation)."""
+        self.config, content = self._load_config()
+        variables = self.config.get('variables', {})
+
+        enabled = [name for name, var_config in variables.items() if var_config.get('enabled', False)]
+        by_priority: Dict[Any, List[str]] = {}
+        for name in enabled:
+            by_priority.setdefault(variables[name].get('priority'), []).append(name)
+
+        color_stops = {}
+        ramp_issues = []
+        for ramp_name, ramp in self.config.get('color_ramps', {}).items():
+            try:
+                values, colors = parse_color_stops(ramp)
+                color_stops[ramp_name] = [values.tolist(), colors.tolist()]
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                ramp_issues.append(f"Color ramp '{ramp_name}' is invalid: {e}")
+
+        return {
+            'version': SNAPSHOT_VERSION,
+            'source': str(self.config_path.resolve()),
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'config': self.config,
+            'enabled': enabled,
+            'by_priority': [[priority, names] for priority, names in by_priority.items()],
+            'grib_search': {variables[name]['grib_search']: name
+                            for name in enabled if 'grib_search' in variables[name]},
+            'color_stops': color_stops,
+            'issues': self._check_config() + ramp_issues,
+        }
+
+    def _load_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the compiled snapshot if it matches the YAML.
+
+        The snapshot is current if its content hash matches the YAML's
+        (hashing the file costs far less than parsing it). Snapshots are
+        only read from a private directory (see is_private_dir).
+
+        Returns:
+            Snapshot dict, or None if missing, stale, unreadable or untrusted
+        """
+        path = self.snapshot_path
+        if not path.parent.exists():
+            return None
+        if not is_private_dir(path.parent):
+            self.logger.warning(f"Ignoring config snapshots in {path.parent}: not owned by this "
+                                f"user or writable by others")
+            return None
+        try:
+            with open(path, 'r') as f:
+                snapshot = json.load(f)
+            content_hash = hashlib.sha256(self.config_path.read_bytes()).hexdigest()
+        except (OSError, ValueError):
+            return None
+
+        if (snapshot.get('version') != SNAPSHOT_VERSION
+                or snapshot.get('source') != str(self.config_path.resolve())):
+            return None
+        if snapshot.get('sha256') != content_hash:
+            self.logger.debug(f"Config snapshot of {self.config_path.name} is stale")
+            return None
+        return snapshot
+
+    def _save_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        """Write the snapshot atomically; failures only cost the next load a parse."""
+        path = self.snapshot_path
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if not is_private_dir(path.parent):
+                return  # Never write where others could replace the snapshot
+            with open(temp_path, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            temp_path.replace(path)
+        except (OSError, TypeError, ValueError) as e:
+            # e.g. a read-only cache dir, or YAML values JSON can't hold
+            self.logger.debug(f"Could not save config snapshot {path}: {e}")
+            temp_path.unlink(missing_ok=True)
+
+    def _apply_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        """Set the config and its indexes from a snapshot; compile valid conversions."""
+        self.config = snapshot['config']
+        variables = self.config.get('variables', {})
+        self._enabled = {name: variables[name] for name in snapshot['enabled']}
+        self._by_priority = {
+            priority: {name: variables[name] for name in names}
+            for priority, names in snapshot['by_priority']
+        }
+        self._grib_search_index: Dict[str, str] = snapshot['grib_search']
+        self._color_stops = {
+            ramp_name: (np.array(values), np.array(colors))
+            for ramp_name, (values, colors) in snapshot['color_stops'].items()
+        }
+        self._issues: List[str] = snapshot['issues']
 
-        return config
+        for conversion_name, conversion in self.config.get('conversions', {}).items():
+            formula = (conversion or {}).get('formula')
+            if formula:
+                try:
+                    self._compiled_conversions[conversion_name] = CompiledConversion(conversion_name, formula)
+                except ValueError:
+                    pass  # Reported by validate(); raised again on use
 
     def get_enabled_variables(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -47,13 +384,9 @@ class VariableConfig:
 
         Returns:
             Dictionary of enabled variables with their configurations
+            (a copy of the precomputed index)
         """
-        variables = self.config.get('variables', {})
-        return {
-            name: var_config
-            for name, var_config in variables.items()
-            if var_config.get('enabled', False)
-        }
+        return dict(self._enabled)
 
     def get_variables_by_priority(self, priority: int = None) -> Dict[str, Dict[str, Any]]:
         """
@@ -65,16 +398,10 @@ class VariableConfig:
         Returns:
             Dictionary of variables matching the priority
         """
-        enabled = self.get_enabled_variables()
-
         if priority is None:
-            return enabled
+            return self.get_enabled_variables()
 
-        return {
-            name: var_config
-            for name, var_config in enabled.items()
-            if var_config.get('priority') == priority
-        }
+        return dict(self._by_priority.get(priority, {}))
 
     def get_variable_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """
@@ -95,8 +422,19 @@ class VariableConfig:
         Returns:
             List of search strings (e.g., ['TMP:2 m', 'UGRD:10 m', ...])
         """
-        enabled = self.get_enabled_variables()
-        return [var['grib_search'] for var in enabled.values()]
+        return [var['grib_search'] for var in self._enabled.values()]
+
+    def get_variable_by_grib_search(self, search_string: str) -> Optional[str]:
+        """
+        Get the enabled variable extracted with a GRIB search string.
+
+        Args:
+            search_string: GRIB search string (e.g., 'TMP:2 m')
+
+        Returns:
+            Variable name, or None if no enabled variable uses it
+        """
+        return self._grib_search_index.get(search_string)
 
     def get_color_ramp(self, ramp_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -110,6 +448,18 @@ class VariableConfig:
         """
         return self.config.get('color_ramps', {}).get(ramp_name)
 
+    def get_color_stops(self, ramp_name: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get a color ramp's parsed stops (see parse_color_stops).
+
+        Args:
+            ramp_name: Name of color ramp (e.g., 'temperature')
+
+        Returns:
+            (values, colors) arrays, or None if the ramp is missing or invalid
+        """
+        return self._color_stops.get(ramp_name)
+
     def get_conversion_formula(self, conversion_name: str) -> Optional[Dict[str, Any]]:
         """
         Get unit conversion formula.
@@ -122,20 +472,25 @@ class VariableConfig:
         """
         return self.config.get('conversions', {}).get(conversion_name)
 
-    def apply_conversion(self, value: float, conversion_name: str) -> float:
+    def get_compiled_conversion(self, conversion_name: str) -> CompiledConversion:
         """
-        Apply unit conversion to a value.
+        Get a unit conversion compiled for whole-array evaluation.
+
+        Formulas are validated and compiled on first use and cached.
 
         Args:
-            value: Input value
-            conversion_name: Name of conversion to apply
+            conversion_name: Name of conversion (e.g., 'kelvin_to_celsius')
 
         Returns:
-            Converted value
+            CompiledConversion callable
 
         Raises:
             ValueError: If conversion not found or formula invalid
         """
+        compiled = self._compiled_conversions.get(conversion_name)
+        if compiled is not None:
+            return compiled
+
         conversion = self.get_conversion_formula(conversion_name)
         if not conversion:
             raise ValueError(f"Conversion not found: {conversion_name}")
@@ -144,11 +499,31 @@ class VariableConfig:
         if not formula:
             raise ValueError(f"No formula for conversion: {conversion_name}")
 
-        # Evaluate formula
-        # Note: Using eval is generally unsafe, but we control the config file
-        # For production, consider using a safer expression evaluator
+        compiled = CompiledConversion(conversion_name, formula)
+        self._compiled_conversions[conversion_name] = compiled
+        return compiled
+
+    def apply_conversion(
+        self,
+        value: Union[float, np.ndarray],
+        conversion_name: str
+    ) -> Union[float, np.ndarray]:
+        """
+        Apply unit conversion to a value or array.
+
+        Args:
+            value: Input value, or NumPy array of values
+            conversion_name: Name of conversion to apply
+
+        Returns:
+            Converted value (array in, array out)
+
+        Raises:
+            ValueError: If conversion not found or formula invalid
+        """
+        compiled = self.get_compiled_conversion(conversion_name)
         try:
-            return eval(formula, {"value": value, "__builtins__": {}})
+            return compiled(value)
         except Exception as e:
             raise ValueError(f"Error applying conversion {conversion_name}: {e}")
 
@@ -236,9 +611,15 @@ class VariableConfig:
         """
         Validate configuration for common issues.
 
+        The checks run when the snapshot is compiled; this returns their result.
+
         Returns:
             List of validation warnings/errors (empty if valid)
         """
+        return list(self._issues)
+
+    def _check_config(self) -> List[str]:
+        """Run the validation checks on self.config."""
         issues = []
 
         # Check required top-level keys
@@ -271,9 +652,109 @@ class VariableConfig:
                 if conversion_name not in self.config.get('conversions', {}):
                     issues.append(f"Variable '{var_name}' references undefined conversion: {conversion_name}")
 
+            # Check quantized output has a valid type and a range to encode
+            quantize = var_config.get('quantize', self.config.get('processing', {}).get('quantize'))
+            if quantize:
+                if quantize not in QUANTIZE_DTYPES:
+                    issues.append(f"Variable '{var_name}' has invalid quantize type: {quantize}")
+                typical_range = var_config.get('typical_range')
+                if not typical_range or len(typical_range) != 2 or typical_range[1] <= typical_range[0]:
+                    issues.append(f"Variable '{var_name}' is quantized but has no valid typical_range")
+
+            # Check per-variable compression names a known codec
+            compression = var_config.get('compression')
+            if compression:
+                codec = compression.get('codec') if isinstance(compression, dict) else compression
+                if codec and str(codec).upper() not in COG_CODECS:
+                    issues.append(f"Variable '{var_name}' has invalid compression codec: {codec}")
+
+        # Check conversion formulas compile
+        for conversion_name in self.config.get('conversions', {}):
+            try:
+                self.get_compiled_conversion(conversion_name)
+            except ValueError as e:
+                issues.append(str(e))
+
         return issues
 
 
+def benchmark_conversion(
+    config: VariableConfig,
+    conversion_name: str,
+    shape: tuple = (1059, 1799),
+    sample_size: int = 100000
+) -> Dict[str, float]:
+    """
+    Time per-pixel eval() against the compiled whole-array conversion.
+
+    The per-pixel path is timed on a sample and scaled to the full grid,
+    since running it on every pixel takes several seconds.
+
+    Args:
+        config: Variable configuration
+        conversion_name: Conversion to benchmark
+        shape: Grid shape (default: HRRR CONUS 1059x1799)
+        sample_size: Pixels used to time the per-pixel path
+
+    Returns:
+        Dict with per-pixel and compiled timings in seconds and the speedup
+    """
+    import time
+
+    formula = config.get_conversion_formula(conversion_name)['formula']
+    data = np.random.default_rng(0).uniform(230.0, 320.0, size=shape)
+    pixels = data.size
+    sample = data.ravel()[:min(sample_size, pixels)]
+
+    start = time.perf_counter()
+    for val in sample:
+        eval(formula, {"value": float(val), "__builtins__": {}})
+    per_pixel = (time.perf_counter() - start) * pixels / len(sample)
+
+    compiled = config.get_compiled_conversion(conversion_name)
+    start = time.perf_counter()
+    compiled(data)
+    vectorized = time.perf_counter() - start
+
+    return {
+        'pixels': pixels,
+        'per_pixel_eval_seconds': per_pixel,
+        'compiled_seconds': vectorized,
+        'speedup': per_pixel / vectorized if vectorized > 0 else float('inf'),
+    }
+
+
+def benchmark_load(config_path: Optional[Path] = None, repeat: int = 10) -> Dict[str, float]:
+    """
+    Time parsing the YAML against loading the compiled snapshot.
+
+    Args:
+        config_path: Path to variables.yaml (default: config/variables.yaml)
+        repeat: Loads per method (the best time is reported)
+
+    Returns:
+        Dict with YAML and snapshot load times in seconds and the speedup
+    """
+    import time
+
+    def best(use_snapshot: bool) -> float:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            VariableConfig(config_path, use_snapshot=use_snapshot)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    VariableConfig(config_path)  # Make sure the snapshot exists
+    parse = best(False)
+    snapshot = best(True)
+    return {
+        'yaml_seconds': parse,
+        'snapshot_seconds': snapshot,
+        'speedup': parse / snapshot if snapshot > 0 else float('inf'),
+    }
+
+
 def main():
     """Command-line interface for configuration manager."""
     import argparse
@@ -286,11 +767,17 @@ def main():
     parser.add_argument('--list-all', action='store_true', help='List all variables')
     parser.add_argument('--priority', type=int, help='Filter by priority level')
     parser.add_argument('--grib-search', action='store_true', help='List GRIB search strings')
+    parser.add_argument('--benchmark-conversion', metavar='NAME',
+                        help='Benchmark a unit conversion (per-pixel eval vs compiled) on an HRRR-sized grid')
+    parser.add_argument('--benchmark-load', action='store_true',
+                        help='Benchmark parsing the YAML vs loading the compiled snapshot')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Parse the YAML instead of using the compiled snapshot')
 
     args = parser.parse_args()
 
     # Load configuration
-    config = VariableConfig(args.config)
+    config = VariableConfig(args.config, use_snapshot=not args.no_cache)
 
     if args.summary:
         print(config.get_variable_summary())
@@ -330,6 +817,21 @@ def main():
         for search_str in search_strings:
             print(f"  - {search_str}")
 
+    if args.benchmark_conversion:
+        result = benchmark_conversion(config, args.benchmark_conversion)
+        print(f"\nConversion Benchmark: {args.benchmark_conversion} ({result['pixels']:,} pixels)")
+        print(f"  Per-pixel eval: {result['per_pixel_eval_seconds']:.3f} s")
+        print(f"  Compiled:       {result['compiled_seconds'] * 1000:.2f} ms")
+        print(f"  Speedup:        {result['speedup']:.0f}x")
+
+    if args.benchmark_load:
+        result = benchmark_load(args.config)
+        print(f"\nConfig Load Benchmark: {config.config_path.name}")
+        print(f"  Parse YAML:     {result['yaml_seconds'] * 1000:.2f} ms")
+        print(f"  Snapshot:       {result['snapshot_seconds'] * 1000:.2f} ms")
+        print(f"  Speedup:        {result['speedup']:.0f}x")
+        print(f"  Snapshot file:  {config.snapshot_path}")
+
 
 if __name__ == '__main__':
     main()
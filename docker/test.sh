@@ -116,6 +116,47 @@ echo ""
 echo "✅ Test 6 passed: boto3 works correctly"
 echo ""
 
+# Test 7: AOI windows on the global GFS-Wave grid
+echo "Test 7: Testing AOI windows on a 0-360 global grid..."
+PROJECT_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+docker run --rm -v "$PROJECT_ROOT":/app -w /app weather-processor:latest python3 -c "
+import logging
+import numpy as np
+from osgeo import gdal, osr
+from scripts.processing.aoi import get_aoi_window, parse_bbox, read_window, window_geotransform
+
+gdal.UseExceptions()
+logger = logging.getLogger('test')
+
+# GFS-Wave layout: 0.25 degree cells centered on 0..359.75 E, 90..-90 N
+ds = gdal.GetDriverByName('MEM').Create('', 1440, 721, 1, gdal.GDT_Float32)
+ds.SetGeoTransform((-0.125, 0.25, 0, 90.125, 0, -0.25))
+srs = osr.SpatialReference()
+srs.ImportFromEPSG(4326)
+ds.SetProjection(srs.ExportToWkt())
+ds.GetRasterBand(1).WriteArray(np.tile(np.arange(1440, dtype=np.float32), (721, 1)))
+
+# Documented example box: 260-360 E, not the whole globe
+window = get_aoi_window(ds, parse_bbox([-100, 0, 0, 70]), logger)
+assert window is not None and window.xsize < 1440 / 2, window
+assert window == get_aoi_window(ds, parse_bbox([260, 0, 360, 70]), logger)
+west = window_geotransform(ds.GetGeoTransform(), window)[0]
+assert 259 < west < 260, west
+print(f'✓ [-100, 0, 0, 70] -> {window}')
+
+# A box across the 0 degree seam wraps; the read joins both sides
+window = get_aoi_window(ds, parse_bbox([-10, 30, 10, 50]), logger)
+assert window.xoff + window.xsize > 1440, window
+columns = read_window(ds.GetRasterBand(1), window, gdal.GDT_Float32)[0]
+expected = np.arange(window.xoff, window.xoff + window.xsize) % 1440
+assert (columns == expected).all()
+print(f'✓ [-10, 30, 10, 50] -> {window} (wraps the seam)')
+"
+
+echo ""
+echo "✅ Test 7 passed: AOI windows work correctly"
+echo ""
+
 echo "========================================="
 echo "🎉 All tests passed!"
 echo "========================================="
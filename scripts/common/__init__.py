@@ -14,6 +14,7 @@ from .cloudwatch_metrics import (
     NAMESPACE,
     DEFAULT_REGION,
 )
+from .grib_subset import build_search_regex, download_grib_subset
 
 __all__ = [
     'CloudWatchMetrics',
@@ -24,4 +25,6 @@ __all__ = [
     'calculate_data_age_minutes',
     'NAMESPACE',
     'DEFAULT_REGION',
+    'build_search_regex',
+    'download_grib_subset',
 ]
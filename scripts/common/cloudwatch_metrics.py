@@ -34,6 +34,8 @@ class MetricNames:
     ERRORS = 'Errors'
     S3_UPLOAD_SIZE = 'S3UploadSize'
     STEP_DURATION = 'StepDuration'
+    OUTPUT_BYTES = 'OutputBytes'
+    OUTPUT_PIXELS = 'OutputPixels'
     SUCCESS = 'Success'
     FAILURE = 'Failure'
 
@@ -261,14 +263,35 @@ class CloudWatchMetrics:
             raise
         finally:
             duration = time.time() - start_time
-            dims = {'Step': step_name}
-            if dimensions:
-                dims.update(dimensions)
-            self.put_metric(metric_name, duration, MetricUnits.SECONDS, dims)
+            self.record_step_duration(step_name, duration, metric_name, dimensions)
 
             if error_occurred:
+                dims = {'Step': step_name}
+                if dimensions:
+                    dims.update(dimensions)
                 self.put_metric(MetricNames.ERRORS, 1, MetricUnits.COUNT, dims)
 
+    def record_step_duration(
+        self,
+        step_name: str,
+        seconds: float,
+        metric_name: str = MetricNames.STEP_DURATION,
+        dimensions: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """
+        Send a step duration measured elsewhere, as timer() does.
+
+        Args:
+            step_name: Name of the step
+            seconds: Step duration in seconds
+            metric_name: Metric name to use
+            dimensions: Additional dimensions
+        """
+        dims = {'Step': step_name}
+        if dimensions:
+            dims.update(dimensions)
+        return self.put_metric(metric_name, seconds, MetricUnits.SECONDS, dims)
+
     def timed(
         self,
         step_name: str,
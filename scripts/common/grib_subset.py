@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+GRIB2 Subset Download Helper Module
+
+Downloads only the GRIB2 messages of selected variables instead of the
+full file. Herbie reads the message byte ranges from the model's .idx
+file and concatenates the matching messages into one subset GRIB2.
+
+Shared by download_hrrr.py and download_gfs_wave.py (--subset).
+"""
+
+import logging
+import re
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+
+def build_search_regex(variables: List[str]) -> str:
+    """
+    Build a Herbie search regex matching the GRIB2 messages of variables.
+
+    Herbie matches the regex against .idx lines such as
+    ":TMP:2 m above ground:anl", so each search string is anchored at the
+    start of its element name.
+
+    Args:
+        variables: Variable search strings (e.g., ["TMP:2 m", "REFC:entire atmosphere"])
+
+    Returns:
+        Regex alternation of all variables
+    """
+    return '|'.join(f":{re.escape(var)}" for var in variables)
+
+
+def download_grib_subset(
+    herbie,
+    variables: List[str],
+    output_path: Path,
+    logger: logging.Logger
+) -> Optional[Path]:
+    """
+    Download the GRIB2 messages of variables into one file.
+
+    Args:
+        herbie: Herbie object of the forecast
+        variables: Variable search strings
+        output_path: Where to save the subset GRIB2
+        logger: Logger instance
+
+    Returns:
+        output_path, or None if Herbie produced no file
+    """
+    search = build_search_regex(variables)
+    logger.info(f"Downloading GRIB2 subset: {len(variables)} variables")
+    logger.debug(f"Search regex: {search}")
+
+    downloaded_path = herbie.download(search)
+    if downloaded_path is None or not Path(downloaded_path).exists():
+        logger.error(f"Subset download produced no file for: {search}")
+        return None
+
+    shutil.move(str(downloaded_path), str(output_path))
+
+    size_mb = output_path.stat().st_size / 1024 / 1024
+    logger.info(f"Saved GRIB2 subset to {output_path} ({size_mb:.1f} MB)")
+    return output_path
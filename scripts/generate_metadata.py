@@ -20,7 +20,9 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-import yaml
+# Add config directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config.config_manager import VariableConfig
 
 # Configure logging
 logging.basicConfig(
@@ -31,10 +33,9 @@ logger = logging.getLogger('generate_metadata')
 
 
 def load_variables_config(config_path: str) -> dict:
-    """Load variables configuration from YAML file."""
+    """Load variables configuration (from its compiled snapshot when current)."""
     try:
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+        return VariableConfig(Path(config_path)).config
     except Exception as e:
         logger.warning(f"Could not load variables config: {e}")
         return {}
@@ -11,10 +11,12 @@ Model runs at 00, 06, 12, 18 UTC with forecasts out to 384 hours.
 Usage:
     python download_gfs_wave.py --date 2026-01-10 --cycle 12 --fxx 0-12 --variables all
     python download_gfs_wave.py --latest --variables all
+    python download_gfs_wave.py --latest --variables config --subset
 """
 
 import argparse
 import logging
+import shutil
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -26,12 +28,18 @@ from botocore.exceptions import ClientError
 from herbie import Herbie
 import xarray as xr
 
+# Add repository root to path for the shared variable config
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.config_manager import VariableConfig
+from scripts.common.grib_subset import build_search_regex, download_grib_subset
+
 
 # Configuration
 DEFAULT_S3_BUCKET = "sat-data-container"
 DEFAULT_MODEL = "gfs_wave"
 DEFAULT_PRODUCT = "global.0p25"  # 0.25 degree global wave product
 TEMP_DIR = Path("/tmp/gfs-wave-data")
+DEFAULT_CONFIG = Path(__file__).parent.parent.parent / "config" / "variables_gfs_wave.yaml"
 
 # GFS-Wave runs every 6 hours
 VALID_CYCLES = [0, 6, 12, 18]
@@ -97,6 +105,9 @@ Examples:
   # Download specific variables
   python download_gfs_wave.py --latest --variables "HTSGW:surface,PERPW:surface"
 
+  # Download only the GRIB2 messages of variables enabled in the config
+  python download_gfs_wave.py --latest --variables config --subset
+
   # Dry run (no S3 upload)
   python download_gfs_wave.py --latest --dry-run
         """
@@ -138,11 +149,28 @@ Examples:
             'Variables to download. Options: '
             '"default" (common wave variables), '
             '"all" (download full GRIB2), '
+            '"config" (enabled variables in --config), '
             'or comma-separated list (e.g., "HTSGW:surface,PERPW:surface"). '
             'Default: default'
         )
     )
 
+    parser.add_argument(
+        '--config',
+        type=Path,
+        default=DEFAULT_CONFIG,
+        help='Path to variables YAML used by --variables config. Default: config/variables_gfs_wave.yaml'
+    )
+
+    parser.add_argument(
+        '--subset',
+        action='store_true',
+        help=(
+            'Fetch only the matching GRIB2 messages via .idx byte ranges and save them '
+            'as one GRIB2 per forecast hour (instead of NetCDF via xarray)'
+        )
+    )
+
     # S3 options
     parser.add_argument(
         '--s3-bucket',
@@ -196,6 +224,8 @@ Examples:
     # Validation
     if args.date and args.cycle is None:
         parser.error('--cycle is required when using --date')
+    if args.subset and args.variables.lower() == 'all':
+        parser.error('--subset requires a variable list (e.g., --variables config)')
 
     if args.date and args.cycle not in VALID_CYCLES:
         parser.error(f'--cycle must be one of {VALID_CYCLES} for GFS-Wave')
@@ -236,12 +266,13 @@ def parse_forecast_hours(fxx_str: str) -> List[int]:
     return sorted(list(set(hours)))  # Remove duplicates and sort
 
 
-def parse_variables(var_str: str) -> Optional[List[str]]:
+def parse_variables(var_str: str, config_path: Optional[Path] = None) -> Optional[List[str]]:
     """
     Parse variable string into list.
 
     Args:
         var_str: Variable specification string
+        config_path: Variables YAML for "config" (default: config/variables_gfs_wave.yaml)
 
     Returns:
         List of variable strings, or None for "all"
@@ -250,6 +281,9 @@ def parse_variables(var_str: str) -> Optional[List[str]]:
         return None  # Download full GRIB2
     elif var_str.lower() == 'default':
         return DEFAULT_VARIABLES
+    elif var_str.lower() == 'config':
+        # Unique search strings of enabled variables, in config order
+        return list(dict.fromkeys(VariableConfig(config_path or DEFAULT_CONFIG).get_grib_search_strings()))
     else:
         return [v.strip() for v in var_str.split(',')]
 
@@ -279,7 +313,8 @@ def download_gfs_wave_data(
     variables: Optional[List[str]],
     output_dir: Path,
     logger: logging.Logger,
-    dry_run: bool = False
+    dry_run: bool = False,
+    subset: bool = False
 ) -> Optional[Path]:
     """
     Download GFS-Wave data using Herbie.
@@ -291,6 +326,8 @@ def download_gfs_wave_data(
         output_dir: Directory to save downloaded files
         logger: Logger instance
         dry_run: If True, show what would be downloaded without downloading
+        subset: With variables, fetch only their GRIB2 messages (byte ranges
+                from the .idx file) into one GRIB2 file instead of NetCDF
 
     Returns:
         Path to downloaded file, or None if download failed
@@ -310,13 +347,23 @@ def download_gfs_wave_data(
             logger.info(f"[DRY RUN] Would download: {H.grib}")
             if variables:
                 logger.info(f"[DRY RUN] Variables: {', '.join(variables)}")
+            if variables and subset:
+                logger.info(f"[DRY RUN] Search regex: {build_search_regex(variables)}")
             return None
 
         # Ensure output directory exists
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # Download data
-        if variables:
+        if variables and subset:
+            # Fetch only the matching messages (byte ranges from the .idx
+            # file), saved under the full-file name so processing is unchanged
+            filename = f"gfs_wave.{date.strftime('%Y%m%d')}.t{date.hour:02d}z.f{fxx:03d}.grib2"
+            output_path = download_grib_subset(H, variables, output_dir / filename, logger)
+            if output_path is None:
+                return None
+
+        elif variables:
             # Download specific variables
             logger.info(f"Downloading variables: {', '.join(variables)}")
 
@@ -369,7 +416,6 @@ def download_gfs_wave_data(
                 # Move to our output directory with standard naming
                 filename = f"gfs_wave.{date.strftime('%Y%m%d')}.t{date.hour:02d}z.f{fxx:03d}.grib2"
                 output_path = output_dir / filename
-                import shutil
                 shutil.move(str(downloaded_path), str(output_path))
                 logger.info(f"Moved to {output_path}")
             else:
@@ -496,7 +542,7 @@ def main():
     logger.info(f"Forecast hours: {forecast_hours}")
 
     # Parse variables
-    variables = parse_variables(args.variables)
+    variables = parse_variables(args.variables, args.config)
     if variables:
         logger.info(f"Variables: {', '.join(variables)}")
     else:
@@ -523,7 +569,8 @@ def main():
             variables=variables,
             output_dir=args.output_dir,
             logger=logger,
-            dry_run=args.dry_run
+            dry_run=args.dry_run,
+            subset=args.subset
         )
 
         if file_path:
@@ -32,6 +32,14 @@ DRY_RUN="${DRY_RUN:-false}"
 PRIORITY="${PRIORITY:-1}"
 ZOOM_LEVELS="${ZOOM_LEVELS:-0-6}"
 TILE_PROCESSES="${TILE_PROCESSES:-4}"
+PROCESS_FILE_WORKERS="${PROCESS_FILE_WORKERS:-1}"  # GRIB files processed concurrently in process_weather.py
+WARP_PLAN_DIR="${WARP_PLAN_DIR:-$WORK_DIR/warp-plans}"  # Cached warp plans, kept across runs
+MEMORY_HISTORY_DIR="${MEMORY_HISTORY_DIR:-$WORK_DIR/memory-history}"  # Learned peak memory, kept across runs
+CONFIG_CACHE_DIR="${CONFIG_CACHE_DIR:-$WORK_DIR/config-cache}"  # Compiled config snapshots, kept across runs
+MEMORY_BUDGET_MB="${MEMORY_BUDGET_MB:-}"  # Memory budget for concurrent workers (default: 80% of available)
+STAGE_METRICS="${STAGE_METRICS:-false}"  # Send per-variable stage timings to CloudWatch
+FUSED_COLORIZE="${FUSED_COLORIZE:-false}"  # Write colored COGs during processing (skips apply_colormap.py)
+ZARR_CUBES="${ZARR_CUBES:-false}"  # Also write per-variable, per-cycle Zarr cubes (forecast_hour, y, x)
 FORECAST_HOURS="${FORECAST_HOURS:-0-12}"  # Forecast hours to download (e.g., "0-6", "0-12", "0,3,6")
 
 # Timestamps
@@ -184,7 +192,9 @@ download_data() {
         --date $MODEL_DATE \
         --cycle=$MODEL_CYCLE \
         --fxx $FORECAST_HOURS \
-        --variables all \
+        --variables config \
+        --subset \
+        --config /app/config/variables.yaml \
         --output /data/output \
         --keep-local"
 
@@ -240,39 +250,66 @@ process_grib2() {
         return 0
     fi
 
-    # Process each GRIB file
-    local processed_count=0
-    local failed_count=0
+    # Process all GRIB files in a single container/Python process
     local total_files=${#GRIB2_FILES[@]}
-
+    local input_args=""
     for grib_file in "${GRIB2_FILES[@]}"; do
-        local grib_name=$(basename "$grib_file")
-        processed_count=$((processed_count + 1))
-        log_info "Processing GRIB file $processed_count/$total_files: $grib_name"
-
-        local cmd="docker run --rm \
-            --user $(id -u):$(id -g) \
-            -e HOME=/tmp \
-            -v $DOWNLOAD_DIR:/data/input \
-            -v $processed_dir:/data/output \
-            -v $PROJECT_ROOT:/app \
-            weather-processor:latest \
-            python3 /app/scripts/processing/process_weather.py \
-            --input /data/input/$grib_name \
-            --output /data/output \
-            --priority $PRIORITY"
-
-        if $cmd >> "$LOG_FILE" 2>&1; then
-            log_info "  Processed: $grib_name"
-        else
-            failed_count=$((failed_count + 1))
-            log_warn "  Failed to process: $grib_name (continuing with remaining files)"
-        fi
+        input_args="$input_args /data/input/$(basename "$grib_file")"
     done
+    log_info "Processing $total_files GRIB files (${PROCESS_FILE_WORKERS} concurrent)"
+
+    mkdir -p "$WARP_PLAN_DIR" "$MEMORY_HISTORY_DIR" "$CONFIG_CACHE_DIR"
+
+    local metrics_arg=""
+    if [[ "$STAGE_METRICS" == "true" && "$DRY_RUN" != "true" ]]; then
+        metrics_arg="--metrics"
+    fi
+    local budget_arg=""
+    if [[ -n "$MEMORY_BUDGET_MB" ]]; then
+        budget_arg=" --memory-budget-mb $MEMORY_BUDGET_MB"
+    fi
+
+    local colored_dir="$WORK_DIR/colored"
+    local colorize_args=""
+    if [[ "$FUSED_COLORIZE" == "true" ]]; then
+        mkdir -p "$colored_dir"
+        colorize_args="-v $colored_dir:/data/colored"
+    fi
 
-    # Record any processing failures
-    if [[ $failed_count -gt 0 ]]; then
-        record_pipeline_error "Processing" "Failed to process $failed_count of $total_files GRIB files"
+    local zarr_args=""
+    if [[ "$ZARR_CUBES" == "true" ]]; then
+        export ZARR_DIR="$WORK_DIR/zarr"
+        mkdir -p "$ZARR_DIR"
+        zarr_args="-v $ZARR_DIR:/data/zarr"
+    fi
+
+    local cmd="docker run --rm \
+        --user $(id -u):$(id -g) \
+        -e HOME=/tmp \
+        -e WARP_PLAN_DIR=/data/warp-plans \
+        -e MEMORY_HISTORY_FILE=/data/memory-history/memory-history-hrrr.json \
+        -e CONFIG_CACHE_DIR=/data/config-cache \
+        -v $DOWNLOAD_DIR:/data/input \
+        -v $processed_dir:/data/output \
+        -v $WARP_PLAN_DIR:/data/warp-plans \
+        -v $MEMORY_HISTORY_DIR:/data/memory-history \
+        -v $CONFIG_CACHE_DIR:/data/config-cache \
+        $colorize_args \
+        $zarr_args \
+        -v $PROJECT_ROOT:/app \
+        weather-processor:latest \
+        python3 /app/scripts/processing/process_weather.py \
+        --input $input_args \
+        --output /data/output \
+        --priority $PRIORITY \
+        --file-workers $PROCESS_FILE_WORKERS \
+        --incremental $metrics_arg$budget_arg${colorize_args:+ --colorize /data/colored}${zarr_args:+ --zarr /data/zarr}"
+
+    if $cmd >> "$LOG_FILE" 2>&1; then
+        log_info "  Processed all $total_files GRIB files"
+    else
+        # Per-file failures are listed in the processing summary in the log
+        record_pipeline_error "Processing" "One or more of $total_files GRIB files failed to process (see log)"
     fi
 
     log_success "GRIB2 processing completed"
@@ -305,6 +342,14 @@ apply_colormaps() {
         return 0
     fi
 
+    if [[ "$FUSED_COLORIZE" == "true" ]]; then
+        local colored_count=$(find "$colored_dir" -name "*_colored.tif" | wc -l | tr -d ' ')
+        log_info "Colored COGs were written during processing ($colored_count files)"
+        export COLORED_DIR="$colored_dir"
+        end_step_timer "Colormap"
+        return 0
+    fi
+
     local cmd="docker run --rm \
         --user $(id -u):$(id -g) \
         -e HOME=/tmp \
@@ -421,6 +466,20 @@ upload_to_s3() {
         return 1
     fi
 
+    # Upload Zarr cubes (if written)
+    if [[ "$ZARR_CUBES" == "true" ]] && [[ -d "$ZARR_DIR" ]]; then
+        log_info "Uploading Zarr cubes..."
+        if aws s3 sync "$ZARR_DIR" "s3://$S3_BUCKET/zarr/${MODEL_DATE}/" \
+            --exclude "*.lock" \
+            --quiet >> "$LOG_FILE" 2>&1; then
+            log_success "Zarr cubes uploaded"
+        else
+            record_pipeline_error "S3Upload" "Failed to upload Zarr cubes"
+            end_step_timer "S3Upload"
+            return 1
+        fi
+    fi
+
     # Upload tiles (if generated)
     if [[ "$ENABLE_TILES" == "true" ]] && [[ -d "$TILES_DIR" ]]; then
         log_info "Uploading tiles..."
@@ -881,6 +940,14 @@ ENVIRONMENT VARIABLES:
   ENABLE_TILES        Enable tile generation (true/false)
   PRIORITY            Processing priority (1-3)
   ZOOM_LEVELS         Zoom levels for tile generation
+  PROCESS_FILE_WORKERS  GRIB files processed concurrently (default: 1)
+  WARP_PLAN_DIR       Warp plan cache directory (default: $WORK_DIR/warp-plans)
+  MEMORY_HISTORY_DIR  Learned peak memory directory (default: $WORK_DIR/memory-history)
+  CONFIG_CACHE_DIR    Compiled config snapshot directory (default: $WORK_DIR/config-cache)
+  MEMORY_BUDGET_MB    Memory budget for concurrent workers (default: 80% of available)
+  STAGE_METRICS       Send per-variable stage timings to CloudWatch (true/false)
+  FUSED_COLORIZE      Write colored COGs during processing; skips apply_colormap.py (true/false)
+  ZARR_CUBES          Also write per-cycle Zarr cubes and upload them (true/false)
   FORECAST_HOURS      Forecast hours to download (e.g., "0-6", "0-12")
   DRY_RUN             Dry run mode (true/false)
 
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Area-of-Interest Clipping
+
+Limits processing to the part of a model grid that is actually published:
+- The area of interest is a lon/lat bounding box (west, south, east, north),
+  from process_weather.py --bbox or processing.aoi
+- Its edges are transformed into the source grid's CRS (densified, so
+  curved edges on projected grids like HRRR's Lambert conformal are
+  covered) and turned into a pixel window, padded for the resampling
+  kernel and clipped to the grid
+- Only that window is read from the GRIB2 band, so unit conversion,
+  reprojection and the COG write all scale with the AOI
+
+Grids with 0-360 longitudes (GFS-Wave) take boxes in either -180-180 or
+0-360 degrees: the box is shifted as a whole into the grid's longitude
+range. On a global grid, a box that crosses the grid's longitude seam gets
+a window that wraps around it (read_window reads the two pieces).
+"""
+
+import logging
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from osgeo import gdal
+from pyproj import CRS, Transformer
+
+# Source pixels kept around the AOI for the resampling kernel (cubic needs 2)
+WINDOW_MARGIN = 2
+
+# Points per bbox edge transformed to the source CRS
+EDGE_POINTS = 21
+
+
+class PixelWindow(NamedTuple):
+    """
+    Source pixel window (GDAL ReadAsArray order).
+
+    On a global lat/lon grid xoff + xsize may exceed the grid width; the
+    window then wraps around the longitude seam (see read_window).
+    """
+    xoff: int
+    yoff: int
+    xsize: int
+    ysize: int
+
+
+def parse_bbox(value: Optional[Sequence]) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Validate a lon/lat bounding box.
+
+    Args:
+        value: [west, south, east, north] in degrees, a "w,s,e,n" string,
+               or None
+
+    Returns:
+        (west, south, east, north), or None if value is None
+
+    Raises:
+        ValueError: If the box is malformed
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    if len(value) != 4:
+        raise ValueError(f"AOI must be [west, south, east, north], got {value!r}")
+    west, south, east, north = (float(v) for v in value)
+    if not -90 <= south < north <= 90:
+        raise ValueError(f"AOI south/north must satisfy -90 <= south < north <= 90, got {south}, {north}")
+    if not (-180 <= west <= 360 and -180 <= east <= 360) or west == east:
+        raise ValueError(f"AOI west/east must be distinct longitudes in [-180, 360], got {west}, {east}")
+    return west, south, east, north
+
+
+def _bbox_outline(bbox: Tuple[float, float, float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Densified outline of a bbox as (lons, lats)."""
+    west, south, east, north = bbox
+    if east < west:
+        east += 360  # Box crossing the antimeridian
+    lons = np.linspace(west, east, EDGE_POINTS)
+    lats = np.linspace(south, north, EDGE_POINTS)
+    outline_lons = np.concatenate([lons, np.full(EDGE_POINTS, east), lons, np.full(EDGE_POINTS, west)])
+    outline_lats = np.concatenate([np.full(EDGE_POINTS, south), lats, np.full(EDGE_POINTS, north), lats])
+    return outline_lons, outline_lats
+
+
+def _is_global(width: int, geotransform: Sequence[float]) -> bool:
+    """Whether a lat/lon grid spans all 360 degrees of longitude."""
+    return abs(width * abs(geotransform[1]) - 360) < abs(geotransform[1]) / 2
+
+
+def _grid_longitudes(
+    bbox: Tuple[float, float, float, float],
+    grid_west: float,
+    grid_east: float
+) -> Tuple[float, float, float, float]:
+    """Shift a bbox's west/east as a whole into a lat/lon grid's longitude range."""
+    west, south, east, north = bbox
+    if east <= west:
+        east += 360  # Box crossing the antimeridian (or ending at 0 on 0-360)
+    if west < grid_west:
+        west, east = west + 360, east + 360
+    elif west >= grid_east:
+        west, east = west - 360, east - 360
+    return west, south, east, north
+
+
+def get_aoi_window(
+    dataset: gdal.Dataset,
+    bbox: Tuple[float, float, float, float],
+    logger: logging.Logger
+) -> Optional[PixelWindow]:
+    """
+    Source pixel window covering a lon/lat bounding box.
+
+    Args:
+        dataset: Source dataset (any band of the grid)
+        bbox: (west, south, east, north) in degrees
+        logger: Logger instance
+
+    Returns:
+        Pixel window, or None if the box covers the whole grid
+
+    Raises:
+        ValueError: If the box doesn't intersect the grid
+    """
+    width, height = dataset.RasterXSize, dataset.RasterYSize
+    gt = dataset.GetGeoTransform()
+    source_crs = CRS.from_wkt(dataset.GetProjection())
+
+    if source_crs.is_geographic:
+        # Match the grid's longitude convention (0-360 or -180-180); the box
+        # is shifted as a whole so it stays contiguous
+        xs, ys = _bbox_outline(_grid_longitudes(bbox, gt[0], gt[0] + width * gt[1]))
+    else:
+        lons, lats = _bbox_outline(bbox)
+        transformer = Transformer.from_crs('EPSG:4326', source_crs, always_xy=True)
+        xs, ys = transformer.transform(lons, lats)
+
+    cols = (np.asarray(xs) - gt[0]) / gt[1]
+    rows = (np.asarray(ys) - gt[3]) / gt[5]
+    finite = np.isfinite(cols) & np.isfinite(rows)
+    if not finite.any():
+        raise ValueError(f"AOI {bbox} cannot be transformed to the source grid")
+    cols, rows = cols[finite], rows[finite]
+
+    col_min = int(np.floor(cols.min())) - WINDOW_MARGIN
+    col_max = int(np.ceil(cols.max())) + WINDOW_MARGIN
+    row_min = int(np.floor(rows.min())) - WINDOW_MARGIN
+    row_max = int(np.ceil(rows.max())) + WINDOW_MARGIN
+
+    if source_crs.is_geographic and _is_global(width, gt):
+        # Columns past either edge wrap around the seam
+        if col_max - col_min >= width:
+            col_min, col_max = 0, width
+        else:
+            offset = (col_min // width) * width
+            col_min, col_max = col_min - offset, col_max - offset
+    else:
+        col_min, col_max = max(col_min, 0), min(col_max, width)
+    row_min, row_max = max(row_min, 0), min(row_max, height)
+    if col_min >= col_max or row_min >= row_max:
+        raise ValueError(f"AOI {bbox} does not intersect the source grid")
+
+    window = PixelWindow(col_min, row_min, col_max - col_min, row_max - row_min)
+    if window == (0, 0, width, height):
+        return None
+    logger.info(f"AOI window: {window.xsize}x{window.ysize} of {width}x{height} source pixels "
+                f"({100 * window.xsize * window.ysize / (width * height):.0f}%"
+                f"{', wrapping the longitude seam' if col_max > width else ''})")
+    return window
+
+
+def read_window(band: gdal.Band, window: PixelWindow, buf_type: int) -> np.ndarray:
+    """
+    Read a pixel window from a band, joining the pieces of a wrapped window.
+
+    Args:
+        band: Source band
+        window: Pixel window (may wrap past the grid's east edge)
+        buf_type: GDAL data type to read as
+
+    Returns:
+        Array of shape (window.ysize, window.xsize)
+    """
+    east_cols = band.XSize - window.xoff
+    if window.xsize <= east_cols:
+        return band.ReadAsArray(*window, buf_type=buf_type)
+    east = band.ReadAsArray(window.xoff, window.yoff, east_cols, window.ysize, buf_type=buf_type)
+    west = band.ReadAsArray(0, window.yoff, window.xsize - east_cols, window.ysize, buf_type=buf_type)
+    return np.concatenate([east, west], axis=1)
+
+
+def window_geotransform(geotransform: Sequence[float], window: Optional[PixelWindow]) -> List[float]:
+    """Geotransform of a pixel window of a north-up grid."""
+    gt = list(geotransform)
+    if window is not None:
+        gt[0] += window.xoff * gt[1]
+        gt[3] += window.yoff * gt[5]
+    return gt
@@ -5,7 +5,7 @@ Apply Color Ramps to Weather Data COGs
 Takes grayscale Cloud Optimized GeoTIFFs and applies color ramps for visualization:
 - Reads color ramp configurations from variables.yaml
 - Converts YAML color definitions to GDAL color-relief format
-- Applies color ramps using gdaldem color-relief
+- Applies color ramps using GDAL color-relief (gdal.DEMProcessing, in process)
 - Outputs RGB GeoTIFFs optimized for web display
 - Supports transparency for no-data values
 
@@ -16,16 +16,16 @@ import argparse
 import logging
 import sys
 import tempfile
-import shutil
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-import subprocess
 
 from osgeo import gdal
 
 # Add config directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from config.config_manager import VariableConfig
+from scripts.processing.block_mask import BLOCK_MASK_TAG, encode_block_mask, read_block_mask
+from scripts.processing.scratch import get_scratch_space
 
 
 # Configure GDAL
@@ -53,14 +53,25 @@ def setup_logging(verbose: bool = False) -> logging.Logger:
     return logging.getLogger('apply_colormap')
 
 
-def create_color_relief_file(color_ramp: Dict, temp_dir: Path, logger: logging.Logger) -> Path:
+def create_color_relief_file(
+    color_ramp: Dict,
+    temp_dir: Path,
+    logger: logging.Logger,
+    scale: float = 1.0,
+    offset: float = 0.0
+) -> Path:
     """
     Create a GDAL color-relief text file from YAML color ramp configuration.
 
+    color-relief colors raw pixel values, so for quantized COGs (integer
+    codes with scale/offset) the stops are converted to codes.
+
     Args:
         color_ramp: Color ramp configuration from variables.yaml
         temp_dir: Temporary directory for color file
         logger: Logger instance
+        scale: Input band scale (value = code * scale + offset)
+        offset: Input band offset
 
     Returns:
         Path to color-relief text file
@@ -86,6 +97,8 @@ def create_color_relief_file(color_ramp: Dict, temp_dir: Path, logger: logging.L
 
         for color_stop in colors:
             value = color_stop['value']
+            if scale != 1.0 or offset != 0.0:
+                value = (value - offset) / scale
             hex_color = color_stop['color']
 
             # Convert hex color to RGB
@@ -111,16 +124,26 @@ def apply_color_ramp(
     input_cog: Path,
     output_path: Path,
     color_file: Path,
-    logger: logging.Logger
+    logger: logging.Logger,
+    sparse: bool = False,
+    metadata: Optional[Dict[str, str]] = None
 ) -> bool:
     """
-    Apply color ramp to a COG using gdaldem color-relief.
+    Apply color ramp to a COG using GDAL color-relief.
+
+    The RGBA output and its overviews are built in scratch space
+    (/vsimem/ when it fits the scratch budget, else a temp file) and
+    written to output_path once complete. Sparse output also records the
+    input's valid-data block mask (VALID_BLOCKS tag).
 
     Args:
         input_cog: Input grayscale COG
         output_path: Output RGB GeoTIFF path
         color_file: Color-relief text file
         logger: Logger instance
+        sparse: Don't store fully transparent blocks (SPARSE_OK), and
+                record the block mask
+        metadata: Tags to record in the output (e.g. INPUT_HASH)
 
     Returns:
         True if successful, False otherwise
@@ -128,52 +151,49 @@ def apply_color_ramp(
     logger.info(f"Applying color ramp to {input_cog.name}")
 
     try:
-        # Ensure output directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Use a temporary file for initial output
-        with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as tmp_file:
-            temp_output = Path(tmp_file.name)
-
-        # Run gdaldem color-relief
-        cmd = [
-            'gdaldem',
-            'color-relief',
-            str(input_cog),
-            str(color_file),
-            str(temp_output),
-            '-alpha',  # Add alpha channel for transparency
-            '-co', 'COMPRESS=DEFLATE',
-            '-co', 'PREDICTOR=2',
-            '-co', 'ZLEVEL=6',
-            '-co', 'TILED=YES',
-            '-co', 'BLOCKXSIZE=512',
-            '-co', 'BLOCKYSIZE=512',
-            '-co', 'NUM_THREADS=ALL_CPUS'
-        ]
-
-        logger.debug(f"Running: {' '.join(cmd)}")
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-
-        if result.returncode != 0:
-            logger.error(f"gdaldem failed: {result.stderr}")
-            return False
-
-        # Add overviews to the output file
-        logger.debug("Adding overviews to RGB output")
-        ds = gdal.Open(str(temp_output), gdal.GA_Update)
-        if ds:
+        src_ds = gdal.Open(str(input_cog))
+        # Uncompressed RGBA size; the DEFLATE output is smaller
+        estimated_mb = src_ds.RasterXSize * src_ds.RasterYSize * 4 / 1024 / 1024
+        block_mask = read_block_mask(src_ds)
+        logger.debug(f"Blocks with data: {block_mask.mask.sum()} of {block_mask.mask.size}")
+
+        scratch = get_scratch_space()
+        with scratch.path('.tif', estimated_mb) as temp_output:
+            # Equivalent of: gdaldem color-relief -alpha -co ...
+            dem_options = gdal.DEMProcessingOptions(
+                colorFilename=str(color_file),
+                addAlpha=True,  # Add alpha channel for transparency
+                format='GTiff',
+                creationOptions=[
+                    'COMPRESS=DEFLATE',
+                    'PREDICTOR=2',
+                    'ZLEVEL=6',
+                    'TILED=YES',
+                    'BLOCKXSIZE=512',
+                    'BLOCKYSIZE=512',
+                    'NUM_THREADS=ALL_CPUS',
+                ] + (['SPARSE_OK=TRUE'] if sparse else [])
+            )
+
+            logger.debug(f"Running color-relief: {input_cog} -> {temp_output}")
+            ds = gdal.DEMProcessing(temp_output, src_ds, 'color-relief', options=dem_options)
+            if ds is None:
+                logger.error("color-relief produced no output")
+                return False
+
+            for key, value in (metadata or {}).items():
+                ds.SetMetadataItem(key, value)
+            if sparse:
+                ds.SetMetadataItem(BLOCK_MASK_TAG, encode_block_mask(*block_mask))
+
+            # Add overviews to the output file
+            logger.debug("Adding overviews to RGB output")
             ds.BuildOverviews('AVERAGE', [2, 4, 8, 16])
             ds = None
+            src_ds = None
 
-        # Move temp file to final location
-        shutil.move(str(temp_output), str(output_path))
+            # Move scratch file to final location
+            scratch.move(temp_output, output_path)
 
         # Get file size
         size_mb = output_path.stat().st_size / 1024 / 1024
@@ -181,9 +201,6 @@ def apply_color_ramp(
 
         return True
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"gdaldem command failed: {e.stderr}")
-        return False
     except Exception as e:
         logger.error(f"Error applying color ramp: {e}")
         return False
@@ -194,7 +211,8 @@ def process_cog_file(
     variable_name: str,
     config: VariableConfig,
     output_dir: Path,
-    logger: logging.Logger
+    logger: logging.Logger,
+    metadata: Optional[Dict[str, str]] = None
 ) -> Optional[Path]:
     """
     Process a single COG file with color ramp.
@@ -205,6 +223,7 @@ def process_cog_file(
         config: Variable configuration
         output_dir: Output directory
         logger: Logger instance
+        metadata: Tags to record in the output (e.g. INPUT_HASH)
 
     Returns:
         Path to output file if successful, None otherwise
@@ -227,12 +246,22 @@ def process_cog_file(
         logger.error(f"Color ramp '{color_ramp_name}' not found in configuration")
         return None
 
+    processing = config.get_processing_config()
+    get_scratch_space(processing.get('scratch_memory_mb'), processing.get('scratch_dir'), logger)
+
     # Create temporary directory for color file
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir)
 
+        # Quantized COGs store codes; map the color stops onto them
+        ds = gdal.Open(str(input_cog))
+        band = ds.GetRasterBand(1)
+        scale = band.GetScale() or 1.0
+        offset = band.GetOffset() or 0.0
+        band = ds = None
+
         # Create color-relief file
-        color_file = create_color_relief_file(color_ramp, temp_path, logger)
+        color_file = create_color_relief_file(color_ramp, temp_path, logger, scale, offset)
 
         # Generate output filename
         # Input: temperature_2m_hrrr.20260110.t19z.f00.tif
@@ -241,7 +270,9 @@ def process_cog_file(
         output_path = output_dir / output_name
 
         # Apply color ramp
-        success = apply_color_ramp(input_cog, output_path, color_file, logger)
+        success = apply_color_ramp(input_cog, output_path, color_file, logger,
+                                   sparse=processing.get('sparse_cogs', False),
+                                   metadata=metadata)
 
         if success:
             return output_path
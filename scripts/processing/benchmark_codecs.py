@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+COG Compression Codec Benchmark
+
+Finds the best compression settings per variable from real sample COGs:
+- Re-encodes each COG with every codec/level/predictor combination using
+  the same COG options as process_weather.create_cog
+- Reports encode time, decode time (full-resolution read) and file size
+- Picks, per variable, the smallest output whose encode and decode times
+  stay within a slowdown factor of the variable's current settings
+- Optionally writes the picks back to variables.yaml as each variable's
+  `compression` setting, which create_cog then uses
+
+Usage:
+    python benchmark_codecs.py --input /tmp/processed-weather/
+    python benchmark_codecs.py --input /tmp/processed-weather/ --write-config
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+from osgeo import gdal
+
+# Add config directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.config_manager import VariableConfig
+from scripts.processing.apply_colormap import find_cog_files, infer_variable_name
+from scripts.processing.process_weather import (
+    CompressionSettings,
+    cog_creation_options,
+    get_compression_settings,
+    setup_logging,
+)
+
+# Codec -> (levels, predictors) tried by default. LERC is run lossless
+# (MAX_Z_ERROR=0); lossy LERC is a precision decision, not a codec one.
+CODEC_GRID = {
+    'DEFLATE': ([1, 6, 9], [1, 2, 3]),
+    'ZSTD': ([1, 9, 15], [1, 2, 3]),
+    'LZW': ([None], [1, 2, 3]),
+    'LERC_DEFLATE': ([6], [None]),
+    'LERC_ZSTD': ([9], [None]),
+}
+
+SCRATCH_PATH = '/vsimem/benchmark_codecs.tif'
+
+
+def build_candidates(codecs: List[str], integer: bool) -> List[CompressionSettings]:
+    """
+    Expand the codec grid into compression settings.
+
+    Args:
+        codecs: Codec names to include (keys of CODEC_GRID)
+        integer: Input is integer (quantized); skips the floating point predictor
+
+    Returns:
+        List of CompressionSettings
+    """
+    candidates = []
+    for codec in codecs:
+        levels, predictors = CODEC_GRID[codec]
+        for level in levels:
+            for predictor in predictors:
+                if integer and predictor == 3:
+                    continue
+                max_z_error = 0 if codec.startswith('LERC') else None
+                candidates.append(CompressionSettings(codec, level, predictor, max_z_error))
+    return candidates
+
+
+def label(settings: CompressionSettings) -> str:
+    """Short human-readable name for a compression setting."""
+    parts = [settings.codec]
+    if settings.level is not None:
+        parts.append(f"L{settings.level}")
+    if settings.predictor is not None:
+        parts.append(f"P{settings.predictor}")
+    if settings.max_z_error is not None:
+        parts.append(f"Z{settings.max_z_error}")
+    return '/'.join(parts)
+
+
+def benchmark_settings(
+    src_ds: gdal.Dataset,
+    settings: CompressionSettings,
+    processing: Dict,
+    integer: bool,
+    repeat: int
+) -> Dict[str, float]:
+    """
+    Encode src_ds as a COG in /vsimem/ and read it back.
+
+    Args:
+        src_ds: Source dataset, already decoded into memory
+        settings: Compression settings to test
+        processing: Processing config (tile size, overview levels)
+        integer: Source is integer (quantized)
+        repeat: Runs per measurement (fastest run is kept)
+
+    Returns:
+        Dict with encode_s, decode_s and size_bytes
+    """
+    creation_options = cog_creation_options(
+        settings,
+        processing.get('tile_size', 512),
+        processing.get('overview_levels', [2, 4, 8, 16]),
+        quantized=integer
+    )
+    translate_options = gdal.TranslateOptions(format='COG', creationOptions=creation_options)
+
+    encode_times, decode_times = [], []
+    size_bytes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out_ds = gdal.Translate(SCRATCH_PATH, src_ds, options=translate_options)
+        out_ds = None
+        encode_times.append(time.perf_counter() - start)
+        size_bytes = gdal.VSIStatL(SCRATCH_PATH).size
+
+        start = time.perf_counter()
+        ds = gdal.Open(SCRATCH_PATH)
+        ds.GetRasterBand(1).ReadAsArray()
+        ds = None
+        decode_times.append(time.perf_counter() - start)
+
+        gdal.Unlink(SCRATCH_PATH)
+
+    return {
+        'encode_s': min(encode_times),
+        'decode_s': min(decode_times),
+        'size_bytes': size_bytes,
+    }
+
+
+def choose_settings(
+    results: Dict[CompressionSettings, Dict[str, float]],
+    current: CompressionSettings,
+    max_encode_slowdown: float,
+    max_decode_slowdown: float
+) -> CompressionSettings:
+    """
+    Pick the smallest output within the allowed slowdown vs current settings.
+
+    Args:
+        results: Settings -> aggregated encode_s, decode_s, size_bytes
+        current: The variable's current settings (must be in results)
+        max_encode_slowdown: Allowed encode time as a multiple of current
+        max_decode_slowdown: Allowed decode time as a multiple of current
+
+    Returns:
+        Chosen settings (current if nothing smaller qualifies)
+    """
+    baseline = results[current]
+    eligible = [
+        settings for settings, result in results.items()
+        if result['encode_s'] <= baseline['encode_s'] * max_encode_slowdown
+        and result['decode_s'] <= baseline['decode_s'] * max_decode_slowdown
+    ]
+    best = min(eligible, key=lambda s: (results[s]['size_bytes'], results[s]['decode_s']))
+    if results[best]['size_bytes'] >= baseline['size_bytes']:
+        return current
+    return best
+
+
+def settings_to_yaml(settings: CompressionSettings) -> str:
+    """Render settings as a one-line YAML flow mapping."""
+    fields = [f"codec: {settings.codec}"]
+    if settings.level is not None:
+        fields.append(f"level: {settings.level}")
+    if settings.predictor is not None:
+        fields.append(f"predictor: {settings.predictor}")
+    if settings.max_z_error is not None:
+        fields.append(f"max_z_error: {settings.max_z_error}")
+    return '{' + ', '.join(fields) + '}'
+
+
+def write_variable_compression(config_path: Path, variable_name: str, settings: CompressionSettings) -> None:
+    """
+    Set a variable's `compression` in variables.yaml, keeping comments.
+
+    The variable block is edited as text: an existing `compression:` entry
+    is replaced, otherwise one is added after the block's last setting.
+
+    Args:
+        config_path: variables.yaml path
+        variable_name: Variable to update
+        settings: Compression settings to write
+    """
+    lines = config_path.read_text().splitlines(keepends=True)
+    header = re.compile(rf"^  {re.escape(variable_name)}:\s*(#.*)?$")
+
+    in_variables = False
+    start = None
+    for index, line in enumerate(lines):
+        if line.startswith('variables:'):
+            in_variables = True
+        elif in_variables and header.match(line.rstrip('\n')):
+            start = index
+            break
+    if start is None:
+        raise KeyError(f"Variable '{variable_name}' not found in {config_path}")
+
+    # Block ends at the next line indented two spaces or less
+    end = start + 1
+    while end < len(lines):
+        stripped = lines[end].strip()
+        indent = len(lines[end]) - len(lines[end].lstrip())
+        if stripped and indent <= 2:
+            break
+        end += 1
+
+    # Drop an existing compression entry (and any nested lines)
+    block = lines[start + 1:end]
+    kept = []
+    skipping = False
+    for line in block:
+        indent = len(line) - len(line.lstrip())
+        if line.startswith('    compression:'):
+            skipping = True
+            continue
+        if skipping and line.strip() and indent > 4:
+            continue
+        skipping = False
+        kept.append(line)
+
+    # Insert after the last non-blank line of the block
+    insert_at = len(kept)
+    while insert_at > 0 and not kept[insert_at - 1].strip():
+        insert_at -= 1
+    kept.insert(insert_at, f"    compression: {settings_to_yaml(settings)}\n")
+
+    lines[start + 1:end] = kept
+    text = ''.join(lines)
+
+    # The edit must round-trip before it replaces the file
+    written = yaml.safe_load(text)['variables'][variable_name]['compression']
+    if written.get('codec') != settings.codec:
+        raise ValueError(f"Failed to write compression for '{variable_name}'")
+    config_path.write_text(text)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark COG compression codecs on sample COGs and pick settings per variable'
+    )
+    parser.add_argument('--input', '-i', type=Path, nargs='+', required=True,
+                       help='Sample COGs and/or directories of COGs written by process_weather.py')
+    parser.add_argument('--config', '-c', type=Path,
+                       help='Path to variables.yaml (default: config/variables.yaml)')
+    parser.add_argument('--variable', help='Only benchmark this variable')
+    parser.add_argument('--codecs', nargs='+', choices=sorted(CODEC_GRID), default=sorted(CODEC_GRID),
+                       help='Codecs to test (default: all)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Runs per combination; the fastest is reported (default: 3)')
+    parser.add_argument('--max-encode-slowdown', type=float, default=3.0,
+                       help='Allowed encode time vs current settings (default: 3.0)')
+    parser.add_argument('--max-decode-slowdown', type=float, default=1.5,
+                       help='Allowed decode time vs current settings (default: 1.5)')
+    parser.add_argument('--json', type=Path, help='Write all results as JSON')
+    parser.add_argument('--write-config', action='store_true',
+                       help="Write each variable's chosen settings to variables.yaml")
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logger = setup_logging(args.verbose)
+    config = VariableConfig(args.config)
+    processing = config.get_processing_config()
+    variables = config.config.get('variables', {})
+
+    # Group sample COGs by variable
+    samples: Dict[str, List[Path]] = {}
+    for input_path in args.input:
+        for cog in find_cog_files(input_path):
+            if cog.stem.endswith('_colored'):
+                continue
+            name = infer_variable_name(cog)
+            if name not in variables or (args.variable and name != args.variable):
+                continue
+            samples.setdefault(name, []).append(cog)
+
+    if not samples:
+        logger.error("No sample COGs matched variables in the configuration")
+        return 2
+
+    all_results = {}
+    choices: Dict[str, CompressionSettings] = {}
+
+    for name, cogs in sorted(samples.items()):
+        current = get_compression_settings(variables[name], processing)
+        totals: Dict[CompressionSettings, Dict[str, float]] = {}
+
+        for cog in cogs:
+            logger.info(f"Benchmarking {cog.name}")
+            # Decode the sample once so only the tested codec is timed
+            src_ds = gdal.Translate('', str(cog), options=gdal.TranslateOptions(format='MEM'))
+            integer = gdal.GetDataTypeName(src_ds.GetRasterBand(1).DataType).startswith(('Int', 'UInt', 'Byte'))
+
+            candidates = build_candidates(args.codecs, integer)
+            if current not in candidates:
+                candidates.append(current)
+
+            for settings in candidates:
+                result = benchmark_settings(src_ds, settings, processing, integer, args.repeat)
+                total = totals.setdefault(settings, {'encode_s': 0.0, 'decode_s': 0.0, 'size_bytes': 0})
+                for key, value in result.items():
+                    total[key] += value
+            src_ds = None
+
+        choice = choose_settings(totals, current, args.max_encode_slowdown, args.max_decode_slowdown)
+        choices[name] = choice
+
+        baseline = totals[current]
+        print(f"\n{name} ({len(cogs)} sample{'s' if len(cogs) != 1 else ''})")
+        print(f"{'Settings':<24} {'Size MB':>9} {'vs cur':>7} {'Encode s':>9} {'Decode s':>9}")
+        print("-" * 62)
+        for settings, result in sorted(totals.items(), key=lambda item: item[1]['size_bytes']):
+            marker = ' <- current' if settings == current else ''
+            marker += ' <- chosen' if settings == choice else ''
+            print(f"{label(settings):<24} {result['size_bytes'] / 1024 / 1024:>9.2f} "
+                  f"{result['size_bytes'] / baseline['size_bytes']:>7.0%} "
+                  f"{result['encode_s']:>9.3f} {result['decode_s']:>9.3f}{marker}")
+
+        all_results[name] = {
+            'samples': [str(cog) for cog in cogs],
+            'current': settings_to_yaml(current),
+            'chosen': settings_to_yaml(choice),
+            'results': {label(s): r for s, r in totals.items()},
+        }
+
+    if args.json:
+        args.json.write_text(json.dumps(all_results, indent=2))
+        logger.info(f"Results written to {args.json}")
+
+    if args.write_config:
+        for name, choice in choices.items():
+            if choice == get_compression_settings(variables[name], processing):
+                continue
+            write_variable_compression(config.config_path, name, choice)
+            logger.info(f"{name}: compression set to {settings_to_yaml(choice)}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+COG Writer Benchmark
+
+Compares the single-pass COG writer in process_weather.create_cog against
+the previous three-pass path (rioxarray GeoTIFF -> BuildOverviews ->
+gdal.Translate to COG):
+- Extracts, converts and reprojects one variable once
+- Writes it with both writers and reports wall time and file size
+- Checks that full-resolution pixels and overview counts match
+
+Usage:
+    python benchmark_cog_writer.py --input hrrr.20260110.t19z.f00.grib2 --variable temperature_2m
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import xarray as xr
+from osgeo import gdal
+
+# Add config directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.config_manager import VariableConfig
+from scripts.processing.process_weather import (
+    apply_unit_conversion,
+    create_cog,
+    extract_variable_from_grib,
+    reproject_to_web_mercator,
+    setup_logging,
+)
+
+
+def create_cog_three_pass(
+    data_array: xr.DataArray,
+    output_path: Path,
+    compression: str,
+    tile_size: int,
+    overview_levels: List[int],
+    logger: logging.Logger
+) -> bool:
+    """
+    Previous COG writer: tiled GeoTIFF, overviews, then COG translate.
+
+    Kept here only as the benchmark baseline.
+    """
+    temp_path = output_path.with_suffix('.tmp.tif')
+
+    try:
+        data_array.rio.to_raster(
+            str(temp_path),
+            driver='GTiff',
+            compress=compression,
+            tiled=True,
+            blockxsize=tile_size,
+            blockysize=tile_size,
+            BIGTIFF='IF_SAFER'
+        )
+
+        ds = gdal.Open(str(temp_path), gdal.GA_Update)
+        ds.BuildOverviews('AVERAGE', overview_levels)
+        ds = None
+
+        translate_options = gdal.TranslateOptions(
+            format='COG',
+            creationOptions=[
+                f'COMPRESS={compression}',
+                f'BLOCKSIZE={tile_size}',
+                'BIGTIFF=IF_SAFER'
+            ]
+        )
+        gdal.Translate(str(output_path), str(temp_path), options=translate_options)
+        temp_path.unlink()
+        return True
+
+    except Exception as e:
+        logger.error(f"Three-pass COG writer failed: {e}")
+        if temp_path.exists():
+            temp_path.unlink()
+        return False
+
+
+def compare_outputs(first: Path, second: Path) -> Dict[str, object]:
+    """
+    Compare two single-band rasters pixel by pixel.
+
+    Args:
+        first: First raster
+        second: Second raster
+
+    Returns:
+        Dict with 'pixels_equal', 'max_abs_diff' and overview counts
+    """
+    ds_a = gdal.Open(str(first))
+    ds_b = gdal.Open(str(second))
+    band_a = ds_a.GetRasterBand(1)
+    band_b = ds_b.GetRasterBand(1)
+
+    data_a = band_a.ReadAsArray()
+    data_b = band_b.ReadAsArray()
+    both_nan = np.isnan(data_a) & np.isnan(data_b)
+    diff = np.where(both_nan, 0, np.abs(data_a - data_b))
+
+    return {
+        'pixels_equal': bool(np.all(diff == 0)),
+        'max_abs_diff': float(np.nanmax(diff)) if diff.size else 0.0,
+        'overviews': (band_a.GetOverviewCount(), band_b.GetOverviewCount()),
+        'nodata': (band_a.GetNoDataValue(), band_b.GetNoDataValue()),
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Benchmark single-pass vs three-pass COG writing')
+    parser.add_argument('--input', '-i', type=Path, required=True, help='Input GRIB2 file')
+    parser.add_argument('--variable', required=True, help='Variable name from variables.yaml')
+    parser.add_argument('--config', '-c', type=Path, help='Path to variables.yaml')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per writer (best time reported)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logger = setup_logging(args.verbose)
+    config = VariableConfig(args.config)
+    processing = config.get_processing_config()
+
+    variable_config = config.get_variable_by_name(args.variable)
+    if not variable_config:
+        logger.error(f"Variable '{args.variable}' not found in configuration")
+        return 2
+
+    data_array = extract_variable_from_grib(
+        args.input, variable_config['grib_search'], logger,
+        dtype=processing.get('dtype', 'float32')
+    )
+    if data_array is None:
+        return 2
+    if variable_config.get('conversion'):
+        data_array = apply_unit_conversion(data_array, variable_config['conversion'], config, logger)
+    target_res = processing.get('target_resolution_meters')
+    data_array = reproject_to_web_mercator(
+        data_array,
+        processing.get('resampling_method', 'bilinear'),
+        logger,
+        target_resolution_meters=target_res if target_res and target_res > 0 else None
+    )
+
+    writer_args = dict(
+        compression=processing.get('compression', 'DEFLATE'),
+        tile_size=processing.get('tile_size', 512),
+        overview_levels=processing.get('overview_levels', [2, 4, 8, 16]),
+        logger=logger,
+    )
+    writers = {
+        'three_pass': create_cog_three_pass,
+        'single_pass': create_cog,
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        outputs = {}
+        timings = {}
+        for name, writer in writers.items():
+            output_path = Path(temp_dir) / f"{name}.tif"
+            runs = []
+            for _ in range(args.repeat):
+                if output_path.exists():
+                    output_path.unlink()
+                start = time.perf_counter()
+                if not writer(data_array, output_path, **writer_args):
+                    return 1
+                runs.append(time.perf_counter() - start)
+            outputs[name] = output_path
+            timings[name] = min(runs)
+
+        comparison = compare_outputs(outputs['three_pass'], outputs['single_pass'])
+
+        print(f"\nCOG writer benchmark: {args.variable} {data_array.shape}")
+        print("=" * 60)
+        for name in writers:
+            size_mb = outputs[name].stat().st_size / 1024 / 1024
+            print(f"  {name:<12} {timings[name]:8.3f} s  {size_mb:8.2f} MB")
+        print(f"  Speedup:     {timings['three_pass'] / timings['single_pass']:.2f}x")
+        print(f"  Pixels equal: {comparison['pixels_equal']} (max diff {comparison['max_abs_diff']:g})")
+        print(f"  Overviews:    {comparison['overviews'][0]} vs {comparison['overviews'][1]}")
+        print(f"  Nodata:       {comparison['nodata'][0]} vs {comparison['nodata'][1]}")
+
+    return 0 if comparison['pixels_equal'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Global Grid Pre-Warp Benchmark
+
+Compares reprojecting a 0-360 degree lat/lon field to EPSG:3857 as-is (the
+previous behavior) against normalizing it first with
+global_grid.normalize_geographic_grid (latitude clip + longitude roll):
+- Times the normalization and the reprojection, with the warper or with a
+  warp plan
+- Reports the output size and its x extent (as-is, a 0-360 grid extends
+  past the antimeridian)
+- Samples the output on a 1 degree lon/lat grid and reports coverage (the
+  share of samples with data) and the error against the source field
+
+Without --input, a synthetic GFS-Wave-like field is used (0.25 degrees,
+0-360 longitudes, +/-90 latitudes, land masked as nodata); its errors are
+measured against the analytic field.
+
+Usage:
+    python benchmark_global_grid.py
+    python benchmark_global_grid.py --input gfs_wave.20260110.t00z.f000.grib2 \\
+        --variable wave_height --config config/variables_gfs_wave.yaml
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import xarray as xr
+from pyproj import Transformer
+
+# Add config directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.config_manager import VariableConfig
+from scripts.processing.global_grid import normalize_geographic_grid
+from scripts.processing.process_weather import (
+    get_resampling_method,
+    get_target_resolution,
+    load_variable,
+    reproject_to_web_mercator,
+    setup_logging,
+)
+from scripts.processing.warp_plan import WarpPlanCache
+
+# Sample points for coverage and error
+SAMPLE_LONS = np.arange(-179.5, 180.0, 1.0)
+SAMPLE_LATS = np.arange(-80.5, 81.0, 1.0)
+
+
+def synthetic_field(lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+    """Smooth test field with NaN "land" where it is negative."""
+    lon_r, lat_r = np.radians(lons), np.radians(lats)
+    field = 2.0 + np.sin(2 * lon_r) * np.cos(lat_r) + 0.5 * np.cos(3 * lat_r)
+    return np.where(np.sin(lon_r) * np.cos(2 * lat_r) > 0.6, np.nan, field)
+
+
+def synthetic_global_grid() -> xr.DataArray:
+    """0.25 degree global field on 0-360 longitudes, like GFS-Wave."""
+    x = np.arange(1440) * 0.25
+    y = 90.0 - np.arange(721) * 0.25
+    values = synthetic_field(x[None, :], y[:, None]).astype(np.float32)
+    data_array = xr.DataArray(values, dims=['y', 'x'], coords={'x': x, 'y': y})
+    data_array = data_array.rio.write_crs('EPSG:4326')
+    return data_array.rio.write_nodata(np.float32(np.nan))
+
+
+def sample_output(reprojected: xr.DataArray) -> np.ndarray:
+    """Values of a reprojected field at the sample points (NaN = no data)."""
+    lons, lats = np.meshgrid(SAMPLE_LONS, SAMPLE_LATS)
+    x, y = Transformer.from_crs('EPSG:4326', 'EPSG:3857', always_xy=True).transform(lons, lats)
+    inverse = ~reprojected.rio.transform()
+    cols, rows = inverse * (x, y)
+    cols, rows = np.floor(cols).astype(int), np.floor(rows).astype(int)
+    height, width = reprojected.shape[-2:]
+    inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+
+    values = np.full(lons.shape, np.nan)
+    data = reprojected.values.squeeze()
+    values[inside] = data[rows[inside], cols[inside]]
+    nodata = reprojected.rio.nodata
+    if nodata is not None and not np.isnan(nodata):
+        values[values == nodata] = np.nan
+    return values
+
+
+def run_case(
+    data_array: xr.DataArray,
+    prepare: Callable[[xr.DataArray], xr.DataArray],
+    method: str,
+    target_res: Optional[float],
+    use_plan: bool,
+    repeat: int,
+    logger
+) -> Dict:
+    """Time prepare + reproject and sample the result."""
+    best_prepare, best_warp = float('inf'), float('inf')
+    reprojected = None
+    for _ in range(repeat):
+        # Fresh plan cache per run, so plans are built inside the timing
+        warp_plans = WarpPlanCache(logger=logger) if use_plan else None
+        start = time.perf_counter()
+        prepared = prepare(data_array)
+        mid = time.perf_counter()
+        reprojected = reproject_to_web_mercator(prepared, method, logger, target_res, warp_plans)
+        end = time.perf_counter()
+        best_prepare = min(best_prepare, mid - start)
+        best_warp = min(best_warp, end - mid)
+
+    transform = reprojected.rio.transform()
+    height, width = reprojected.shape[-2:]
+    return {
+        'prepare_s': best_prepare,
+        'warp_s': best_warp,
+        'shape': (width, height),
+        'mb': reprojected.values.nbytes / 1024 / 1024,
+        'x_extent': (transform.c, transform.c + width * transform.a),
+        'samples': sample_output(reprojected),
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark reprojecting 0-360 lat/lon grids as-is vs normalized'
+    )
+    parser.add_argument('--input', '-i', type=Path, help='GRIB2 file (default: synthetic field)')
+    parser.add_argument('--variable', help='Variable name from the config (with --input)')
+    parser.add_argument('--config', '-c', type=Path,
+                       help='Path to variables.yaml (default: config/variables_gfs_wave.yaml)')
+    parser.add_argument('--target-resolution', type=float,
+                       help='Output resolution in meters (default: processing.target_resolution_meters)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case (best time reported)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logger = setup_logging(args.verbose)
+    config_path = args.config or Path(__file__).parent.parent.parent / 'config' / 'variables_gfs_wave.yaml'
+    config = VariableConfig(config_path)
+    processing = config.get_processing_config()
+    target_res = args.target_resolution or get_target_resolution(processing)
+
+    if args.input:
+        if not args.variable:
+            parser.error('--variable is required with --input')
+        var_config = config.config['variables'][args.variable]
+        data_array = load_variable(args.input, var_config, config, logger)
+        if data_array is None:
+            return 2
+        method = get_resampling_method(var_config, processing)
+        truth = None
+    else:
+        data_array = synthetic_global_grid()
+        method = processing.get('resampling_method', 'bilinear')
+        lons, lats = np.meshgrid(SAMPLE_LONS, SAMPLE_LATS)
+        truth = synthetic_field(lons, lats)
+
+    height, width = data_array.shape[-2:]
+    print(f"Source: {width}x{height} px, x {float(data_array.x.min()):.2f}..{float(data_array.x.max()):.2f}, "
+          f"{method}, target resolution {target_res or 'native'} m")
+
+    cases = {
+        'as-is': lambda da: da,
+        'normalized': lambda da: normalize_geographic_grid(da, logger),
+    }
+    results = {}
+    for use_plan in (False, True):
+        for name, prepare in cases.items():
+            label = f"{name} ({'warp plan' if use_plan else 'warper'})"
+            logger.info(f"Running {label}")
+            try:
+                results[label] = run_case(data_array, prepare, method, target_res, use_plan,
+                                          args.repeat, logger)
+            except Exception as e:
+                logger.error(f"{label} failed: {e}")
+
+    reference = next((r['samples'] for label, r in results.items() if label.startswith('normalized')), None)
+    print(f"\n{'Case':<24} {'Prep s':>7} {'Warp s':>7} {'Output px':>13} {'MB':>7} "
+          f"{'x extent (km)':>21} {'Coverage':>9} {'Max err':>8}")
+    print("-" * 104)
+    for label, result in results.items():
+        samples = result['samples']
+        expected = truth if truth is not None else reference
+        both = ~np.isnan(samples) & ~np.isnan(expected)
+        coverage = np.count_nonzero(~np.isnan(samples)) / max(np.count_nonzero(~np.isnan(expected)), 1)
+        max_err = float(np.abs(samples[both] - expected[both]).max()) if both.any() else float('nan')
+        x0, x1 = (value / 1000 for value in result['x_extent'])
+        print(f"{label:<24} {result['prepare_s']:>7.3f} {result['warp_s']:>7.3f} "
+              f"{result['shape'][0]:>6}x{result['shape'][1]:<6} {result['mb']:>7.1f} "
+              f"{x0:>10.0f}..{x1:<9.0f} {coverage:>9.1%} {max_err:>8.3f}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Processing Benchmark Suite
+
+Runs the processing stages on synthetic fixtures with fixed settings, so
+that runs from before and after a change can be compared:
+- Generates HRRR-sized (1799 x 1059, 3 km Lambert conformal) and
+  GFS-Wave-sized (1440 x 721, 0.25 degree global) GRIB2 fixtures with GDAL
+  from a fixed random seed
+- Times each stage: process (process_weather.process_grib_file),
+  colormap (apply_colormap.process_cog_file) and tiles
+  (generate_tiles.generate_tiles); each stage reads the previous stage's
+  GeoTIFF output
+- Records wall time (fastest of --repeat runs), throughput in MPix/s of
+  stage input and peak RSS to JSON
+- Compares against a baseline JSON and exits 1 when a stage is slower
+  than the baseline by more than --threshold
+
+Usage:
+    python benchmark_suite.py --save-baseline benchmarks/baseline.json
+    python benchmark_suite.py --baseline benchmarks/baseline.json --threshold 0.15
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from osgeo import gdal, osr
+
+# Add config directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.config_manager import VariableConfig
+from scripts.processing.apply_colormap import process_cog_file
+from scripts.processing.generate_tiles import generate_tiles
+from scripts.processing.process_weather import process_grib_file, setup_logging
+from scripts.processing.resource_usage import track_peak_memory
+
+CONFIG_DIR = Path(__file__).parent.parent.parent / 'config'
+
+# Bump when fixtures or stage settings change; results of different
+# versions are not comparable
+SUITE_VERSION = 1
+
+SEED = 20260110
+
+# Fixed stage settings (recorded in the results)
+SETTINGS = {
+    'zoom_levels': '0-5',
+    'tile_processes': 1,
+    'png_level': 6,
+    'workers': 1,
+}
+
+STAGES = ('process', 'colormap', 'tiles')
+
+# HRRR native grid: Lambert conformal on a sphere, 3 km
+HRRR_PROJ4 = ('+proj=lcc +lat_0=38.5 +lon_0=-97.5 +lat_1=38.5 +lat_2=38.5 '
+              '+x_0=0 +y_0=0 +R=6371229 +units=m +no_defs')
+
+
+class Fixture(NamedTuple):
+    """A synthetic GRIB2 file with one variable."""
+    name: str
+    config_file: str
+    variable: str
+    width: int
+    height: int
+    geotransform: tuple
+    srs: str
+    # GRIB2 section 0 discipline and product definition template 4.0 values
+    discipline: int
+    pds_template: str
+    # Field range (GRIB units) and feature scale in pixels
+    value_range: tuple
+    feature_px: float
+    file_name: str
+
+
+FIXTURES = {
+    'hrrr': Fixture(
+        name='hrrr',
+        config_file='variables.yaml',
+        variable='temperature_2m',
+        width=1799,
+        height=1059,
+        geotransform=(-2697520.142522, 3000.0, 0.0, 1587306.152557, 0.0, -3000.0),
+        srs=HRRR_PROJ4,
+        discipline=0,
+        # TMP (0/0) at 2 m above ground (surface type 103)
+        pds_template='0 0 2 0 83 0 0 1 0 103 0 2 255 0 0',
+        value_range=(233.0, 323.0),
+        feature_px=150.0,
+        file_name='hrrr.20260110.t12z.f00.grib2',
+    ),
+    'gfs_wave': Fixture(
+        name='gfs_wave',
+        config_file='variables_gfs_wave.yaml',
+        variable='wave_height',
+        width=1440,
+        height=721,
+        geotransform=(-0.125, 0.25, 0.0, 90.125, 0.0, -0.25),
+        srs='EPSG:4326',
+        discipline=10,
+        # HTSGW (10/0/3) at the surface (surface type 1)
+        pds_template='0 3 2 0 11 0 0 1 0 1 0 0 255 0 0',
+        value_range=(0.0, 12.0),
+        feature_px=60.0,
+        file_name='gfs_wave.20260110.t12z.f000.grib2',
+    ),
+}
+
+
+def synthetic_field(fixture: Fixture, seed: int = SEED) -> np.ndarray:
+    """
+    Build a smooth, deterministic field with weather-like structure.
+
+    Args:
+        fixture: Fixture definition (size, value range, feature scale)
+        seed: Random seed
+
+    Returns:
+        float32 array of shape (height, width)
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:fixture.height, 0:fixture.width].astype(np.float32)
+
+    field = np.zeros((fixture.height, fixture.width), dtype=np.float32)
+    for _ in range(6):
+        kx, ky = rng.uniform(0.5, 2.0, size=2) / fixture.feature_px
+        phase = rng.uniform(0, 2 * np.pi)
+        field += np.sin(2 * np.pi * (kx * x + ky * y) + phase)
+    field += rng.normal(0, 0.05, size=field.shape).astype(np.float32)
+
+    low, high = fixture.value_range
+    field = (field - field.min()) / (field.max() - field.min())
+    return (low + field * (high - low)).astype(np.float32)
+
+
+def write_grib_fixture(fixture: Fixture, fixtures_dir: Path, logger: logging.Logger) -> Path:
+    """
+    Write a fixture as a single-message GRIB2 file (reused if present).
+
+    Args:
+        fixture: Fixture definition
+        fixtures_dir: Directory for generated fixtures
+        logger: Logger instance
+
+    Returns:
+        Path to the GRIB2 file
+    """
+    grib_path = fixtures_dir / f"v{SUITE_VERSION}" / fixture.file_name
+    if grib_path.exists():
+        return grib_path
+    grib_path.parent.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Generating fixture {grib_path.name} ({fixture.width} x {fixture.height})")
+    srs = osr.SpatialReference()
+    srs.SetFromUserInput(fixture.srs)
+
+    mem_ds = gdal.GetDriverByName('MEM').Create(
+        '', fixture.width, fixture.height, 1, gdal.GDT_Float32
+    )
+    mem_ds.SetGeoTransform(fixture.geotransform)
+    mem_ds.SetProjection(srs.ExportToWkt())
+    mem_ds.GetRasterBand(1).WriteArray(synthetic_field(fixture))
+
+    # Complex packing with spatial differencing, as NCEP encodes these fields
+    gdal.Translate(str(grib_path), mem_ds, options=gdal.TranslateOptions(
+        format='GRIB',
+        creationOptions=[
+            f'DISCIPLINE={fixture.discipline}',
+            'IDS=CENTER=7 SUBCENTER=0 MASTER_TABLE=2 SIGNF_REF_TIME=1 '
+            'REF_TIME=2026-01-10T12:00:00Z PROD_STATUS=0 TYPE=1',
+            'PDS_PDTN=0',
+            f'PDS_TEMPLATE_ASSEMBLED_VALUES={fixture.pds_template}',
+            'DATA_ENCODING=COMPLEX_PACKING',
+            'SPATIAL_DIFFERENCING_ORDER=2',
+            'DECIMAL_SCALE_FACTOR=2',
+        ]
+    ))
+    return grib_path
+
+
+def _reset_dir(path: Path) -> Path:
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    return path
+
+
+def _pixels(path: Path) -> int:
+    ds = gdal.Open(str(path))
+    return ds.RasterXSize * ds.RasterYSize
+
+
+def _children_peak_rss_mb() -> float:
+    """Largest peak RSS of any finished child process (e.g. gdal2tiles)."""
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def time_stage(
+    run: Callable[[], Optional[Path]],
+    repeat: int,
+    subprocesses: bool = False
+) -> Dict[str, object]:
+    """
+    Run a stage repeat times.
+
+    Args:
+        run: Stage callable; returns its output path (None = failed)
+        repeat: Number of runs
+        subprocesses: The stage runs child processes; their peak RSS counts
+                      (the largest child of this process so far)
+
+    Returns:
+        Dict with output, wall_s (fastest run) and peak_rss_mb (largest run)
+    """
+    walls, peaks = [], []
+    output = None
+    for _ in range(repeat):
+        with track_peak_memory() as usage:
+            start = time.perf_counter()
+            output = run()
+            walls.append(time.perf_counter() - start)
+        if output is None:
+            raise RuntimeError('stage produced no output')
+        peak = usage['peak_rss_mb']
+        if subprocesses:
+            peak = max(peak, _children_peak_rss_mb())
+        peaks.append(peak)
+    return {'output': output, 'wall_s': min(walls), 'peak_rss_mb': max(peaks)}
+
+
+def run_fixture(
+    fixture: Fixture,
+    fixtures_dir: Path,
+    work_dir: Path,
+    stages: List[str],
+    repeat: int,
+    logger: logging.Logger,
+    stage_logger: logging.Logger
+) -> Dict[str, Dict[str, float]]:
+    """
+    Run the selected stages on one fixture.
+
+    Args:
+        fixture: Fixture definition
+        fixtures_dir: Directory for generated fixtures
+        work_dir: Directory for stage outputs
+        stages: Stages to time (later stages need the earlier outputs,
+                so earlier stages always run at least once)
+        repeat: Runs per timed stage
+        logger: Logger for suite progress
+        stage_logger: Logger passed to the stages
+
+    Returns:
+        Dict mapping stage name to wall_s, mpix_s and peak_rss_mb
+    """
+    config = VariableConfig(CONFIG_DIR / fixture.config_file)
+    grib_file = write_grib_fixture(fixture, fixtures_dir, logger)
+    out_dir = work_dir / fixture.name
+    results: Dict[str, Dict[str, float]] = {}
+
+    def process() -> Optional[Path]:
+        cog_dir = _reset_dir(out_dir / 'cogs')
+        outputs = process_grib_file(
+            grib_file, config, cog_dir, None, [fixture.variable], stage_logger,
+            use_inventory_cache=False, workers=SETTINGS['workers']
+        )
+        return outputs.get(fixture.variable)
+
+    def colormap() -> Optional[Path]:
+        colored_dir = _reset_dir(out_dir / 'colored')
+        return process_cog_file(cog, fixture.variable, config, colored_dir, stage_logger)
+
+    def tiles() -> Optional[Path]:
+        tiles_dir = _reset_dir(out_dir / 'tiles')
+        result = generate_tiles(
+            colored, tiles_dir, SETTINGS['zoom_levels'], SETTINGS['tile_processes'],
+            exclude_transparent=True, resume=False, png_level=SETTINGS['png_level'],
+            use_ramdisk=False, logger=stage_logger
+        )
+        return tiles_dir if result.get('success') else None
+
+    last_stage = max(STAGES.index(stage) for stage in stages)
+    cog = colored = None
+
+    for stage, run in zip(STAGES[:last_stage + 1], (process, colormap, tiles)):
+        timed = stage in stages
+        logger.info(f"{fixture.name}/{stage}: {'timing' if timed else 'preparing'}")
+        input_pixels = (
+            fixture.width * fixture.height if stage == 'process'
+            else _pixels(cog if stage == 'colormap' else colored)
+        )
+        result = time_stage(run, repeat if timed else 1, subprocesses=stage == 'tiles')
+
+        if stage == 'process':
+            cog = result['output']
+        elif stage == 'colormap':
+            colored = result['output']
+
+        if timed:
+            results[stage] = {
+                'wall_s': round(result['wall_s'], 4),
+                'mpix_s': round(input_pixels / 1e6 / result['wall_s'], 3),
+                'peak_rss_mb': round(result['peak_rss_mb'], 1),
+                'input_pixels': input_pixels,
+            }
+
+    return results
+
+
+def compare_to_baseline(
+    results: Dict,
+    baseline: Dict,
+    threshold: float,
+    logger: logging.Logger
+) -> List[str]:
+    """
+    Find stages slower than the baseline by more than threshold.
+
+    Args:
+        results: Results of this run
+        baseline: Baseline results
+        threshold: Allowed fractional slowdown (0.15 = 15%)
+        logger: Logger instance
+
+    Returns:
+        List of regressed "fixture/stage" keys
+    """
+    if baseline.get('suite_version') != results['suite_version']:
+        logger.warning(f"Baseline is from suite version {baseline.get('suite_version')}, "
+                       f"this run is {results['suite_version']}; results are not comparable")
+    if baseline.get('settings') != results['settings']:
+        logger.warning("Baseline was recorded with different stage settings")
+
+    regressions = []
+    for key, result in results['results'].items():
+        base = baseline.get('results', {}).get(key)
+        if not base:
+            continue
+        result['baseline_wall_s'] = base['wall_s']
+        result['change'] = round(result['wall_s'] / base['wall_s'] - 1, 3)
+        if result['change'] > threshold:
+            regressions.append(key)
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    """Short commit hash of the working tree, if available."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark processing stages on synthetic HRRR and GFS-Wave fixtures'
+    )
+    parser.add_argument('--fixtures', nargs='+', choices=sorted(FIXTURES), default=sorted(FIXTURES),
+                       help='Fixtures to run (default: all)')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES),
+                       help='Stages to time (default: all)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Runs per stage; the fastest is reported (default: 3)')
+    parser.add_argument('--fixtures-dir', type=Path, default=Path('/tmp/weather-benchmark/fixtures'),
+                       help='Where generated fixtures are kept between runs')
+    parser.add_argument('--work-dir', type=Path, default=Path('/tmp/weather-benchmark/work'),
+                       help='Directory for stage outputs')
+    parser.add_argument('--output', type=Path, help='Write results JSON')
+    parser.add_argument('--save-baseline', type=Path, help='Write results JSON as the new baseline')
+    parser.add_argument('--baseline', type=Path, help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                       help='Slowdown vs baseline that counts as a regression (default: 0.15)')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Show stage logging')
+    args = parser.parse_args()
+
+    logger = setup_logging(args.verbose)
+    stage_logger = logging.getLogger('benchmark_suite.stages')
+    stage_logger.setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+    results = {
+        'suite_version': SUITE_VERSION,
+        'created_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'git_revision': git_revision(),
+        'host': platform.node(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'gdal': gdal.__version__,
+        'settings': dict(SETTINGS, repeat=args.repeat),
+        'results': {},
+    }
+
+    for name in args.fixtures:
+        fixture = FIXTURES[name]
+        try:
+            stage_results = run_fixture(
+                fixture, args.fixtures_dir, args.work_dir, args.stages, args.repeat,
+                logger, stage_logger
+            )
+        except Exception as e:
+            logger.error(f"{name}: benchmark failed: {e}", exc_info=args.verbose)
+            return 2
+        for stage, result in stage_results.items():
+            results['results'][f"{name}/{stage}"] = result
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_to_baseline(results, baseline, args.threshold, logger)
+
+    print(f"\n{'Stage':<20} {'Wall s':>8} {'MPix/s':>8} {'Peak MB':>8} {'vs base':>8}")
+    print("-" * 56)
+    for key, result in results['results'].items():
+        change = f"{result['change']:+.0%}" if 'change' in result else '-'
+        flag = '  REGRESSION' if key in regressions else ''
+        print(f"{key:<20} {result['wall_s']:>8.3f} {result['mpix_s']:>8.2f} "
+              f"{result['peak_rss_mb']:>8.1f} {change:>8}{flag}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2))
+            logger.info(f"Results written to {path}")
+
+    if regressions:
+        logger.error(f"{len(regressions)} stage(s) slower than baseline by more than "
+                     f"{args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
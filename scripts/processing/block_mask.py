@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Block-Level Valid-Data Masks
+
+Records which blocks (COG tiles) of a product hold any valid data, so later
+stages can skip the empty ones without decoding them:
+- A mask is a (block rows, block columns) boolean array. It is computed
+  from the field when a sparse COG (processing.sparse_cogs) is written
+  and stored in the COG as the VALID_BLOCKS tag: "<block size>:<rows>x<cols>:<base64 bitmap>", a few
+  hundred bytes even for CONUS at 3 km
+- COGs without the tag (the windowed reprojection path, older outputs)
+  get their mask from GDAL's data coverage status. For sparse COGs
+  (processing.sparse_cogs) empty blocks are simply absent from the file,
+  so this needs no decoding either
+- apply_colormap.py carries the tag to colored COGs, colorize.py only
+  colors valid blocks, and generate_tiles.py skips empty products and
+  tiles only the extent of the valid blocks
+
+Wave fields are nodata over land and the HRRR warp leaves nodata corners,
+so a large share of blocks is often empty.
+"""
+
+import base64
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from osgeo import gdal
+
+from scripts.processing.aoi import PixelWindow
+
+# COG tag holding the mask
+BLOCK_MASK_TAG = 'VALID_BLOCKS'
+
+
+class BlockMask(NamedTuple):
+    """Valid-data mask of a raster's blocks."""
+    mask: np.ndarray  # (block rows, block columns) bool
+    block_size: int
+
+
+def compute_block_mask(values: np.ndarray, nodata: Optional[float], block_size: int) -> np.ndarray:
+    """
+    Compute which blocks of a 2D field hold any valid data.
+
+    Args:
+        values: 2D array of values
+        nodata: Nodata value (NaN is always nodata for floats)
+        block_size: Block (tile) size in pixels
+
+    Returns:
+        (block rows, block columns) bool array, True where a block has data
+    """
+    height, width = values.shape
+    block_rows = -(-height // block_size)
+    block_cols = -(-width // block_size)
+    mask = np.zeros((block_rows, block_cols), dtype=bool)
+    check_nodata = nodata is not None and not np.isnan(nodata)
+    is_float = np.issubdtype(values.dtype, np.floating)
+
+    # One band of block rows at a time, so temporaries stay small
+    for row in range(block_rows):
+        band = values[row * block_size:(row + 1) * block_size]
+        valid = ~np.isnan(band) if is_float else np.ones(band.shape, dtype=bool)
+        if check_nodata:
+            valid &= band != nodata
+        columns = valid.any(axis=0)
+        padded = np.zeros(block_cols * block_size, dtype=bool)
+        padded[:width] = columns
+        mask[row] = padded.reshape(block_cols, block_size).any(axis=1)
+    return mask
+
+
+def encode_block_mask(mask: np.ndarray, block_size: int) -> str:
+    """Encode a mask as a VALID_BLOCKS tag value."""
+    rows, cols = mask.shape
+    bitmap = base64.b64encode(np.packbits(mask.ravel()).tobytes()).decode('ascii')
+    return f"{block_size}:{rows}x{cols}:{bitmap}"
+
+
+def decode_block_mask(value: Optional[str]) -> Optional[BlockMask]:
+    """
+    Decode a VALID_BLOCKS tag value.
+
+    Args:
+        value: Tag value, or None
+
+    Returns:
+        BlockMask, or None if value is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        block_size, shape, bitmap = value.split(':')
+        rows, cols = (int(n) for n in shape.split('x'))
+        bits = np.unpackbits(np.frombuffer(base64.b64decode(bitmap), dtype=np.uint8))
+        return BlockMask(bits[:rows * cols].astype(bool).reshape(rows, cols), int(block_size))
+    except (ValueError, TypeError):
+        return None
+
+
+def coverage_block_mask(ds: gdal.Dataset) -> BlockMask:
+    """
+    Mask of a dataset's blocks from GDAL's data coverage status.
+
+    Blocks absent from a sparse file report as empty; for other files every
+    block reports data.
+
+    Args:
+        ds: Open dataset
+
+    Returns:
+        BlockMask on band 1's block size
+    """
+    band = ds.GetRasterBand(1)
+    block_size = band.GetBlockSize()[0]
+    width, height = ds.RasterXSize, ds.RasterYSize
+    rows, cols = -(-height // block_size), -(-width // block_size)
+
+    mask = np.ones((rows, cols), dtype=bool)
+    for row in range(rows):
+        yoff = row * block_size
+        for col in range(cols):
+            xoff = col * block_size
+            flags, _ = band.GetDataCoverageStatus(
+                xoff, yoff, min(block_size, width - xoff), min(block_size, height - yoff)
+            )
+            mask[row, col] = not (flags & gdal.GDAL_DATA_COVERAGE_STATUS_EMPTY)
+    return BlockMask(mask, block_size)
+
+
+def read_block_mask(ds: gdal.Dataset) -> BlockMask:
+    """
+    Valid-data mask of a COG: its VALID_BLOCKS tag, else its block coverage.
+
+    Args:
+        ds: Open dataset
+
+    Returns:
+        BlockMask
+    """
+    tagged = decode_block_mask(ds.GetMetadataItem(BLOCK_MASK_TAG))
+    if tagged is not None:
+        size = tagged.block_size
+        if tagged.mask.shape == (-(-ds.RasterYSize // size), -(-ds.RasterXSize // size)):
+            return tagged
+    return coverage_block_mask(ds)
+
+
+def valid_spans(mask_row: np.ndarray) -> List[Tuple[int, int]]:
+    """Runs of valid blocks in a mask row as (first, stop) block columns."""
+    edges = np.diff(np.concatenate([[0], mask_row.astype(np.int8), [0]]))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def valid_window(block_mask: BlockMask, width: int, height: int) -> Optional[PixelWindow]:
+    """
+    Pixel window of a raster's valid blocks.
+
+    Args:
+        block_mask: Mask of the raster's blocks
+        width: Raster width in pixels
+        height: Raster height in pixels
+
+    Returns:
+        Window around all valid blocks, or None if no block is valid
+    """
+    rows = np.flatnonzero(block_mask.mask.any(axis=1))
+    cols = np.flatnonzero(block_mask.mask.any(axis=0))
+    if rows.size == 0:
+        return None
+    size = block_mask.block_size
+    xoff, yoff = int(cols[0]) * size, int(rows[0]) * size
+    xend = min((int(cols[-1]) + 1) * size, width)
+    yend = min((int(rows[-1]) + 1) * size, height)
+    return PixelWindow(xoff, yoff, xend - xoff, yend - yoff)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+In-Process Colorization
+
+Turns a reprojected field into an RGBA COG without the gray COG round
+trip through apply_colormap.py:
+- The variable's color ramp is expanded into a dense RGBA lookup table
+  over the ramp's value range, sized to its narrowest color segment
+- Pixels are mapped through the table in row blocks (one gather per
+  block); values beyond the ramp take the end colors and nodata/NaN
+  becomes transparent, as with gdaldem color-relief
+- Only blocks with valid data (see block_mask.py) are colored; the rest
+  stay transparent without a lookup
+- The RGBA array is written straight to a COG with the same compression
+  and overviews apply_colormap.py uses; with sparse output, transparent
+  blocks are not stored
+
+Used by process_weather.py (--colorize).
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from osgeo import gdal, gdal_array
+
+from config.config_manager import parse_color_stops
+from scripts.processing.block_mask import (
+    BLOCK_MASK_TAG,
+    BlockMask,
+    compute_block_mask,
+    encode_block_mask,
+    valid_spans,
+)
+
+# Lookup table entries per span of the ramp's narrowest color segment,
+# within the min/max table size (256 keeps colors within one level of
+# exact interpolation)
+LUT_ENTRIES_PER_SEGMENT = 256
+MIN_LUT_SIZE = 1024
+MAX_LUT_SIZE = 65536
+
+# Rows colorized per block
+BLOCK_ROWS = 256
+
+# Output options matching apply_colormap.apply_color_ramp
+COLORED_CREATION_OPTIONS = [
+    'COMPRESS=DEFLATE',
+    'LEVEL=6',
+    'PREDICTOR=STANDARD',
+    'BIGTIFF=IF_SAFER',
+    'OVERVIEW_RESAMPLING=AVERAGE',
+    'NUM_THREADS=ALL_CPUS',
+]
+
+COLOR_INTERPRETATIONS = (gdal.GCI_RedBand, gdal.GCI_GreenBand, gdal.GCI_BlueBand, gdal.GCI_AlphaBand)
+
+# A color ramp's configuration, or its parsed (values, colors) stops
+ColorRamp = Union[Dict, Tuple[np.ndarray, np.ndarray]]
+
+
+class ColorLUT:
+    """Dense RGBA lookup table for one color ramp."""
+
+    def __init__(self, color_ramp: ColorRamp, size: Optional[int] = None):
+        """
+        Args:
+            color_ramp: Color ramp configuration from variables.yaml, or its
+                        parsed (values, colors) stops
+                        (VariableConfig.get_color_stops)
+            size: Number of table entries (default: sized to the ramp)
+        """
+        if isinstance(color_ramp, tuple):
+            values, colors = color_ramp
+        else:
+            values, colors = parse_color_stops(color_ramp)
+        self.low = values[0]
+        self.high = values[-1]
+        gaps = np.diff(values)
+        gaps = gaps[gaps > 0]
+
+        if size is None:
+            segments = (self.high - self.low) / gaps.min() if gaps.size else 1
+            size = int(np.clip(np.ceil(segments) * LUT_ENTRIES_PER_SEGMENT,
+                               MIN_LUT_SIZE, MAX_LUT_SIZE))
+        if self.high > self.low:
+            grid = np.linspace(self.low, self.high, size)
+        else:
+            grid = np.full(size, self.low)
+
+        # Linear interpolation between stops, rounded as gdaldem does
+        self.table = np.empty((size, 4), dtype=np.uint8)
+        for channel in range(3):
+            self.table[:, channel] = np.floor(
+                np.interp(grid, values, colors[:, channel]) + 0.5
+            ).astype(np.uint8)
+        self.table[:, 3] = 255
+        self.size = size
+
+    def _colorize(self, block: np.ndarray, nodata: Optional[float]) -> np.ndarray:
+        """Colorize a 2D block into a (4, rows, cols) RGBA array."""
+        span = self.high - self.low
+        step = (self.size - 1) / span if span > 0 else 0.0
+        invalid = np.isnan(block)
+        if nodata is not None and not np.isnan(nodata):
+            invalid |= block == nodata
+
+        index = (block - self.low) * step
+        np.clip(index, 0, self.size - 1, out=index)
+        index[invalid] = 0
+        colors = self.table[np.rint(index).astype(np.intp)]
+        colors[invalid] = 0
+        return np.moveaxis(colors, -1, 0)
+
+    def apply(
+        self,
+        values: np.ndarray,
+        nodata: Optional[float] = None,
+        block_mask: Optional[BlockMask] = None
+    ) -> np.ndarray:
+        """
+        Colorize a 2D array.
+
+        Args:
+            values: 2D array of physical values
+            nodata: Nodata value (NaN is always nodata)
+            block_mask: Valid-data mask of values; blocks without data are
+                        left transparent without a lookup
+
+        Returns:
+            (4, height, width) uint8 RGBA array
+        """
+        height, width = values.shape
+        if block_mask is None:
+            rgba = np.empty((4, height, width), dtype=np.uint8)
+            for start in range(0, height, BLOCK_ROWS):
+                rgba[:, start:start + BLOCK_ROWS] = self._colorize(
+                    values[start:start + BLOCK_ROWS], nodata
+                )
+            return rgba
+
+        rgba = np.zeros((4, height, width), dtype=np.uint8)
+        size = block_mask.block_size
+        for row, mask_row in enumerate(block_mask.mask):
+            rows = slice(row * size, (row + 1) * size)
+            for first, stop in valid_spans(mask_row):
+                cols = slice(first * size, stop * size)
+                rgba[:, rows, cols] = self._colorize(values[rows, cols], nodata)
+        return rgba
+
+
+def get_colored_path(gray_path: Path, colored_dir: Path) -> Path:
+    """Colored COG path for a gray COG, named as apply_colormap.py names it."""
+    return colored_dir / f"{gray_path.stem}_colored.tif"
+
+
+def write_colored_cog(
+    values: np.ndarray,
+    nodata: Optional[float],
+    geotransform: Tuple,
+    projection: str,
+    color_ramp: ColorRamp,
+    output_path: Path,
+    tile_size: int,
+    overview_levels: List[int],
+    logger: logging.Logger,
+    metadata: Optional[Dict[str, str]] = None,
+    sparse: bool = False
+) -> bool:
+    """
+    Colorize a field and write it as an RGBA COG.
+
+    Args:
+        values: 2D array of physical values (EPSG:3857 grid)
+        nodata: Nodata value of values
+        geotransform: GDAL geotransform of the grid
+        projection: WKT of the grid
+        color_ramp: Color ramp configuration, or its parsed stops
+        output_path: Output COG path
+        tile_size: COG tile size
+        overview_levels: Overview pyramid levels
+        logger: Logger instance
+        metadata: Tags to record in the COG (e.g. INPUT_HASH)
+        sparse: Don't store fully transparent blocks (SPARSE_OK), and
+                record the block mask
+
+    Returns:
+        True if successful
+    """
+    logger.info(f"Creating colored COG: {output_path.name}")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        block_mask = BlockMask(compute_block_mask(values, nodata, tile_size), tile_size)
+        rgba = ColorLUT(color_ramp).apply(values, nodata, block_mask)
+        metadata = dict(metadata or {})
+        if sparse:
+            metadata[BLOCK_MASK_TAG] = encode_block_mask(*block_mask)
+
+        mem_ds = gdal_array.OpenArray(rgba)
+        mem_ds.SetGeoTransform(geotransform)
+        mem_ds.SetProjection(projection)
+        for index, interpretation in enumerate(COLOR_INTERPRETATIONS, 1):
+            mem_ds.GetRasterBand(index).SetColorInterpretation(interpretation)
+        mem_ds.SetMetadata(metadata)
+
+        creation_options = COLORED_CREATION_OPTIONS + [f'BLOCKSIZE={tile_size}']
+        if sparse:
+            creation_options.append('SPARSE_OK=TRUE')
+        if overview_levels:
+            creation_options.append(f'OVERVIEW_COUNT={len(overview_levels)}')
+        else:
+            creation_options.append('OVERVIEWS=NONE')
+
+        out_ds = gdal.Translate(str(output_path), mem_ds, options=gdal.TranslateOptions(
+            format='COG', creationOptions=creation_options
+        ))
+        if out_ds is None:
+            raise RuntimeError("gdal.Translate returned no dataset")
+        out_ds = mem_ds = None
+
+        logger.info(f"Created colored COG: {output_path} "
+                    f"({output_path.stat().st_size / 1024 / 1024:.2f} MB)")
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to create colored COG: {e}")
+        if output_path.exists():
+            output_path.unlink()
+        return False
@@ -9,12 +9,15 @@ Generates XYZ tile pyramid from colored Cloud Optimized GeoTIFFs:
 - Organized directory structure by variable/timestamp/forecast
 - PNG tiles with transparency
 - Configurable zoom levels
+- Skips COGs without data and tiles only the extent of their valid blocks
+  (block_mask.py)
 
 Part of TICKET-008: Implement Tile Generation Strategy
 """
 
 import argparse
 import logging
+import os
 import sys
 import subprocess
 import tempfile
@@ -25,6 +28,10 @@ import re
 import shutil
 from osgeo import gdal, osr
 
+# Add config directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from scripts.processing.block_mask import read_block_mask, valid_window
+
 # Configure GDAL
 gdal.UseExceptions()
 
@@ -120,6 +127,44 @@ def fix_srs_if_needed(input_cog: Path, logger: logging.Logger) -> Path:
     return input_cog
 
 
+def crop_to_valid_blocks(input_cog: Path, logger: logging.Logger) -> Optional[Path]:
+    """
+    Limit tiling to the blocks of a COG that hold data.
+
+    Args:
+        input_cog: Input colored COG file
+        logger: Logger instance
+
+    Returns:
+        input_cog, or a temp VRT over the extent of its valid blocks
+        (delete after use); None if no block has data
+    """
+    ds = gdal.Open(str(input_cog))
+    width, height = ds.RasterXSize, ds.RasterYSize
+    block_mask = read_block_mask(ds)
+    window = valid_window(block_mask, width, height)
+    if window is None:
+        return None
+    if window == (0, 0, width, height):
+        return input_cog
+
+    logger.info(f"Tiling valid blocks only: {window.xsize}x{window.ysize} of {width}x{height} pixels "
+                f"({block_mask.mask.sum()} of {block_mask.mask.size} blocks with data)")
+    # On disk, not /vsimem/: gdal2tiles runs in a separate process
+    fd, name = tempfile.mkstemp(suffix='.vrt', prefix='valid_blocks_')
+    os.close(fd)
+    vrt_path = Path(name)
+    vrt_ds = gdal.Translate(str(vrt_path), ds, options=gdal.TranslateOptions(
+        format='VRT', srcWin=list(window)
+    ))
+    if vrt_ds is None:
+        logger.warning("Failed to crop to valid blocks, tiling the full extent")
+        vrt_path.unlink(missing_ok=True)
+        return input_cog
+    vrt_ds = ds = None
+    return vrt_path
+
+
 def parse_cog_filename(cog_file: Path) -> Optional[Dict[str, str]]:
     """
     Parse metadata from COG filename.
@@ -580,9 +625,20 @@ Examples:
             # Fix SRS if needed (gdaldem color-relief sometimes creates invalid SRS)
             fixed_cog = fix_srs_if_needed(cog_file, logger)
 
+            # Skip empty products; tile only the extent of blocks with data
+            tile_input = crop_to_valid_blocks(fixed_cog, logger)
+            if tile_input is None:
+                logger.info(f"No data in {cog_file.name}, skipping tiles")
+                if fixed_cog != cog_file and fixed_cog.exists():
+                    fixed_cog.unlink()
+                results[cog_file.name] = {'success': True, 'output': None, 'total_tiles': 0,
+                                          'stats': {}, 'total_time': 0}
+                success_count += 1
+                continue
+
             # Generate tiles
             result = generate_tiles(
-                fixed_cog,
+                tile_input,
                 temp_output,
                 args.zoom,
                 args.processes,
@@ -593,7 +649,9 @@ Examples:
                 logger
             )
 
-            # Clean up temp file if SRS was fixed
+            # Clean up temp files if SRS was fixed or the input was cropped
+            if tile_input != fixed_cog and tile_input.exists():
+                tile_input.unlink()
             if fixed_cog != cog_file and fixed_cog.exists():
                 fixed_cog.unlink()
                 logger.debug(f"Cleaned up temp file: {fixed_cog}")
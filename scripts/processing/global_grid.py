@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Pre-Warp Normalization of Lat/Lon Grids
+
+Prepares geographic (lat/lon) source grids for reprojection to EPSG:3857:
+- Latitude clip: rows lying entirely beyond Web Mercator's +/-85.0511
+  degree limit are dropped. This is a slice, so no data is copied. Cells
+  straddling the limit are kept so no data inside it is lost; the output
+  may extend up to one source cell past the Web Mercator square
+- Longitude roll: global grids on 0-360 degrees (GFS-Wave) are rolled
+  to -180-180, so the warper sees no seam and the output reaches the
+  antimeridian on both sides. Grids lying entirely east of 180 degrees
+  are only relabeled (no copy). A global grid is rolled with a single
+  copy of the latitude-clipped rows
+- Projected grids (HRRR) and regional grids that cross 180 degrees
+  are returned unchanged
+
+Used by process_weather.py before reprojection (processing.normalize_global_grid).
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+import xarray as xr
+
+# Latitude limit of EPSG:3857 (atan(sinh(pi)))
+WEB_MERCATOR_MAX_LAT = 85.0511287798066
+
+
+def _rebuild(data_array: xr.DataArray, values: np.ndarray, x: np.ndarray, y: np.ndarray) -> xr.DataArray:
+    """Data array with new values/coordinates and the source's CRS, nodata and attrs."""
+    rebuilt = xr.DataArray(values, dims=data_array.dims, coords={'y': y, 'x': x},
+                           attrs=dict(data_array.attrs))
+    rebuilt = rebuilt.rio.write_crs(data_array.rio.crs)
+    nodata = data_array.rio.nodata
+    if nodata is not None:
+        rebuilt = rebuilt.rio.write_nodata(nodata)
+    return rebuilt
+
+
+def clip_latitudes(data_array: xr.DataArray) -> xr.DataArray:
+    """
+    Drop rows beyond Web Mercator's latitude limit (a view, no copy).
+
+    Args:
+        data_array: Source data on a lat/lon grid
+
+    Returns:
+        The clipped data array, or data_array if nothing is beyond the limit
+    """
+    y = data_array['y'].values
+    if y.size < 2:
+        return data_array
+    half_cell = abs(float(y[1] - y[0])) / 2
+    inside = np.flatnonzero(np.abs(y) - half_cell < WEB_MERCATOR_MAX_LAT)
+    if inside.size == 0:
+        return data_array
+    start, stop = int(inside[0]), int(inside[-1]) + 1
+    if start == 0 and stop == y.size:
+        return data_array
+    return data_array.isel(y=slice(start, stop))
+
+
+def roll_longitudes(data_array: xr.DataArray, logger: Optional[logging.Logger] = None) -> xr.DataArray:
+    """
+    Move a 0-360 degree lat/lon grid to -180-180 degrees.
+
+    Args:
+        data_array: Source data on a lat/lon grid
+        logger: Logger instance
+
+    Returns:
+        The rolled data array, or data_array if it needs no roll (or can't be
+        rolled because it is regional and crosses 180 degrees)
+    """
+    x = data_array['x'].values
+    if x.size < 2 or x.max() <= 180:
+        return data_array
+
+    # Entirely east of 180: relabel only
+    if x.min() >= 180:
+        return data_array.assign_coords(x=x - 360)
+
+    resolution = abs(float(x[1] - x[0]))
+    if abs(resolution * x.size - 360) > resolution / 2:
+        # Regional grid crossing 180 degrees; it has no -180-180 layout
+        return data_array
+
+    split = int(np.searchsorted(x, 180.0))
+    values = data_array.values
+    rolled = np.empty_like(values)
+    east = x.size - split
+    rolled[..., :east] = values[..., split:]
+    rolled[..., east:] = values[..., :split]
+    if logger:
+        logger.debug(f"Rolled longitudes 0-360 -> -180-180 at column {split}")
+    return _rebuild(data_array, rolled, np.concatenate([x[split:] - 360, x[:split]]),
+                    data_array['y'].values)
+
+
+def normalize_geographic_grid(
+    data_array: xr.DataArray,
+    logger: Optional[logging.Logger] = None
+) -> xr.DataArray:
+    """
+    Clip latitudes and roll longitudes of a lat/lon grid before warping.
+
+    Args:
+        data_array: Source data (rioxarray CRS)
+        logger: Logger instance
+
+    Returns:
+        Normalized data array (data_array itself for projected grids)
+    """
+    crs = data_array.rio.crs
+    if crs is None or not crs.is_geographic:
+        return data_array
+
+    height, width = data_array.shape[-2:]
+    data_array = roll_longitudes(clip_latitudes(data_array), logger)
+    if logger and data_array.shape[-2:] != (height, width):
+        logger.info(f"Normalized lat/lon grid: {width}x{height} -> "
+                    f"{data_array.shape[-1]}x{data_array.shape[-2]} pixels")
+    return data_array
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+GRIB2 Band Inventory
+
+Parses the band metadata of a GRIB2 file once and indexes it by normalized
+(element, level) keys so variable lookups don't rescan the file:
+- Opens the GRIB2 with GDAL a single time and keeps the handle for reads
+- Normalizes search levels ("2 m", "surface", "entire atmosphere") and
+  GDAL band levels ("2-HTGL", "0-SFC", "0-EATM") to the same key
+- Falls back to description matching for levels without a canonical key
+- Caches the parsed inventory in a JSON sidecar next to the GRIB2 file,
+  keyed by file size and mtime, so reruns skip the GDAL metadata scan
+- Records each message's byte offset and length for direct range reads
+
+Used by process_weather.py so every variable in a run shares one inventory.
+"""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from osgeo import gdal
+
+
+# Bump when the sidecar layout changes so stale sidecars are rebuilt
+SIDECAR_VERSION = 1
+SIDECAR_SUFFIX = '.inventory.json'
+
+
+class GribBand(NamedTuple):
+    """A single GRIB2 band as reported by GDAL."""
+    band_number: int
+    description: str
+    element: str
+    short_name: str
+    metadata: Dict[str, str]
+    offset: Optional[int] = None
+    length: Optional[int] = None
+
+
+def parse_search_string(search_string: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a GRIB search string into element and level.
+
+    Args:
+        search_string: Search pattern (e.g., "TMP:2 m", "REFC:entire atmosphere")
+
+    Returns:
+        (element, level) tuple; level is None if not specified
+    """
+    if ':' in search_string:
+        element, level = search_string.split(':', 1)
+        return element.strip(), level.strip() or None
+    return search_string.strip(), None
+
+
+def normalize_level(level: str) -> Optional[str]:
+    """
+    Normalize a search-string level to a canonical inventory key.
+
+    Args:
+        level: Level from a search string (e.g., "2 m", "surface")
+
+    Returns:
+        Canonical key (e.g., "2-HTGL", "SFC", "EATM"), or None if the level
+        has no canonical form and must be matched against descriptions
+
+    Examples:
+        >>> normalize_level("2 m")
+        '2-HTGL'
+        >>> normalize_level("entire atmosphere")
+        'EATM'
+    """
+    level_lower = level.lower()
+
+    # Check entire atmosphere first (before checking for 'm' which matches "atmosphere")
+    if 'entire atmosphere' in level_lower or 'eatm' in level_lower:
+        return 'EATM'
+    if 'surface' in level_lower or 'sfc' in level_lower:
+        return 'SFC'
+    if ' m' in level_lower or 'meter' in level_lower:
+        # Note: checking for ' m' with space to avoid matching 'atmosphere'
+        level_num = re.search(r'(\d+)\s*m', level_lower)
+        if level_num:
+            return f"{level_num.group(1)}-HTGL"
+        return ''  # Height level without a number never matches
+    return None
+
+
+def band_level_keys(short_name: str, description: str) -> List[str]:
+    """
+    Compute the canonical level keys a GDAL band satisfies.
+
+    Args:
+        short_name: GRIB_SHORT_NAME (e.g., "2-HTGL")
+        description: Band description (e.g., '2[m] HTGL="Specified height..."')
+
+    Returns:
+        List of canonical level keys for this band
+    """
+    short_name_lower = short_name.lower()
+    desc_lower = description.lower()
+    keys = []
+
+    if 'eatm' in short_name_lower or 'entire atmosphere' in desc_lower:
+        keys.append('EATM')
+    if 'sfc' in short_name_lower or 'surface' in desc_lower:
+        keys.append('SFC')
+    for level_num in re.findall(r'(\d+)-htgl', short_name_lower):
+        keys.append(f"{level_num}-HTGL")
+    for level_num in re.findall(r'(\d+)\[m\]', desc_lower):
+        keys.append(f"{level_num}-HTGL")
+
+    return keys
+
+
+def sidecar_path(grib_file: Path) -> Path:
+    """Path of the inventory sidecar for a GRIB2 file."""
+    grib_file = Path(grib_file)
+    return grib_file.with_name(grib_file.name + SIDECAR_SUFFIX)
+
+
+def scan_grib_messages(grib_file: Path) -> List[Tuple[int, int]]:
+    """
+    Locate every GRIB2 message in a file by reading section 0 headers.
+
+    Only the 16-byte indicator section of each message is read, so this
+    is a handful of seeks rather than a decode.
+
+    Args:
+        grib_file: Path to GRIB2 file
+
+    Returns:
+        List of (byte_offset, byte_length) tuples in file order
+
+    Raises:
+        ValueError: On a non-GRIB2 message or a corrupt or truncated
+                    message length
+    """
+    messages = []
+    file_size = Path(grib_file).stat().st_size
+    with open(grib_file, 'rb') as f:
+        offset = 0
+        while True:
+            f.seek(offset)
+            header = f.read(16)
+            if len(header) < 16:
+                break
+            if header[:4] != b'GRIB':
+                # Skip padding between messages
+                next_grib = _find_next_grib(f, offset + 1)
+                if next_grib is None:
+                    break
+                offset = next_grib
+                continue
+            if header[7] != 2:
+                raise ValueError(f"Unsupported GRIB edition {header[7]} at byte {offset}")
+            length = int.from_bytes(header[8:16], 'big')
+            if length < 16 or offset + length > file_size:
+                raise ValueError(f"Invalid GRIB2 message length {length} at byte {offset}")
+            messages.append((offset, length))
+            offset += length
+    return messages
+
+
+def _find_next_grib(f, start: int, chunk_size: int = 65536) -> Optional[int]:
+    """Find the next 'GRIB' marker at or after start."""
+    f.seek(start)
+    position = start
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return None
+        index = chunk.find(b'GRIB')
+        if index >= 0:
+            return position + index
+        # Keep a 3-byte overlap in case the marker straddles chunks
+        position += len(chunk) - 3
+        f.seek(position)
+        if len(chunk) < chunk_size:
+            return None
+
+
+def read_idx_offsets(idx_file: Path, file_size: int) -> List[Tuple[int, int]]:
+    """
+    Read message byte ranges from a NOAA .idx file (as fetched by Herbie).
+
+    .idx lines look like "71:41357411:d=2026011019:TMP:2 m above ground:anl:".
+    Sub-messages sharing an offset (e.g. "77.1", "77.2") are collapsed.
+
+    Args:
+        idx_file: Path to .idx file
+        file_size: Size of the matching GRIB2 file in bytes
+
+    Returns:
+        List of (byte_offset, byte_length) tuples in file order
+    """
+    offsets = []
+    with open(idx_file, 'r') as f:
+        for line in f:
+            parts = line.split(':')
+            if len(parts) < 2 or not parts[1].strip().isdigit():
+                continue
+            offset = int(parts[1])
+            if not offsets or offsets[-1] != offset:
+                offsets.append(offset)
+
+    ends = offsets[1:] + [file_size]
+    return [(start, end - start) for start, end in zip(offsets, ends)]
+
+
+class GribInventory:
+    """
+    Parsed band inventory for one GRIB2 file.
+
+    Usage:
+        with GribInventory.load(grib_file) as inventory:
+            band_num = inventory.find_band("TMP:2 m")
+            data = inventory.read_band(band_num)
+    """
+
+    @classmethod
+    def load(
+        cls,
+        grib_file: Path,
+        use_sidecar: bool = True,
+        logger: Optional[logging.Logger] = None
+    ) -> 'GribInventory':
+        """
+        Load the inventory from its sidecar, or scan the file and write one.
+
+        Args:
+            grib_file: Path to GRIB2 file
+            use_sidecar: Read and write the cached inventory sidecar
+            logger: Logger instance
+
+        Returns:
+            GribInventory for grib_file
+        """
+        logger = logger or logging.getLogger(__name__)
+        grib_file = Path(grib_file)
+
+        if not use_sidecar:
+            return cls(grib_file)
+
+        bands = read_sidecar(grib_file)
+        if bands is not None:
+            logger.debug(f"Loaded inventory sidecar: {sidecar_path(grib_file).name}")
+            return cls(grib_file, bands)
+
+        inventory = cls(grib_file)
+        inventory.attach_offsets(logger)
+        try:
+            write_sidecar(inventory)
+            logger.debug(f"Wrote inventory sidecar: {sidecar_path(grib_file).name}")
+        except OSError as e:
+            # Read-only input mounts are fine; we just pay the scan next time
+            logger.debug(f"Could not write inventory sidecar: {e}")
+        return inventory
+
+    def __init__(self, grib_file: Path, bands: Optional[List[GribBand]] = None):
+        """
+        Build the inventory.
+
+        Args:
+            grib_file: Path to GRIB2 file
+            bands: Pre-parsed bands. If None, band metadata is read from
+                   the file with GDAL.
+        """
+        self.grib_file = Path(grib_file)
+        self._dataset = None
+
+        if bands is None:
+            bands = self._scan_bands()
+        self.bands = bands
+
+        # (ELEMENT, level key) -> band number, first match wins
+        self._by_key: Dict[Tuple[str, str], int] = {}
+        # ELEMENT -> bands, in file order
+        self._by_element: Dict[str, List[GribBand]] = {}
+
+        for band in self.bands:
+            element = band.element.upper()
+            self._by_element.setdefault(element, []).append(band)
+            for key in band_level_keys(band.short_name, band.description):
+                self._by_key.setdefault((element, key), band.band_number)
+
+    @property
+    def dataset(self) -> gdal.Dataset:
+        """Open GDAL dataset, shared by every read from this inventory."""
+        if self._dataset is None:
+            self._dataset = gdal.Open(str(self.grib_file))
+            if not self._dataset:
+                self._dataset = None
+                raise ValueError(f"Cannot open GRIB2 file: {self.grib_file}")
+        return self._dataset
+
+    def _scan_bands(self) -> List[GribBand]:
+        """Walk every band's metadata once."""
+        ds = self.dataset
+        bands = []
+        for i in range(1, ds.RasterCount + 1):
+            band = ds.GetRasterBand(i)
+            metadata = band.GetMetadata()
+            bands.append(GribBand(
+                band_number=i,
+                description=band.GetDescription(),
+                element=metadata.get('GRIB_ELEMENT', 'Unknown'),
+                short_name=metadata.get('GRIB_SHORT_NAME', 'Unknown'),
+                metadata=metadata,
+            ))
+        return bands
+
+    def attach_offsets(self, logger: Optional[logging.Logger] = None) -> None:
+        """
+        Fill in each band's message byte offset and length.
+
+        Uses a NOAA .idx next to the file when present, otherwise scans
+        GRIB2 message headers. Offsets are only attached when the message
+        count matches the band count (one field per message).
+
+        Args:
+            logger: Logger instance
+        """
+        logger = logger or logging.getLogger(__name__)
+        file_size = self.grib_file.stat().st_size
+        idx_file = self.grib_file.with_name(self.grib_file.name + '.idx')
+
+        messages = None
+        if idx_file.exists():
+            messages = read_idx_offsets(idx_file, file_size)
+            if len(messages) != len(self.bands):
+                logger.debug(f"{idx_file.name} lists {len(messages)} messages for "
+                             f"{len(self.bands)} bands, scanning instead")
+                messages = None
+        if messages is None:
+            try:
+                messages = scan_grib_messages(self.grib_file)
+            except ValueError as e:
+                logger.warning(f"Cannot scan {self.grib_file.name} for byte offsets: {e}")
+                return
+
+        if len(messages) != len(self.bands):
+            logger.debug(f"Found {len(messages)} messages for {len(self.bands)} bands, "
+                         f"skipping byte offsets")
+            return
+
+        self.bands = [
+            band._replace(offset=offset, length=length)
+            for band, (offset, length) in zip(self.bands, messages)
+        ]
+
+    def find_band(self, search_string: str) -> Optional[int]:
+        """
+        Find band number matching a GRIB search string.
+
+        Args:
+            search_string: Search pattern (e.g., "TMP:2 m", "UGRD:10 m")
+
+        Returns:
+            Band number (1-indexed) or None if not found
+        """
+        element, level = parse_search_string(search_string)
+        candidates = self._by_element.get(element.upper(), [])
+        if not candidates:
+            return None
+
+        # If no level specified, first match is good
+        if not level:
+            return candidates[0].band_number
+
+        key = normalize_level(level)
+        if key is not None:
+            return self._by_key.get((element.upper(), key))
+
+        # Fallback: check if level string appears in description
+        level_lower = level.lower()
+        for band in candidates:
+            if level_lower in band.description.lower():
+                return band.band_number
+        return None
+
+    def get_band(self, band_number: int) -> GribBand:
+        """Get inventory entry for a band number (1-indexed)."""
+        return self.bands[band_number - 1]
+
+    def read_band(self, band_number: int) -> np.ndarray:
+        """Read a band's data from the shared dataset handle."""
+        return self.dataset.GetRasterBand(band_number).ReadAsArray()
+
+    def read_message(self, band_number: int) -> bytes:
+        """
+        Read a band's raw GRIB2 message with a single byte-range read.
+
+        Args:
+            band_number: Band number (1-indexed)
+
+        Returns:
+            The complete GRIB2 message bytes
+
+        Raises:
+            ValueError: If byte offsets are not known for this inventory
+        """
+        band = self.get_band(band_number)
+        if band.offset is None or band.length is None:
+            raise ValueError(f"No byte offset recorded for band {band_number}")
+        with open(self.grib_file, 'rb') as f:
+            f.seek(band.offset)
+            return f.read(band.length)
+
+    def close(self) -> None:
+        """Release the GDAL dataset handle."""
+        self._dataset = None
+
+    def __enter__(self) -> 'GribInventory':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.bands)
+
+
+def _file_key(grib_file: Path) -> Dict[str, int]:
+    """Size and mtime used to detect a changed GRIB2 file."""
+    stat = Path(grib_file).stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_sidecar(grib_file: Path) -> Optional[List[GribBand]]:
+    """
+    Read a cached inventory sidecar if it is still valid for grib_file.
+
+    Args:
+        grib_file: Path to GRIB2 file
+
+    Returns:
+        List of bands, or None if the sidecar is missing, stale or unreadable
+    """
+    path = sidecar_path(grib_file)
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, 'r') as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if sidecar.get('version') != SIDECAR_VERSION:
+        return None
+    if sidecar.get('file') != _file_key(grib_file):
+        return None
+
+    return [GribBand(**band) for band in sidecar.get('bands', [])]
+
+
+def write_sidecar(inventory: GribInventory) -> Path:
+    """
+    Write the inventory sidecar for a GRIB2 file.
+
+    Args:
+        inventory: Inventory to cache
+
+    Returns:
+        Path to the sidecar file
+    """
+    path = sidecar_path(inventory.grib_file)
+    sidecar = {
+        'version': SIDECAR_VERSION,
+        'grib_file': inventory.grib_file.name,
+        'file': _file_key(inventory.grib_file),
+        'bands': [band._asdict() for band in inventory.bands],
+    }
+
+    # Write atomically so concurrent readers never see a partial file; the
+    # temp name is per process since concurrent workers may write the same sidecar
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(sidecar, f)
+        temp_path.replace(path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return path
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Input Hashes for Incremental Processing
+
+Each output COG records a hash of everything that determines its pixels,
+so reruns can skip outputs that are already current:
+- The variable's raw GRIB2 message bytes (one byte-range read, no decode);
+  without byte offsets, its GRIB metadata and the file's size and mtime
+- The variable's config block and its unit conversion formula
+- The processing settings that change pixels (HASHED_PROCESSING_KEYS);
+  operational settings such as memory budgets and scratch or cache
+  locations are left out, so changing them doesn't force a rebuild
+
+The hash is stored as the INPUT_HASH metadata tag of the COG; reading it
+back only touches the file header.
+
+Used by process_weather.py (--incremental).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from osgeo import gdal
+
+from scripts.processing.grib_inventory import GribInventory
+
+# Bump when processing changes in ways the config doesn't capture
+HASH_VERSION = 1
+
+# COG metadata tag holding the input hash
+HASH_TAG = 'INPUT_HASH'
+
+# Processing settings that determine an output's pixels or layout: target
+# grid and resampling, AOI, dtype/quantization, compression, COG layout and
+# warp mode
+HASHED_PROCESSING_KEYS = (
+    'output_format',
+    'target_projection',
+    'target_resolution_meters',
+    'resampling_method',
+    'normalize_global_grid',
+    'aoi',
+    'dtype',
+    'nodata_value',
+    'quantize',
+    'quantize_headroom',
+    'compression',
+    'compress_level',
+    'predictor',
+    'max_z_error',
+    'tile_size',
+    'create_overviews',
+    'overview_levels',
+    'sparse_cogs',
+    'batch_warp',
+    'warp_plan_cache',
+)
+
+
+def _canonical_json(value: Any) -> bytes:
+    """Serialize a config block deterministically."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode()
+
+
+def compute_input_hash(
+    inventory: GribInventory,
+    band_number: int,
+    variable_config: Dict,
+    processing: Dict,
+    conversion: Optional[Dict] = None
+) -> str:
+    """
+    Hash the inputs of one variable's output COG.
+
+    Args:
+        inventory: Band inventory of the source GRIB2 file
+        band_number: The variable's band number
+        variable_config: The variable's config block
+        processing: Processing config block (only HASHED_PROCESSING_KEYS
+                    are hashed)
+        conversion: The variable's unit conversion definition, if any
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{HASH_VERSION}\n".encode())
+
+    try:
+        digest.update(inventory.read_message(band_number))
+    except ValueError:
+        # No byte offsets known: hash the band's GRIB metadata (times, product
+        # and grid templates) and the file's size and mtime, never the decoded
+        # band. A rewritten file is therefore always treated as changed.
+        band = inventory.get_band(band_number)
+        stat = inventory.grib_file.stat()
+        digest.update(_canonical_json({
+            'description': band.description,
+            'metadata': band.metadata,
+            'file': [stat.st_size, stat.st_mtime_ns],
+        }))
+
+    digest.update(b'\nvariable:')
+    digest.update(_canonical_json(variable_config))
+    digest.update(b'\nconversion:')
+    digest.update(_canonical_json(conversion))
+    digest.update(b'\nprocessing:')
+    digest.update(_canonical_json({key: processing.get(key) for key in HASHED_PROCESSING_KEYS}))
+
+    return digest.hexdigest()
+
+
+def read_output_hash(output_path: Path) -> Optional[str]:
+    """
+    Read the input hash recorded in an output COG.
+
+    Args:
+        output_path: Output COG path
+
+    Returns:
+        Recorded hash, or None if the file is missing, unreadable or untagged
+    """
+    if not output_path.exists():
+        return None
+    try:
+        ds = gdal.Open(str(output_path))
+    except RuntimeError:
+        return None
+    if ds is None:
+        return None
+    return ds.GetMetadataItem(HASH_TAG)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Memory Budget Governor for Concurrent Processing
+
+Keeps concurrent variable and file tasks within a memory budget:
+- Each task gets a peak memory estimate: the learned peak from past runs
+  when there is one, else a model based on grid size, dtype and the
+  reprojected size at the target resolution
+- Tasks are admitted while the estimates of running tasks fit the budget
+  (a task that alone exceeds the budget runs by itself)
+- Observed peaks are logged next to the estimate and folded into a
+  history file, so estimates improve from run to run
+
+Used by process_weather.py for --workers and --file-workers.
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from scripts.processing.resource_usage import get_available_memory_mb
+
+# Share of MemAvailable used as the budget when none is configured
+DEFAULT_BUDGET_FRACTION = 0.8
+
+# Grid-based estimate: process baseline plus copies of the source and
+# reprojected rasters alive at the peak (decoded band, converted array;
+# reprojected array, MEM/quantized copy, COG encode buffers)
+BASELINE_MB = 200
+SOURCE_COPIES = 3
+REPROJECTED_COPIES = 3
+
+# Learned estimates: exponential moving average of observed peaks, padded
+HISTORY_WEIGHT = 0.3
+HISTORY_MARGIN = 1.2
+
+HISTORY_VERSION = 1
+
+
+def estimate_task_mb(
+    source_pixels: int,
+    dtype_bytes: int,
+    reprojected_pixels: int,
+    reproject_memory_limit_mb: Optional[float] = None
+) -> float:
+    """
+    Estimate a variable's peak memory from its grid.
+
+    Args:
+        source_pixels: Pixels in the source grid
+        dtype_bytes: Bytes per pixel of the processing dtype
+        reprojected_pixels: Pixels after reprojection to EPSG:3857
+        reproject_memory_limit_mb: Windowed reprojection cap; larger
+                                   outputs are streamed and held only up
+                                   to the cap
+
+    Returns:
+        Estimated peak RSS in MB
+    """
+    source_mb = source_pixels * dtype_bytes / 1024 / 1024
+    reprojected_mb = reprojected_pixels * dtype_bytes / 1024 / 1024
+    if reproject_memory_limit_mb and reprojected_mb > reproject_memory_limit_mb:
+        reprojected_mb = reproject_memory_limit_mb
+    return BASELINE_MB + SOURCE_COPIES * source_mb + REPROJECTED_COPIES * reprojected_mb
+
+
+class Task(NamedTuple):
+    """A unit of work for submit_governed."""
+    name: Any
+    estimate_mb: float
+    fn: Callable
+    args: Tuple
+
+
+class MemoryGovernor:
+    """
+    Admits tasks while their estimated peak memory fits a budget.
+
+    Usage:
+        governor = MemoryGovernor(budget_mb=8000, history_path=path)
+        estimate = governor.estimate('hrrr/temperature_2m', grid_estimate_mb)
+        ...
+        governor.record('hrrr/temperature_2m', observed_peak_mb, estimate)
+        governor.save()
+    """
+
+    def __init__(
+        self,
+        budget_mb: Optional[float] = None,
+        history_path: Optional[Path] = None,
+        logger: Optional[logging.Logger] = None,
+        read_only: bool = False
+    ):
+        """
+        Args:
+            budget_mb: Memory budget for running tasks (None = 80% of
+                       MemAvailable, unlimited if that is unknown)
+            history_path: JSON file of learned peaks (None = this run only)
+            logger: Logger instance
+            read_only: Never write the history file (worker processes
+                       report observations to the parent instead)
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        if budget_mb is None:
+            available = get_available_memory_mb()
+            budget_mb = available * DEFAULT_BUDGET_FRACTION if available else None
+        self.budget_mb = budget_mb
+        self.history_path = Path(history_path) if history_path else None
+        self.read_only = read_only
+        self.history: Dict[str, Dict[str, float]] = {}
+        self.observations: Dict[str, float] = {}
+        self._reserved_mb = 0.0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if self.history_path is None or not self.history_path.exists():
+            return
+        try:
+            data = json.loads(self.history_path.read_text())
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable memory history {self.history_path}: {e}")
+            return
+        if data.get('version') == HISTORY_VERSION:
+            self.history = data.get('tasks', {})
+
+    def save(self) -> None:
+        """Write learned peaks to the history file."""
+        if self.history_path is None or self.read_only:
+            return
+        # The temp name is per process since concurrent runs may share a
+        # history file; failing to save only loses this run's observations
+        temp_path = self.history_path.with_name(f"{self.history_path.name}.{os.getpid()}.tmp")
+        try:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(
+                {'version': HISTORY_VERSION, 'tasks': self.history}, indent=2, sort_keys=True
+            ))
+            temp_path.replace(self.history_path)
+        except OSError as e:
+            self.logger.warning(f"Could not save memory history {self.history_path}: {e}")
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def estimate(self, key: str, grid_estimate_mb: float) -> float:
+        """
+        Estimate a task's peak memory.
+
+        Args:
+            key: Task key (e.g. "hrrr/temperature_2m")
+            grid_estimate_mb: Estimate from the grid (estimate_task_mb)
+
+        Returns:
+            Learned peak with a margin if the key has history, else the
+            grid estimate
+        """
+        learned = self.history.get(key)
+        if learned:
+            return learned['peak_mb'] * HISTORY_MARGIN
+        return grid_estimate_mb
+
+    def record(self, key: str, peak_mb: float, estimate_mb: Optional[float] = None) -> None:
+        """
+        Record a task's observed peak memory.
+
+        Args:
+            key: Task key
+            peak_mb: Observed peak RSS in MB
+            estimate_mb: The estimate the task was admitted with
+        """
+        if estimate_mb is not None:
+            self.logger.info(f"Peak memory for {key}: {peak_mb:.0f} MB "
+                             f"(estimated {estimate_mb:.0f} MB)")
+        self.observations[key] = max(peak_mb, self.observations.get(key, 0.0))
+
+        learned = self.history.get(key)
+        if learned:
+            learned['peak_mb'] += HISTORY_WEIGHT * (peak_mb - learned['peak_mb'])
+            learned['max_mb'] = max(learned['max_mb'], peak_mb)
+            learned['runs'] += 1
+        else:
+            self.history[key] = {'peak_mb': peak_mb, 'max_mb': peak_mb, 'runs': 1}
+
+    def merge(self, observations: Dict[str, float]) -> None:
+        """Record peaks observed in a worker process."""
+        for key, peak_mb in observations.items():
+            self.record(key, peak_mb)
+
+    def try_reserve(self, estimate_mb: float) -> bool:
+        """
+        Reserve memory for a task if it fits the budget.
+
+        A task is always admitted when nothing else is running, so a task
+        larger than the budget still runs (alone).
+
+        Args:
+            estimate_mb: The task's estimated peak
+
+        Returns:
+            True if the task may start
+        """
+        with self._lock:
+            fits = self.budget_mb is None or self._reserved_mb + estimate_mb <= self.budget_mb
+            if not fits and self._running:
+                return False
+            if not fits:
+                self.logger.warning(f"Task estimate {estimate_mb:.0f} MB exceeds the memory "
+                                    f"budget ({self.budget_mb:.0f} MB); running it alone")
+            self._reserved_mb += estimate_mb
+            self._running += 1
+            return True
+
+    def release(self, estimate_mb: float) -> None:
+        """Release a finished task's reservation."""
+        with self._lock:
+            self._reserved_mb = max(0.0, self._reserved_mb - estimate_mb)
+            self._running = max(0, self._running - 1)
+
+
+def submit_governed(
+    executor: Executor,
+    tasks: List[Task],
+    governor: MemoryGovernor
+) -> Iterator[Tuple[Task, Future]]:
+    """
+    Submit tasks to an executor as the memory budget allows.
+
+    Pending tasks are admitted first-fit in order: a task that doesn't fit
+    waits while later, smaller tasks may start.
+
+    Args:
+        executor: Executor to run tasks on
+        tasks: Tasks to run
+        governor: Memory governor
+
+    Yields:
+        (task, future) for each task as it completes
+    """
+    pending = list(tasks)
+    running: Dict[Future, Task] = {}
+
+    while pending or running:
+        for task in list(pending):
+            if governor.try_reserve(task.estimate_mb):
+                pending.remove(task)
+                running[executor.submit(task.fn, *task.args)] = task
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            task = running.pop(future)
+            governor.release(task.estimate_mb)
+            yield task, future
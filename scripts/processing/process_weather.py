@@ -13,27 +13,66 @@ Part of TICKET-006: Data Processing with GDAL/rioxarray
 
 import argparse
 import logging
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 import json
 from datetime import datetime
 
 import numpy as np
-from osgeo import gdal, osr
+from osgeo import gdal, gdal_array, osr
 import rioxarray as rxr
 import xarray as xr
+from affine import Affine
 from rasterio.enums import Resampling
+from rasterio.warp import calculate_default_transform
 
 # Add config directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from config.config_manager import VariableConfig
-
+from scripts.common.cloudwatch_metrics import get_metrics
+from scripts.processing.aoi import (
+    PixelWindow, get_aoi_window, parse_bbox, read_window, window_geotransform
+)
+from scripts.processing.apply_colormap import process_cog_file
+from scripts.processing.block_mask import BLOCK_MASK_TAG, compute_block_mask, encode_block_mask
+from scripts.processing.colorize import get_colored_path, write_colored_cog
+from scripts.processing.global_grid import normalize_geographic_grid
+from scripts.processing.grib_inventory import GribBand, GribInventory
+from scripts.processing.input_hash import HASH_TAG, compute_input_hash, read_output_hash
+from scripts.processing.memory_governor import MemoryGovernor, Task, estimate_task_mb, submit_governed
+from scripts.processing.quantize import QuantizeSpec, get_quantize_spec, quantize_array
+from scripts.processing.resource_usage import track_peak_memory
+from scripts.processing.scratch import get_scratch_space
+from scripts.processing.stage_metrics import StageTimer, forecast_hour_from_path, report_stage_timings
+from scripts.processing.warp_plan import WarpPlanCache
+from scripts.processing.zarr_cube import get_chunks, get_cube_path, read_cube_hash, write_cube_slice
+
+
+# GDAL block cache for the whole process; split evenly across --workers
+GDAL_CACHE_MB = 512
+MIN_WORKER_CACHE_MB = 64
 
 # Configure GDAL
 gdal.UseExceptions()
 gdal.SetConfigOption('GDAL_NUM_THREADS', 'ALL_CPUS')
-gdal.SetConfigOption('GDAL_CACHEMAX', '512')
+gdal.SetConfigOption('GDAL_CACHEMAX', str(GDAL_CACHE_MB))
+
+# In-memory data type for processing (float32 halves memory vs GDAL's Float64)
+DEFAULT_DTYPE = 'float32'
+GDAL_DTYPES = {
+    'float32': gdal.GDT_Float32,
+    'float64': gdal.GDT_Float64,
+}
+
+# Warp plan caches by plan directory (see get_warp_plan_cache)
+_warp_plan_caches: Dict[str, WarpPlanCache] = {}
+
+# Process-wide memory governor (see get_memory_governor)
+_memory_governor: Optional[MemoryGovernor] = None
 
 
 def setup_logging(verbose: bool = False) -> logging.Logger:
@@ -55,38 +94,28 @@ def setup_logging(verbose: bool = False) -> logging.Logger:
     return logging.getLogger('process_weather')
 
 
-def list_grib_bands(grib_file: Path) -> List[Tuple[int, str, str]]:
+def list_grib_bands(grib_file: Path, use_sidecar: bool = True) -> List[GribBand]:
     """
     List all bands in a GRIB2 file.
 
     Args:
         grib_file: Path to GRIB2 file
+        use_sidecar: Read/write the cached inventory sidecar next to the file
 
     Returns:
-        List of (band_number, description, metadata) tuples
+        List of GribBand tuples (band_number, description, element,
+        short_name, metadata, offset, length)
     """
-    ds = gdal.Open(str(grib_file))
-    if not ds:
-        raise ValueError(f"Cannot open GRIB2 file: {grib_file}")
-
-    bands = []
-    for i in range(1, ds.RasterCount + 1):
-        band = ds.GetRasterBand(i)
-        desc = band.GetDescription()
-        metadata = band.GetMetadata()
-
-        # Get GRIB element and level
-        grib_element = metadata.get('GRIB_ELEMENT', 'Unknown')
-        grib_short_name = metadata.get('GRIB_SHORT_NAME', 'Unknown')
-        grib_level = metadata.get('GRIB_SHORT_NAME', '')
-
-        bands.append((i, desc, grib_element, grib_short_name, metadata))
-
-    ds = None
-    return bands
+    with GribInventory.load(grib_file, use_sidecar) as inventory:
+        return inventory.bands
 
 
-def find_band_by_search_string(grib_file: Path, search_string: str, logger: logging.Logger) -> Optional[int]:
+def find_band_by_search_string(
+    grib_file: Path,
+    search_string: str,
+    logger: logging.Logger,
+    inventory: Optional[GribInventory] = None
+) -> Optional[int]:
     """
     Find band number matching a GRIB search string.
 
@@ -94,89 +123,31 @@ def find_band_by_search_string(grib_file: Path, search_string: str, logger: logg
         grib_file: Path to GRIB2 file
         search_string: Search pattern (e.g., "TMP:2 m", "UGRD:10 m", "REFC:entire atmosphere")
         logger: Logger instance
+        inventory: Pre-built inventory for grib_file (built on the fly if None)
 
     Returns:
         Band number (1-indexed) or None if not found
     """
-    # Parse search string (e.g., "TMP:2 m" -> element="TMP", level="2 m")
-    if ':' in search_string:
-        element, level = search_string.split(':', 1)
-        element = element.strip()
-        level = level.strip()
-    else:
-        element = search_string.strip()
-        level = None
+    if inventory is None:
+        with GribInventory.load(grib_file, logger=logger) as file_inventory:
+            return find_band_by_search_string(grib_file, search_string, logger, file_inventory)
 
-    logger.debug(f"Searching for element='{element}', level='{level}'")
-
-    bands = list_grib_bands(grib_file)
-
-    for band_num, desc, grib_element, grib_short_name, metadata in bands:
-        # Check if element matches
-        logger.debug(f"Band {band_num}: element='{grib_element}' vs search='{element}'")
-        if element.upper() != grib_element.upper():
-            continue
-        logger.debug(f"Band {band_num}: Element match! Checking level...")
-
-        # If no level specified, first match is good
-        if not level:
-            logger.debug(f"Found match: Band {band_num} - {desc}")
-            return band_num
-
-        # Level specified - need to match it
-        # For HRRR: "2 m" should match "2-HTGL" or "2[m]" in description
-        # For HRRR: "10 m" should match "10-HTGL" or "10[m]" in description
-        # For HRRR: "surface" should match "0-SFC" or "SFC" in description
-        # For HRRR: "entire atmosphere" should match "0-EATM" or "EATM" in description
-
-        # Normalize level string for matching
-        level_lower = level.lower()
-        desc_lower = desc.lower()
-        short_name_lower = grib_short_name.lower()
-        logger.debug(f"Level matching: level_lower='{level_lower}', desc='{desc_lower}', short_name='{short_name_lower}'")
-
-        # Handle different level formats
-        # Check entire atmosphere first (before checking for 'm' which matches "atmosphere")
-        if 'entire atmosphere' in level_lower or 'eatm' in level_lower:
-            # Match entire atmosphere
-            logger.debug(f"Checking EATM: short_name='{short_name_lower}', desc='{desc_lower}'")
-            if 'eatm' in short_name_lower or 'entire atmosphere' in desc_lower:
-                logger.debug(f"Found match: Band {band_num} - {desc}")
-                return band_num
-
-        elif 'surface' in level_lower or 'sfc' in level_lower:
-            # Match surface level
-            if 'sfc' in short_name_lower or 'surface' in desc_lower:
-                logger.debug(f"Found match: Band {band_num} - {desc}")
-                return band_num
-
-        elif ' m' in level_lower or 'meter' in level_lower:
-            # Extract number from level (e.g., "2 m" -> "2", "10 m" -> "10")
-            # Note: checking for ' m' with space to avoid matching 'atmosphere'
-            import re
-            level_num = re.search(r'(\d+)\s*m', level_lower)
-            if level_num:
-                level_num = level_num.group(1)
-                # Check if this number appears in GRIB_SHORT_NAME or description
-                if f"{level_num}-htgl" in short_name_lower or f"{level_num}[m]" in desc_lower:
-                    logger.debug(f"Found match: Band {band_num} - {desc}")
-                    return band_num
-
-        # Fallback: check if level string appears in description
-        else:
-            logger.debug(f"Fallback check: '{level_lower}' in '{desc_lower}'")
-            if level_lower in desc_lower:
-                logger.debug(f"Found match: Band {band_num} - {desc}")
-                return band_num
+    band_num = inventory.find_band(search_string)
+    if band_num is None:
+        logger.warning(f"No band found matching '{search_string}'")
+        return None
 
-    logger.warning(f"No band found matching '{search_string}'")
-    return None
+    logger.debug(f"Found match: Band {band_num} - {inventory.get_band(band_num).description}")
+    return band_num
 
 
 def extract_variable_from_grib(
     grib_file: Path,
     search_string: str,
-    logger: logging.Logger
+    logger: logging.Logger,
+    inventory: Optional[GribInventory] = None,
+    dtype: str = DEFAULT_DTYPE,
+    window: Optional[PixelWindow] = None
 ) -> Optional[xr.DataArray]:
     """
     Extract a single variable from GRIB2 file using GDAL.
@@ -185,40 +156,48 @@ def extract_variable_from_grib(
         grib_file: Path to GRIB2 file
         search_string: GRIB search pattern
         logger: Logger instance
+        inventory: Pre-built inventory for grib_file; its open dataset
+                   handle is reused for the read (built on the fly if None)
+        dtype: Data type to read the band as ('float32' or 'float64').
+               GDAL converts during the read, so no Float64 copy is kept.
+        window: Source pixel window to read (None = whole grid; see aoi.py)
 
     Returns:
         xarray DataArray with the variable data, or None if not found
     """
+    if inventory is None:
+        with GribInventory.load(grib_file, logger=logger) as file_inventory:
+            return extract_variable_from_grib(grib_file, search_string, logger, file_inventory,
+                                              dtype, window)
+
     logger.info(f"Extracting '{search_string}' from {grib_file.name}")
 
     # Find band number
-    band_num = find_band_by_search_string(grib_file, search_string, logger)
+    band_num = find_band_by_search_string(grib_file, search_string, logger, inventory)
     if band_num is None:
         logger.error(f"Variable '{search_string}' not found in GRIB2 file")
         return None
 
-    # Open GRIB2 file with GDAL
-    ds = gdal.Open(str(grib_file))
-    if not ds:
-        logger.error(f"Cannot open GRIB2 file: {grib_file}")
-        return None
+    ds = inventory.dataset
 
     # Get specific band
     band = ds.GetRasterBand(band_num)
 
-    # Read data as numpy array
-    data = band.ReadAsArray()
+    # Read data as numpy array (only the AOI window, if any)
+    if window is not None:
+        data = read_window(band, window, GDAL_DTYPES[dtype])
+    else:
+        data = band.ReadAsArray(buf_type=GDAL_DTYPES[dtype])
 
     # Get geotransform and projection
-    geotransform = ds.GetGeoTransform()
+    geotransform = window_geotransform(ds.GetGeoTransform(), window)
     projection = ds.GetProjection()
 
     # Get metadata
-    metadata = band.GetMetadata()
+    metadata = dict(inventory.get_band(band_num).metadata)
 
     # Create coordinates
-    width = ds.RasterXSize
-    height = ds.RasterYSize
+    height, width = data.shape
 
     # Calculate coordinates from geotransform
     # geotransform = (x_min, pixel_width, 0, y_max, 0, -pixel_height)
@@ -242,10 +221,7 @@ def extract_variable_from_grib(
     # Add nodata value if present
     nodata = band.GetNoDataValue()
     if nodata is not None:
-        data_array = data_array.rio.write_nodata(nodata)
-
-    # Close dataset
-    ds = None
+        data_array = data_array.rio.write_nodata(data.dtype.type(nodata))
 
     logger.info(f"Extracted data: shape={data.shape}, dtype={data.dtype}")
 
@@ -259,7 +235,7 @@ def apply_unit_conversion(
     logger: logging.Logger
 ) -> xr.DataArray:
     """
-    Apply unit conversion to data.
+    Apply unit conversion to data, in place.
 
     Args:
         data_array: Input data
@@ -268,7 +244,7 @@ def apply_unit_conversion(
         logger: Logger instance
 
     Returns:
-        Converted data array
+        The same data array, with its values converted
     """
     if not conversion_name:
         logger.debug("No unit conversion needed")
@@ -290,36 +266,121 @@ def apply_unit_conversion(
 
     logger.info(f"Applying unit conversion: {conversion_name}")
 
-    # Get nodata value before conversion
-    nodata = data_array.rio.nodata
+    # Convert valid pixels in place, block by block, with masked writes.
+    # No full-array copy or full-size mask is materialized.
+    conversion = config.get_compiled_conversion(conversion_name)
+    values = data_array.values
+    converted = conversion.apply_inplace(values, nodata=data_array.rio.nodata)
+
+    if converted and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Converted {converted} pixels: min={np.nanmin(values):.2f}, "
+                    f"max={np.nanmax(values):.2f}")
+
+    return data_array
+
+
+def get_warp_plan_cache(processing: Dict, logger: logging.Logger) -> Optional[WarpPlanCache]:
+    """
+    Get this process's warp plan cache, if enabled in the processing config.
+
+    The plan directory comes from the WARP_PLAN_DIR environment variable,
+    else processing.warp_plan_dir. One cache per directory is kept for
+    the life of the process, so plans are shared across variables and files.
+
+    Args:
+        processing: Processing configuration dict
+        logger: Logger instance
+
+    Returns:
+        WarpPlanCache, or None if warp plan caching is disabled
+    """
+    if not processing.get('warp_plan_cache', False):
+        return None
+
+    cache_dir = os.environ.get('WARP_PLAN_DIR') or processing.get('warp_plan_dir')
+    key = str(cache_dir)
+    if key not in _warp_plan_caches:
+        _warp_plan_caches[key] = WarpPlanCache(Path(cache_dir) if cache_dir else None, logger)
+    return _warp_plan_caches[key]
+
+
+def get_memory_governor(
+    processing: Dict,
+    logger: logging.Logger,
+    budget_mb: Optional[float] = None
+) -> MemoryGovernor:
+    """
+    Get this process's memory governor, creating it on first use.
+
+    The budget is budget_mb, else processing.memory_budget_mb, else 80% of
+    available memory. Learned peaks are kept in the file named by the
+    MEMORY_HISTORY_FILE environment variable, else
+    processing.memory_history_file.
+
+    Args:
+        processing: Processing configuration dict
+        logger: Logger instance
+        budget_mb: Budget override (e.g. --memory-budget-mb)
+
+    Returns:
+        MemoryGovernor
+    """
+    global _memory_governor
+    if _memory_governor is None:
+        history_path = os.environ.get('MEMORY_HISTORY_FILE') or processing.get('memory_history_file')
+        _memory_governor = MemoryGovernor(
+            budget_mb or processing.get('memory_budget_mb'),
+            Path(history_path) if history_path else None,
+            logger
+        )
+        if _memory_governor.budget_mb:
+            logger.debug(f"Memory budget: {_memory_governor.budget_mb:.0f} MB")
+    return _memory_governor
 
-    # Create mask for valid data
-    if nodata is not None:
-        valid_mask = data_array.values != nodata
-    else:
-        valid_mask = ~np.isnan(data_array.values)
 
-    # Apply conversion only to valid data
-    converted_data = data_array.copy()
-    if valid_mask.any():
-        valid_values = data_array.values[valid_mask]
-        converted_values = np.array([
-            config.apply_conversion(float(val), conversion_name)
-            for val in valid_values
-        ])
-        converted_data.values[valid_mask] = converted_values
+def estimate_grid_memory_mb(
+    dataset: gdal.Dataset,
+    processing: Dict,
+    dtype: str,
+    window: Optional[PixelWindow] = None
+) -> float:
+    """
+    Estimate a variable's peak memory from its source grid (see estimate_task_mb).
 
-    logger.debug(f"Converted: min={converted_data.values[valid_mask].min():.2f}, "
-                f"max={converted_data.values[valid_mask].max():.2f}")
+    Args:
+        dataset: Open source dataset (any band of the grid)
+        processing: Processing configuration dict
+        dtype: Processing data type
+        window: AOI pixel window read from the grid (None = whole grid)
 
-    return converted_data
+    Returns:
+        Estimated peak RSS in MB
+    """
+    if window is not None:
+        width, height = window.xsize, window.ysize
+    else:
+        width, height = dataset.RasterXSize, dataset.RasterYSize
+    gt = window_geotransform(dataset.GetGeoTransform(), window)
+    bounds = (gt[0], gt[3] + height * gt[5], gt[0] + width * gt[1], gt[3])
+    try:
+        _, dst_width, dst_height = calculate_default_transform(
+            dataset.GetProjection(), "EPSG:3857", width, height, *bounds,
+            resolution=get_target_resolution(processing)
+        )
+    except Exception:
+        dst_width, dst_height = width, height
+    return estimate_task_mb(
+        width * height, np.dtype(dtype).itemsize, dst_width * dst_height,
+        processing.get('reproject_memory_limit_mb')
+    )
 
 
 def reproject_to_web_mercator(
     data_array: xr.DataArray,
     resampling_method: str,
     logger: logging.Logger,
-    target_resolution_meters: Optional[float] = None
+    target_resolution_meters: Optional[float] = None,
+    warp_plans: Optional[WarpPlanCache] = None
 ) -> xr.DataArray:
     """
     Reproject data to EPSG:3857 (Web Mercator).
@@ -331,6 +392,9 @@ def reproject_to_web_mercator(
         target_resolution_meters: Optional output resolution in meters per pixel
             (EPSG:3857). Use to upsample coarse data for smoother display; omit
             to keep native resolution.
+        warp_plans: Warp plan cache. When given and the resampling method is
+            supported (nearest, bilinear), the cached plan for this grid is
+            applied instead of running the warper.
 
     Returns:
         Reprojected data array
@@ -343,6 +407,19 @@ def reproject_to_web_mercator(
     current_crs = data_array.rio.crs
     logger.debug(f"Current CRS: {current_crs}")
 
+    # Fixed model grids: apply the cached source -> 3857 mapping directly
+    if warp_plans is not None:
+        try:
+            plan = warp_plans.get(data_array, resampling_method, target_resolution_meters)
+            if plan is not None:
+                nodata = data_array.rio.nodata
+                values = plan.apply(data_array.values, nodata)
+                reprojected = plan.to_data_array(values, data_array.attrs, nodata)
+                logger.info(f"Reprojected with warp plan: shape={reprojected.shape}")
+                return reprojected
+        except Exception as e:
+            logger.warning(f"Warp plan failed, falling back to warper: {e}")
+
     resampling_enum = getattr(Resampling, resampling_method.lower(), Resampling.bilinear)
     try:
         # Try rioxarray reprojection first
@@ -361,18 +438,14 @@ def reproject_to_web_mercator(
             )
     except Exception as e:
         logger.warning(f"rioxarray reprojection failed: {e}")
-        logger.info("Falling back to GDAL reprojection via temporary file")
-
-        # Write to temp file and use gdalwarp
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as tmp_src:
-            src_path = tmp_src.name
-        with tempfile.NamedTemporaryFile(suffix='.tif', delete=False) as tmp_dst:
-            dst_path = tmp_dst.name
+        logger.info("Falling back to GDAL reprojection via scratch file")
 
+        # The source is handed to gdalwarp as a MEM dataset; the output goes
+        # to /vsimem/ scratch when it fits the budget, else to a temp file
+        scratch = get_scratch_space()
         try:
-            # Write source data
-            data_array.rio.to_raster(src_path)
+            src_ds = array_to_mem_dataset(data_array)
+            nodata = src_ds.GetRasterBand(1).GetNoDataValue()
 
             # Reproject with gdalwarp
             warp_options_dict = {
@@ -381,27 +454,27 @@ def reproject_to_web_mercator(
                 "resampleAlg": resampling_method,
                 "multithread": True,
             }
+            if nodata is not None:
+                warp_options_dict["srcNodata"] = nodata
+                warp_options_dict["dstNodata"] = nodata
             if target_resolution_meters is not None:
                 warp_options_dict["xRes"] = target_resolution_meters
                 warp_options_dict["yRes"] = target_resolution_meters
             warp_options = gdal.WarpOptions(**warp_options_dict)
 
-            gdal.Warp(dst_path, src_path, options=warp_options)
-
-            # Read back reprojected data
-            reprojected = rxr.open_rasterio(dst_path, masked=True).squeeze()
+            estimated_mb = estimate_reprojected_mb(data_array, target_resolution_meters)
+            with scratch.path('.tif', estimated_mb) as dst_path:
+                dst_ds = gdal.Warp(dst_path, src_ds, options=warp_options)
+                if dst_ds is None:
+                    raise RuntimeError("gdal.Warp returned no dataset")
 
-            # Clean up temp files
-            Path(src_path).unlink()
-            Path(dst_path).unlink()
+                # Read back reprojected data
+                reprojected = dataset_to_data_arrays(dst_ds, [data_array.attrs])[0]
+                dst_ds = None
+            src_ds = None
 
         except Exception as e2:
             logger.error(f"GDAL reprojection also failed: {e2}")
-            # Clean up
-            if Path(src_path).exists():
-                Path(src_path).unlink()
-            if Path(dst_path).exists():
-                Path(dst_path).unlink()
             raise
 
     logger.info(f"Reprojected: shape={reprojected.shape}")
@@ -409,277 +482,1786 @@ def reproject_to_web_mercator(
     return reprojected
 
 
-def create_cog(
-    data_array: xr.DataArray,
-    output_path: Path,
-    compression: str,
-    tile_size: int,
-    overview_levels: List[int],
-    logger: logging.Logger
-) -> bool:
+def reproject_stack_to_web_mercator(
+    data_arrays: List[xr.DataArray],
+    resampling_method: str,
+    logger: logging.Logger,
+    target_resolution_meters: Optional[float] = None
+) -> List[xr.DataArray]:
     """
-    Create Cloud Optimized GeoTIFF.
+    Reproject several fields on the same grid to EPSG:3857 with one warp.
+
+    The fields are stacked into one multi-band MEM dataset and warped with
+    a single gdal.Warp call, so the warper's setup, chunking and coordinate
+    transforms are paid once instead of once per field.
 
     Args:
-        data_array: Input data
-        output_path: Output file path
-        compression: Compression method
-        tile_size: Tile size for COG
-        overview_levels: Overview pyramid levels
+        data_arrays: Input fields; must share CRS, transform, shape, dtype
+                     and nodata
+        resampling_method: GDAL resampling method
         logger: Logger instance
+        target_resolution_meters: Optional output resolution in meters per pixel
 
     Returns:
-        True if successful
+        Reprojected data arrays, in input order
     """
-    logger.info(f"Creating COG: {output_path.name}")
+    first = data_arrays[0]
+    logger.info(f"Reprojecting {len(data_arrays)} bands to EPSG:3857 in one warp")
+
+    nodata = first.rio.nodata
+    fill = np.nan if nodata is None else float(nodata)
+
+    stack = np.stack([data_array.values for data_array in data_arrays])
+    src_ds = gdal_array.OpenArray(stack)
+    src_ds.SetGeoTransform(first.rio.transform().to_gdal())
+    src_ds.SetProjection(first.rio.crs.to_wkt())
+    for band_index in range(1, len(data_arrays) + 1):
+        src_ds.GetRasterBand(band_index).SetNoDataValue(fill)
+
+    warp_options_dict = {
+        "format": "MEM",
+        "dstSRS": "EPSG:3857",
+        "resampleAlg": resampling_method,
+        "multithread": True,
+        "srcNodata": fill,
+        "dstNodata": fill,
+    }
+    if target_resolution_meters is not None:
+        warp_options_dict["xRes"] = target_resolution_meters
+        warp_options_dict["yRes"] = target_resolution_meters
 
-    # Ensure output directory exists
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    dst_ds = gdal.Warp('', src_ds, options=gdal.WarpOptions(**warp_options_dict))
+    if dst_ds is None:
+        raise RuntimeError("gdal.Warp returned no dataset")
+    src_ds = None
+    del stack
 
-    # Write to temporary file first
-    temp_path = output_path.with_suffix('.tmp.tif')
+    reprojected = dataset_to_data_arrays(dst_ds, [data_array.attrs for data_array in data_arrays])
+    logger.info(f"Reprojected: shape=({dst_ds.RasterYSize}, {dst_ds.RasterXSize}) "
+                f"x {len(reprojected)} bands")
+    dst_ds = None
 
-    try:
-        # Write GeoTIFF with rioxarray
-        data_array.rio.to_raster(
-            str(temp_path),
-            driver='GTiff',
-            compress=compression,
-            tiled=True,
-            blockxsize=tile_size,
-            blockysize=tile_size,
-            BIGTIFF='IF_SAFER'
-        )
+    return reprojected
 
-        # Add overviews and convert to COG using GDAL
-        logger.debug("Adding overviews and converting to COG")
 
-        # Open the temp file
-        ds = gdal.Open(str(temp_path), gdal.GA_Update)
+def dataset_to_data_arrays(ds: gdal.Dataset, attrs: List[Dict]) -> List[xr.DataArray]:
+    """
+    Read the bands of a warped GDAL dataset into georeferenced DataArrays.
 
-        # Build overviews
-        ds.BuildOverviews(
-            'AVERAGE',
-            overview_levels
-        )
+    Args:
+        ds: Warped dataset (EPSG:3857)
+        attrs: Attributes for each band, in band order
 
-        ds = None  # Close file
-
-        # Convert to COG using gdal_translate
-        translate_options = gdal.TranslateOptions(
-            format='COG',
-            creationOptions=[
-                f'COMPRESS={compression}',
-                f'BLOCKSIZE={tile_size}',
-                'TILED=YES',
-                'BIGTIFF=IF_SAFER'
-            ]
+    Returns:
+        One DataArray per band, with pixel-center coordinates, CRS,
+        transform and the band's nodata value (NaN if unset)
+    """
+    geotransform = ds.GetGeoTransform()
+    height, width = ds.RasterYSize, ds.RasterXSize
+    x_coords = geotransform[0] + (np.arange(width) + 0.5) * geotransform[1]
+    y_coords = geotransform[3] + (np.arange(height) + 0.5) * geotransform[5]
+    transform = Affine.from_gdal(*geotransform)
+    crs = ds.GetProjection()
+
+    data_arrays = []
+    for band_index, band_attrs in enumerate(attrs, 1):
+        band = ds.GetRasterBand(band_index)
+        values = band.ReadAsArray()
+        nodata = band.GetNoDataValue()
+        band_array = xr.DataArray(
+            values,
+            dims=['y', 'x'],
+            coords={'x': x_coords, 'y': y_coords},
+            attrs=band_attrs
         )
+        band_array = band_array.rio.write_crs(crs)
+        band_array = band_array.rio.write_transform(transform)
+        data_arrays.append(band_array.rio.write_nodata(
+            values.dtype.type(np.nan if nodata is None else nodata)
+        ))
+    return data_arrays
 
-        gdal.Translate(
-            str(output_path),
-            str(temp_path),
-            options=translate_options
-        )
 
-        # Remove temp file
-        temp_path.unlink()
+class CompressionSettings(NamedTuple):
+    """COG compression: codec plus its optional level, predictor and LERC error."""
+    codec: str = 'DEFLATE'
+    level: Optional[int] = None
+    predictor: Optional[Union[int, str]] = None
+    max_z_error: Optional[float] = None
 
-        logger.info(f"Created COG: {output_path}")
-        logger.debug(f"Size: {output_path.stat().st_size / 1024 / 1024:.2f} MB")
 
-        return True
+# Codecs that take a LEVEL option
+LEVEL_CODECS = ('DEFLATE', 'ZSTD', 'LERC_DEFLATE', 'LERC_ZSTD')
 
-    except Exception as e:
-        logger.error(f"Failed to create COG: {e}")
-        if temp_path.exists():
-            temp_path.unlink()
-        return False
+# PREDICTOR values as used in variables.yaml (TIFF numbers) -> COG driver names
+PREDICTOR_NAMES = {1: 'NO', 2: 'STANDARD', 3: 'FLOATING_POINT'}
 
 
-def process_variable(
-    grib_file: Path,
-    variable_name: str,
-    variable_config: Dict,
-    config: VariableConfig,
-    output_dir: Path,
-    logger: logging.Logger
-) -> Optional[Path]:
+def get_compression_settings(variable_config: Dict, processing: Dict) -> CompressionSettings:
     """
-    Process a single variable from GRIB2 to COG.
+    Compression for a variable.
+
+    A variable's `compression` (a codec name, or a mapping with codec,
+    level, predictor, max_z_error) overrides processing.compression,
+    processing.compress_level and processing.predictor. Level and
+    predictor only carry over from processing when the codec is the same.
 
     Args:
-        grib_file: Input GRIB2 file
-        variable_name: Variable identifier
         variable_config: Variable configuration dict
-        config: Global configuration
-        output_dir: Output directory
-        logger: Logger instance
+        processing: Processing configuration dict
 
     Returns:
-        Path to created COG, or None if failed
+        CompressionSettings
     """
-    logger.info(f"Processing variable: {variable_name}")
-
-    # Extract variable from GRIB2
-    data_array = extract_variable_from_grib(
-        grib_file,
-        variable_config['grib_search'],
-        logger
+    default = CompressionSettings(
+        processing.get('compression', 'DEFLATE'),
+        processing.get('compress_level'),
+        processing.get('predictor'),
+        processing.get('max_z_error'),
+    )
+    override = variable_config.get('compression')
+    if not override:
+        return default
+    if isinstance(override, str):
+        override = {'codec': override}
+
+    codec = str(override.get('codec', default.codec)).upper()
+    inherit = default if codec == default.codec.upper() else CompressionSettings(codec)
+    return CompressionSettings(
+        codec,
+        override.get('level', inherit.level),
+        override.get('predictor', inherit.predictor),
+        override.get('max_z_error', inherit.max_z_error),
     )
 
-    if data_array is None:
-        return None
 
-    # Apply unit conversion
-    if variable_config.get('conversion'):
-        data_array = apply_unit_conversion(
-            data_array,
-            variable_config['conversion'],
-            config,
-            logger
-        )
+def estimate_reprojected_mb(
+    data_array: xr.DataArray,
+    target_resolution_meters: Optional[float] = None
+) -> float:
+    """
+    Estimate the in-memory size of a field after reprojection to EPSG:3857.
 
-    # Get processing settings
-    processing = config.get_processing_config()
+    Args:
+        data_array: Source data (rioxarray CRS and transform)
+        target_resolution_meters: Output resolution (None = native)
 
-    # Reproject to Web Mercator (optional target resolution for upsampling coarse data)
-    target_res = processing.get('target_resolution_meters')
-    if target_res is not None and target_res <= 0:
-        target_res = None
-    data_array = reproject_to_web_mercator(
-        data_array,
-        processing.get('resampling_method', 'bilinear'),
-        logger,
-        target_resolution_meters=target_res
+    Returns:
+        Size of the reprojected array in MB
+    """
+    height, width = data_array.shape[-2:]
+    _, dst_width, dst_height = calculate_default_transform(
+        data_array.rio.crs, "EPSG:3857", width, height,
+        *data_array.rio.bounds(), resolution=target_resolution_meters
     )
+    return dst_width * dst_height * data_array.dtype.itemsize / 1024 / 1024
 
-    # Generate output filename
-    # Extract timestamp from GRIB filename (e.g., hrrr.20260110.t19z.f00.grib2)
-    grib_name = grib_file.stem
-    output_name = f"{variable_name}_{grib_name}.tif"
-    output_path = output_dir / output_name
 
-    # Create COG
-    success = create_cog(
-        data_array,
-        output_path,
-        compression=processing.get('compression', 'DEFLATE'),
-        tile_size=processing.get('tile_size', 512),
-        overview_levels=processing.get('overview_levels', [2, 4, 8, 16]),
-        logger=logger
-    )
+def needs_windowed_reproject(
+    data_array: xr.DataArray,
+    processing: Dict,
+    target_resolution_meters: Optional[float],
+    logger: logging.Logger
+) -> bool:
+    """
+    Check whether a field's reprojected raster would exceed the memory cap.
 
-    if success:
-        return output_path
-    else:
-        return None
+    Args:
+        data_array: Source data
+        processing: Processing configuration dict (reproject_memory_limit_mb)
+        target_resolution_meters: Output resolution (None = native)
+        logger: Logger instance
 
+    Returns:
+        True if the field should be reprojected window by window
+    """
+    limit_mb = processing.get('reproject_memory_limit_mb')
+    if not limit_mb:
+        return False
 
-def process_grib_file(
-    grib_file: Path,
-    config: VariableConfig,
-    output_dir: Path,
-    priority: Optional[int],
-    variables: Optional[List[str]],
-    logger: logging.Logger
-) -> Dict[str, Path]:
+    size_mb = estimate_reprojected_mb(data_array, target_resolution_meters)
+    if size_mb <= limit_mb:
+        return False
+
+    logger.info(f"Reprojected raster would be {size_mb:.0f} MB "
+                f"(limit {limit_mb} MB), using windowed reprojection")
+    return True
+
+
+def reproject_to_cog_windowed(
+    data_array: xr.DataArray,
+    output_path: Path,
+    resampling_method: str,
+    processing: Dict,
+    logger: logging.Logger,
+    target_resolution_meters: Optional[float] = None,
+    compression: Optional[CompressionSettings] = None
+) -> bool:
     """
-    Process all enabled variables from a GRIB2 file.
+    Reproject a field to EPSG:3857 and write its COG under a memory cap.
+
+    The source field is wrapped in a MEM dataset and warped into a virtual
+    (VRT) dataset, which computes output blocks on demand. The COG driver
+    reads that VRT tile by tile, so the full Web Mercator raster is never
+    held in memory: warp buffers are bounded by warpMemoryLimit and the
+    block cache by the rest of reproject_memory_limit_mb.
 
     Args:
-        grib_file: Input GRIB2 file
-        config: Variable configuration
-        output_dir: Output directory
-        priority: Filter by priority level
-        variables: Specific variables to process (None = all enabled)
+        data_array: Source data (after unit conversion)
+        output_path: Output COG path
+        resampling_method: GDAL resampling method
+        processing: Processing configuration dict
         logger: Logger instance
+        target_resolution_meters: Output resolution (None = native)
+        compression: Compression settings (default: processing config)
 
     Returns:
-        Dict mapping variable names to output file paths
+        True if successful
     """
-    logger.info(f"Processing GRIB2 file: {grib_file}")
+    limit_mb = int(processing.get('reproject_memory_limit_mb') or GDAL_CACHE_MB)
+    warp_mb = max(16, limit_mb // 4)
+    cache_mb = max(16, limit_mb - warp_mb)
+    tile_size = processing.get('tile_size', 512)
 
-    # Get variables to process
-    if variables:
-        # Process specific variables
-        all_vars = config.config.get('variables', {})
-        vars_to_process = {
-            name: all_vars[name]
-            for name in variables
-            if name in all_vars
+    logger.info(f"Creating COG with windowed reprojection: {output_path.name} "
+                f"({warp_mb} MB warp buffer, {cache_mb} MB block cache)")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    previous_cache = gdal.GetCacheMax()
+    gdal.SetCacheMax(cache_mb * 1024 * 1024)
+    try:
+        src_ds = array_to_mem_dataset(data_array)
+        nodata = src_ds.GetRasterBand(1).GetNoDataValue()
+
+        warp_options_dict = {
+            "format": "VRT",
+            "dstSRS": "EPSG:3857",
+            "resampleAlg": resampling_method,
+            "multithread": True,
+            "warpMemoryLimit": warp_mb * 1024 * 1024,
+            "creationOptions": [f"BLOCKXSIZE={tile_size}", f"BLOCKYSIZE={tile_size}"],
         }
-    elif priority is not None:
-        # Filter by priority
-        vars_to_process = config.get_variables_by_priority(priority)
-    else:
-        # All enabled variables
-        vars_to_process = config.get_enabled_variables()
+        if nodata is not None:
+            warp_options_dict["srcNodata"] = nodata
+            warp_options_dict["dstNodata"] = nodata
+        if target_resolution_meters is not None:
+            warp_options_dict["xRes"] = target_resolution_meters
+            warp_options_dict["yRes"] = target_resolution_meters
+
+        vrt_ds = gdal.Warp('', src_ds, options=gdal.WarpOptions(**warp_options_dict))
+        if vrt_ds is None:
+            raise RuntimeError("gdal.Warp returned no dataset")
+        vrt_ds.SetMetadata(src_ds.GetMetadata())
+        logger.info(f"Reprojected (windowed): shape=({vrt_ds.RasterYSize}, {vrt_ds.RasterXSize})")
+
+        translate_to_cog(
+            vrt_ds,
+            output_path,
+            cog_creation_options(
+                compression or get_compression_settings({}, processing),
+                tile_size,
+                processing.get('overview_levels', [2, 4, 8, 16]),
+                sparse=processing.get('sparse_cogs', False)
+            )
+        )
+        vrt_ds = None
+        src_ds = None
 
-    logger.info(f"Processing {len(vars_to_process)} variables")
+        logger.info(f"Created COG: {output_path}")
+        logger.debug(f"Size: {output_path.stat().st_size / 1024 / 1024:.2f} MB")
 
-    # Process each variable
-    results = {}
-    success_count = 0
+        return True
 
-    for var_name, var_config in vars_to_process.items():
-        try:
-            output_path = process_variable(
-                grib_file,
-                var_name,
-                var_config,
-                config,
-                output_dir,
-                logger
-            )
+    except Exception as e:
+        logger.error(f"Failed to create COG with windowed reprojection: {e}")
+        if output_path.exists():
+            output_path.unlink()
+        return False
 
-            if output_path:
-                results[var_name] = output_path
-                success_count += 1
-            else:
-                logger.warning(f"Failed to process variable: {var_name}")
+    finally:
+        gdal.SetCacheMax(previous_cache)
 
-        except Exception as e:
-            logger.error(f"Error processing {var_name}: {e}", exc_info=True)
 
-    logger.info(f"Processed {success_count}/{len(vars_to_process)} variables successfully")
+def array_to_mem_dataset(
+    data_array: xr.DataArray,
+    quantize: Optional[QuantizeSpec] = None
+) -> gdal.Dataset:
+    """
+    Wrap a 2D georeferenced DataArray in a GDAL MEM dataset.
 
-    return results
+    The MEM dataset points at the array's own buffer (no copy), so GDAL
+    drivers can read the in-memory result of processing directly.
 
+    Args:
+        data_array: 2D data array with CRS and transform (rioxarray)
+        quantize: Integer encoding; when given, the dataset holds the
+                  encoded codes with the encoding's scale, offset and nodata
 
-def main():
-    """Main entry point."""
-    parser = argparse.ArgumentParser(
-        description='Process HRRR GRIB2 files to Cloud Optimized GeoTIFFs',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  # Process all enabled variables
-  %(prog)s --input /tmp/hrrr.grib2 --output /tmp/processed/
+    Returns:
+        GDAL MEM dataset; keep data_array alive while it is in use
+    """
+    values = np.ascontiguousarray(data_array.values.squeeze())
 
-  # Process only priority 1 variables
-  %(prog)s --input /tmp/hrrr.grib2 --output /tmp/processed/ --priority 1
+    # rioxarray-masked arrays carry nodata as NaN plus an encoded value
+    nodata = data_array.rio.nodata
+    if nodata is None or np.isnan(nodata):
+        encoded = data_array.rio.encoded_nodata
+        if encoded is not None:
+            # Substitute into a new array: values may be data_array's own
+            # buffer, which colorize/zarr/stats still read as NaN afterwards
+            missing = np.isnan(values)
+            if missing.any():
+                values = np.where(missing, values.dtype.type(encoded), values)
+            nodata = encoded
+
+    if quantize is not None:
+        values = quantize_array(values, quantize, nodata)
+        nodata = quantize.nodata
+
+    mem_ds = gdal_array.OpenArray(values)
+    mem_ds.SetGeoTransform(data_array.rio.transform().to_gdal())
+    mem_ds.SetProjection(data_array.rio.crs.to_wkt())
+
+    band = mem_ds.GetRasterBand(1)
+    if nodata is not None:
+        band.SetNoDataValue(float(nodata))
+    if quantize is not None:
+        band.SetScale(quantize.scale)
+        band.SetOffset(quantize.offset)
 
-  # Process specific variables
-  %(prog)s --input /tmp/hrrr.grib2 --output /tmp/processed/ --variables temperature_2m wind_u_10m
+    # Carry GRIB metadata (GRIB_ELEMENT, GRIB_UNIT, ...) into the COG tags
+    tags = {
+        key: str(value)
+        for key, value in data_array.attrs.items()
+        if key not in ('_FillValue', 'scale_factor', 'add_offset', 'grid_mapping')
+    }
+    if tags:
+        mem_ds.SetMetadata(tags)
 
-  # List available bands in GRIB2 file
-  %(prog)s --input /tmp/hrrr.grib2 --list-bands
-        """
-    )
+    return mem_ds
 
-    parser.add_argument('--input', '-i', type=Path, required=True,
-                       help='Input GRIB2 file')
-    parser.add_argument('--output', '-o', type=Path,
-                       help='Output directory for COG files')
-    parser.add_argument('--config', '-c', type=Path,
-                       help='Path to variables.yaml (default: config/variables.yaml)')
-    parser.add_argument('--priority', type=int, choices=[1, 2, 3],
-                       help='Process only variables with this priority')
-    parser.add_argument('--variables', nargs='+',
+
+def cog_creation_options(
+    compression: Union[str, CompressionSettings],
+    tile_size: int,
+    overview_levels: List[int],
+    quantized: bool = False,
+    sparse: bool = False
+) -> List[str]:
+    """
+    Build COG driver creation options.
+
+    Args:
+        compression: Compression method, or full compression settings
+        tile_size: Tile size for COG
+        overview_levels: Overview pyramid levels; the COG driver builds
+                         this many power-of-2 levels
+        quantized: Data is integer (quantized): the predictor defaults to
+                   horizontal differencing and can't be floating point
+        sparse: Don't store blocks that are entirely nodata (SPARSE_OK);
+                readers get nodata for them without a decode
+
+    Returns:
+        List of KEY=VALUE creation options
+    """
+    if isinstance(compression, str):
+        compression = CompressionSettings(compression)
+    codec = compression.codec.upper()
+
+    creation_options = [
+        f'COMPRESS={codec}',
+        f'BLOCKSIZE={tile_size}',
+        'BIGTIFF=IF_SAFER',
+        'OVERVIEW_RESAMPLING=AVERAGE',
+        'NUM_THREADS=ALL_CPUS',
+    ]
+
+    if compression.level is not None and codec in LEVEL_CODECS:
+        creation_options.append(f'LEVEL={compression.level}')
+
+    if codec.startswith('LERC'):
+        if compression.max_z_error is not None:
+            creation_options.append(f'MAX_Z_ERROR={compression.max_z_error}')
+    else:
+        predictor = compression.predictor
+        predictor = PREDICTOR_NAMES.get(predictor, predictor)
+        if quantized and predictor in (None, 'FLOATING_POINT'):
+            # Horizontal differencing compresses smooth integer fields well
+            predictor = 'STANDARD'
+        if predictor is not None:
+            creation_options.append(f'PREDICTOR={str(predictor).upper()}')
+
+    if sparse:
+        creation_options.append('SPARSE_OK=TRUE')
+
+    if overview_levels:
+        creation_options.append(f'OVERVIEW_COUNT={len(overview_levels)}')
+    else:
+        creation_options.append('OVERVIEWS=NONE')
+    return creation_options
+
+
+def translate_to_cog(src_ds: gdal.Dataset, output_path: Path, creation_options: List[str]) -> None:
+    """
+    Write a GDAL dataset to output_path with the COG driver.
+
+    Args:
+        src_ds: Source dataset (MEM, or a warped VRT read block by block)
+        output_path: Output file path
+        creation_options: COG creation options (see cog_creation_options)
+    """
+    translate_options = gdal.TranslateOptions(
+        format='COG',
+        creationOptions=creation_options
+    )
+    out_ds = gdal.Translate(str(output_path), src_ds, options=translate_options)
+    if out_ds is None:
+        raise RuntimeError("gdal.Translate returned no dataset")
+    out_ds = None  # Flush and close
+
+
+def create_cog(
+    data_array: xr.DataArray,
+    output_path: Path,
+    compression: Union[str, CompressionSettings],
+    tile_size: int,
+    overview_levels: List[int],
+    logger: logging.Logger,
+    quantize: Optional[QuantizeSpec] = None,
+    sparse: bool = False
+) -> bool:
+    """
+    Create Cloud Optimized GeoTIFF in a single pass.
+
+    The in-memory array is handed to GDAL's COG driver as a MEM dataset;
+    the driver tiles, compresses and builds the overviews itself, so the
+    only disk write is the final file. Sparse COGs also record their
+    valid-data block mask in the VALID_BLOCKS tag (see block_mask.py).
+
+    Args:
+        data_array: Input data
+        output_path: Output file path
+        compression: Compression method, or full compression settings
+        tile_size: Tile size for COG
+        overview_levels: Overview pyramid levels (e.g., [2, 4, 8, 16]);
+                         the COG driver builds this many power-of-2 levels
+        logger: Logger instance
+        quantize: Write 16-bit integer codes with scale/offset instead of float
+        sparse: Don't store blocks that are entirely nodata, and record
+                the block mask
+
+    Returns:
+        True if successful
+    """
+    logger.info(f"Creating COG: {output_path.name}")
+
+    # Ensure output directory exists
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    creation_options = cog_creation_options(
+        compression, tile_size, overview_levels, quantized=quantize is not None, sparse=sparse
+    )
+    logger.debug(f"COG options: {' '.join(creation_options)}")
+    if quantize is not None:
+        logger.info(f"Quantizing to {quantize.dtype}: scale={quantize.scale:.6g}, "
+                    f"offset={quantize.offset:.6g}")
+
+    try:
+        mem_ds = array_to_mem_dataset(data_array, quantize)
+        if sparse:
+            block_mask = compute_block_mask(data_array.values.squeeze(), data_array.rio.nodata, tile_size)
+            logger.debug(f"Blocks with data: {np.count_nonzero(block_mask)} of {block_mask.size}")
+            mem_ds.SetMetadataItem(BLOCK_MASK_TAG, encode_block_mask(block_mask, tile_size))
+        translate_to_cog(mem_ds, output_path, creation_options)
+        mem_ds = None
+
+        logger.info(f"Created COG: {output_path}")
+        logger.debug(f"Size: {output_path.stat().st_size / 1024 / 1024:.2f} MB")
+
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to create COG: {e}")
+        if output_path.exists():
+            output_path.unlink()
+        return False
+
+
+def get_resampling_method(variable_config: Dict, processing: Dict) -> str:
+    """Resampling method for a variable (its own setting, else the global one)."""
+    return variable_config.get('resampling_method') or processing.get('resampling_method', 'bilinear')
+
+
+def get_target_resolution(processing: Dict) -> Optional[float]:
+    """Configured output resolution in meters, or None for native resolution."""
+    target_res = processing.get('target_resolution_meters')
+    if target_res is not None and target_res <= 0:
+        target_res = None
+    return target_res
+
+
+def load_variable(
+    grib_file: Path,
+    variable_config: Dict,
+    config: VariableConfig,
+    logger: logging.Logger,
+    inventory: Optional[GribInventory] = None,
+    dtype: str = DEFAULT_DTYPE,
+    timer: Optional[StageTimer] = None,
+    window: Optional[PixelWindow] = None
+) -> Optional[xr.DataArray]:
+    """
+    Extract a variable from GRIB2 and convert it to display units.
+
+    Args:
+        grib_file: Input GRIB2 file
+        variable_config: Variable configuration dict
+        config: Global configuration
+        logger: Logger instance
+        inventory: Shared band inventory for grib_file
+        dtype: Processing data type
+        timer: Records the extract and convert stages
+        window: AOI pixel window to read (None = whole grid)
+
+    Returns:
+        Data array in the source grid, or None if the band wasn't found
+    """
+    timer = timer or StageTimer(variable_config.get('display_name', ''))
+
+    with timer.stage('extract'):
+        data_array = extract_variable_from_grib(
+            grib_file,
+            variable_config['grib_search'],
+            logger,
+            inventory,
+            dtype,
+            window
+        )
+
+    if data_array is None:
+        return None
+
+    # Apply unit conversion
+    if variable_config.get('conversion'):
+        with timer.stage('convert'):
+            data_array = apply_unit_conversion(
+                data_array,
+                variable_config['conversion'],
+                config,
+                logger
+            )
+
+    return data_array
+
+
+def get_output_path(grib_file: Path, variable_name: str, output_dir: Path) -> Path:
+    """COG path for a variable of a GRIB2 file."""
+    # Extract timestamp from GRIB filename (e.g., hrrr.20260110.t19z.f00.grib2)
+    grib_name = grib_file.stem
+    return output_dir / f"{variable_name}_{grib_name}.tif"
+
+
+def write_variable_cog(
+    data_array: xr.DataArray,
+    grib_file: Path,
+    variable_name: str,
+    processing: Dict,
+    output_dir: Path,
+    logger: logging.Logger,
+    quantize: Optional[QuantizeSpec] = None,
+    compression: Optional[CompressionSettings] = None
+) -> Optional[Path]:
+    """
+    Write a reprojected variable to its COG in output_dir.
+
+    Args:
+        data_array: Reprojected data (EPSG:3857)
+        grib_file: Source GRIB2 file (used for the output name)
+        variable_name: Variable identifier
+        processing: Processing configuration dict
+        output_dir: Output directory
+        logger: Logger instance
+        quantize: Integer encoding for the COG (None = float)
+        compression: Compression settings (default: processing config)
+
+    Returns:
+        Path to created COG, or None if failed
+    """
+    output_path = get_output_path(grib_file, variable_name, output_dir)
+
+    # Create COG
+    success = create_cog(
+        data_array,
+        output_path,
+        compression=compression or get_compression_settings({}, processing),
+        tile_size=processing.get('tile_size', 512),
+        overview_levels=processing.get('overview_levels', [2, 4, 8, 16]),
+        logger=logger,
+        quantize=quantize,
+        sparse=processing.get('sparse_cogs', False)
+    )
+
+    if success:
+        return output_path
+    else:
+        return None
+
+
+def colorize_variable(
+    data_array: Optional[xr.DataArray],
+    gray_path: Path,
+    variable_name: str,
+    variable_config: Dict,
+    config: VariableConfig,
+    colorize_dir: Path,
+    logger: logging.Logger
+) -> Optional[Path]:
+    """
+    Write a variable's colored RGBA COG (--colorize).
+
+    The reprojected array is colorized in memory. Fields without one (the
+    windowed path) are colorized from their gray COG with apply_colormap.
+
+    Args:
+        data_array: Reprojected data (EPSG:3857), or None to read gray_path
+        gray_path: The variable's gray COG
+        variable_name: Variable identifier
+        variable_config: Variable configuration dict
+        config: Global configuration
+        colorize_dir: Output directory for colored COGs
+        logger: Logger instance
+
+    Returns:
+        Path to the colored COG, or None if failed
+    """
+    input_hash = data_array.attrs.get(HASH_TAG) if data_array is not None else None
+
+    if data_array is None:
+        input_hash = read_output_hash(gray_path)
+        return process_cog_file(gray_path, variable_name, config, colorize_dir, logger,
+                                metadata={HASH_TAG: input_hash} if input_hash else None)
+
+    color_ramp = config.get_color_stops(variable_config.get('color_ramp', ''))
+    if color_ramp is None:
+        logger.error(f"No color ramp found for variable '{variable_name}'")
+        return None
+
+    processing = config.get_processing_config()
+    output_path = get_colored_path(gray_path, colorize_dir)
+    success = write_colored_cog(
+        data_array.values.squeeze(),
+        data_array.rio.nodata,
+        data_array.rio.transform().to_gdal(),
+        data_array.rio.crs.to_wkt(),
+        color_ramp,
+        output_path,
+        processing.get('tile_size', 512),
+        processing.get('overview_levels', [2, 4, 8, 16]),
+        logger,
+        metadata={HASH_TAG: input_hash} if input_hash else None,
+        sparse=processing.get('sparse_cogs', False)
+    )
+    return output_path if success else None
+
+
+def write_variable_cube(
+    data_array: Optional[xr.DataArray],
+    gray_path: Path,
+    grib_file: Path,
+    variable_name: str,
+    variable_config: Dict,
+    config: VariableConfig,
+    zarr_dir: Path,
+    logger: logging.Logger
+) -> Optional[Path]:
+    """
+    Write a variable's field into its cycle's Zarr cube (--zarr).
+
+    Fields without a reprojected array (the windowed path) are copied from
+    their gray COG in row blocks.
+
+    Args:
+        data_array: Reprojected data (EPSG:3857), or None to read gray_path
+        gray_path: The variable's gray COG
+        grib_file: Source GRIB2 file (names the cycle and forecast hour)
+        variable_name: Variable identifier
+        variable_config: Variable configuration dict
+        config: Global configuration
+        zarr_dir: Directory of Zarr stores
+        logger: Logger instance
+
+    Returns:
+        Path to the Zarr store, or None if failed
+    """
+    store_path = get_cube_path(grib_file, variable_name, zarr_dir)
+    forecast_hour = forecast_hour_from_path(grib_file)
+    if store_path is None:
+        logger.error(f"No forecast hour in {grib_file.name}; cannot write Zarr cube")
+        return None
+
+    attrs = {
+        'long_name': variable_config.get('display_name', variable_name),
+        'units': variable_config.get('units_display' if variable_config.get('conversion')
+                                     else 'units_source', ''),
+        'model': config.config.get('model', ''),
+    }
+    chunks = get_chunks(config.get_processing_config())
+
+    if data_array is None:
+        ds = gdal.Open(str(gray_path))
+        success = write_cube_slice(
+            store_path, variable_name, forecast_hour, ds, ds.GetGeoTransform(),
+            ds.GetProjection(), logger, chunks=chunks, attrs=attrs,
+            input_hash=read_output_hash(gray_path)
+        )
+        ds = None
+    else:
+        success = write_cube_slice(
+            store_path, variable_name, forecast_hour, data_array.values.squeeze(),
+            data_array.rio.transform().to_gdal(), data_array.rio.crs.to_wkt(), logger,
+            nodata=data_array.rio.nodata, chunks=chunks, attrs=attrs,
+            input_hash=data_array.attrs.get(HASH_TAG)
+        )
+    return store_path if success else None
+
+
+def write_derived_outputs(
+    data_array: Optional[xr.DataArray],
+    gray_path: Path,
+    grib_file: Path,
+    variable_name: str,
+    variable_config: Dict,
+    config: VariableConfig,
+    timer: StageTimer,
+    logger: logging.Logger,
+    colorize_dir: Optional[Path] = None,
+    zarr_dir: Optional[Path] = None
+) -> bool:
+    """
+    Write the outputs derived from a variable's field besides its gray COG.
+
+    Args:
+        data_array: Reprojected data (EPSG:3857), or None (windowed path)
+        gray_path: The variable's gray COG
+        grib_file: Source GRIB2 file
+        variable_name: Variable identifier
+        variable_config: Variable configuration dict
+        config: Global configuration
+        timer: Stage timer of the variable
+        logger: Logger instance
+        colorize_dir: Write the colored RGBA COG here (see colorize_variable)
+        zarr_dir: Write the field into its Zarr cube here (see write_variable_cube)
+
+    Returns:
+        True if every requested output was written
+    """
+    if colorize_dir is not None:
+        with timer.stage('colorize'):
+            if colorize_variable(data_array, gray_path, variable_name, variable_config,
+                                 config, colorize_dir, logger) is None:
+                return False
+    if zarr_dir is not None:
+        with timer.stage('zarr_write'):
+            if write_variable_cube(data_array, gray_path, grib_file, variable_name,
+                                   variable_config, config, zarr_dir, logger) is None:
+                return False
+    return True
+
+
+def get_input_hash(
+    inventory: GribInventory,
+    variable_config: Dict,
+    config: VariableConfig,
+    hashed_processing: Dict
+) -> Optional[str]:
+    """
+    Hash a variable's inputs (see input_hash.compute_input_hash).
+
+    Args:
+        inventory: Band inventory of the source GRIB2 file
+        variable_config: Variable configuration dict
+        config: Global configuration
+        hashed_processing: Processing config with the effective dtype and AOI
+
+    Returns:
+        Hex digest, or None if the variable's band is not in the file
+    """
+    band_num = inventory.find_band(variable_config['grib_search'])
+    if band_num is None:
+        return None
+    conversion_name = variable_config.get('conversion')
+    return compute_input_hash(
+        inventory, band_num, variable_config, hashed_processing,
+        config.get_conversion_formula(conversion_name) if conversion_name else None
+    )
+
+
+def process_variable_windowed(
+    data_array: xr.DataArray,
+    grib_file: Path,
+    variable_name: str,
+    variable_config: Dict,
+    config: VariableConfig,
+    output_dir: Path,
+    timer: StageTimer,
+    logger: logging.Logger,
+    colorize_dir: Optional[Path] = None,
+    zarr_dir: Optional[Path] = None
+) -> Optional[Path]:
+    """
+    Write a variable whose reprojected raster exceeds the memory cap.
+
+    The field is reprojected window by window and streamed into its COG
+    (see reproject_to_cog_windowed); its derived outputs are then written
+    from the gray COG. Used by process_variable and
+    process_variables_batched for fields where needs_windowed_reproject
+    is true.
+
+    Args:
+        data_array: Source data (converted and normalized)
+        grib_file: Input GRIB2 file
+        variable_name: Variable identifier
+        variable_config: Variable configuration dict
+        config: Global configuration
+        output_dir: Output directory
+        timer: Stage timer of the variable
+        logger: Logger instance
+        colorize_dir: Also write the colored RGBA COG here
+        zarr_dir: Also write the field into its cycle's Zarr cube here
+
+    Returns:
+        Path to created COG, or None if failed
+    """
+    processing = config.get_processing_config()
+    if get_quantize_spec(variable_config, processing) is not None:
+        logger.warning("Quantization is not supported with windowed reprojection; "
+                       "writing float")
+
+    output_path = get_output_path(grib_file, variable_name, output_dir)
+    with timer.stage('cog_write'):
+        success = reproject_to_cog_windowed(
+            data_array, output_path, get_resampling_method(variable_config, processing),
+            processing, logger, target_resolution_meters=get_target_resolution(processing),
+            compression=get_compression_settings(variable_config, processing)
+        )
+    if not success:
+        return None
+    timer.record_output(output_path)
+
+    if not write_derived_outputs(None, output_path, grib_file, variable_name, variable_config,
+                                 config, timer, logger, colorize_dir, zarr_dir):
+        return None
+    return output_path
+
+
+def process_variable(
+    grib_file: Path,
+    variable_name: str,
+    variable_config: Dict,
+    config: VariableConfig,
+    output_dir: Path,
+    logger: logging.Logger,
+    inventory: Optional[GribInventory] = None,
+    dtype: Optional[str] = None,
+    input_hash: Optional[str] = None,
+    timer: Optional[StageTimer] = None,
+    colorize_dir: Optional[Path] = None,
+    zarr_dir: Optional[Path] = None,
+    window: Optional[PixelWindow] = None,
+    hashed_processing: Optional[Dict] = None
+) -> Optional[Path]:
+    """
+    Process a single variable from GRIB2 to COG.
+
+    Args:
+        grib_file: Input GRIB2 file
+        variable_name: Variable identifier
+        variable_config: Variable configuration dict
+        config: Global configuration
+        output_dir: Output directory
+        logger: Logger instance
+        inventory: Shared band inventory for grib_file
+        dtype: Processing data type (default: processing.dtype, else float32)
+        input_hash: Hash of the variable's inputs, recorded in the COG
+        timer: Records stage durations and the output size
+        colorize_dir: Also write the colored RGBA COG here (see colorize_variable)
+        zarr_dir: Also write the field into its cycle's Zarr cube here
+        window: AOI pixel window of the source grid (None = whole grid)
+        hashed_processing: Processing config for the input hash; the hash is
+                           computed here when input_hash is not given
+
+    Returns:
+        Path to created COG, or None if failed
+    """
+    logger.info(f"Processing variable: {variable_name}")
+    timer = timer or StageTimer(variable_name, forecast_hour_from_path(grib_file))
+
+    # Get processing settings
+    processing = config.get_processing_config()
+    dtype = dtype or processing.get('dtype', DEFAULT_DTYPE)
+    get_scratch_space(processing.get('scratch_memory_mb'), processing.get('scratch_dir'), logger)
+
+    # Extract variable from GRIB2 and convert units
+    data_array = load_variable(grib_file, variable_config, config, logger, inventory, dtype, timer,
+                               window)
+    if data_array is None:
+        return None
+    if input_hash is None and hashed_processing is not None and inventory is not None:
+        input_hash = get_input_hash(inventory, variable_config, config, hashed_processing)
+    if input_hash:
+        data_array.attrs[HASH_TAG] = input_hash
+
+    # Lat/lon grids: drop rows past Web Mercator's limit, roll 0-360 to -180-180
+    if processing.get('normalize_global_grid', True):
+        with timer.stage('normalize'):
+            data_array = normalize_geographic_grid(data_array, logger)
+
+    resampling_method = get_resampling_method(variable_config, processing)
+    target_res = get_target_resolution(processing)
+
+    # Large outputs (e.g. upsampled global grids): stream blocks into the COG
+    if needs_windowed_reproject(data_array, processing, target_res, logger):
+        return process_variable_windowed(data_array, grib_file, variable_name, variable_config,
+                                         config, output_dir, timer, logger, colorize_dir, zarr_dir)
+
+    # Reproject to Web Mercator (optional target resolution for upsampling coarse data)
+    with timer.stage('reproject'):
+        data_array = reproject_to_web_mercator(
+            data_array,
+            resampling_method,
+            logger,
+            target_resolution_meters=target_res,
+            warp_plans=get_warp_plan_cache(processing, logger)
+        )
+
+    with timer.stage('cog_write'):
+        output_path = write_variable_cog(
+            data_array, grib_file, variable_name, processing, output_dir, logger,
+            quantize=get_quantize_spec(variable_config, processing),
+            compression=get_compression_settings(variable_config, processing)
+        )
+    timer.record_output(output_path)
+
+    if output_path is not None and not write_derived_outputs(
+        data_array, output_path, grib_file, variable_name, variable_config,
+        config, timer, logger, colorize_dir, zarr_dir
+    ):
+        return None
+    return output_path
+
+
+def process_variables_batched(
+    grib_file: Path,
+    vars_to_process: Dict[str, Dict],
+    config: VariableConfig,
+    output_dir: Path,
+    logger: logging.Logger,
+    inventory: GribInventory,
+    dtype: Optional[str] = None,
+    input_hashes: Optional[Dict[str, str]] = None,
+    timers: Optional[Dict[str, StageTimer]] = None,
+    colorize_dir: Optional[Path] = None,
+    zarr_dir: Optional[Path] = None,
+    window: Optional[PixelWindow] = None,
+    hashed_processing: Optional[Dict] = None
+) -> Dict[str, Optional[Path]]:
+    """
+    Process a file's variables with one reprojection per group of bands.
+
+    All variables are extracted and converted first, then grouped by
+    resampling method and source grid (CRS, transform, shape, dtype,
+    nodata). Each group is reprojected once: with its cached warp plan
+    when warp plans are enabled, otherwise with a single multi-band
+    gdal.Warp. The result is split into one COG per variable. Fields
+    whose reprojected raster exceeds reproject_memory_limit_mb bypass the
+    batch and are written with reproject_to_cog_windowed.
+
+    Args:
+        grib_file: Input GRIB2 file
+        vars_to_process: Variable name -> variable configuration dict
+        config: Global configuration
+        output_dir: Output directory
+        logger: Logger instance
+        inventory: Shared band inventory for grib_file
+        dtype: Processing data type (default: processing.dtype, else float32)
+        input_hashes: Variable name -> input hash, recorded in each COG
+        timers: Variable name -> stage timer, filled in for each variable
+                (a group's reprojection time is split evenly across its members)
+        colorize_dir: Also write colored RGBA COGs here (see colorize_variable)
+        zarr_dir: Also write each field into its cycle's Zarr cube here
+        window: AOI pixel window of the source grid (None = whole grid)
+        hashed_processing: Processing config for the input hashes of
+                           variables missing from input_hashes
+
+    Returns:
+        Dict mapping variable names to output paths (None if failed)
+    """
+    processing = config.get_processing_config()
+    dtype = dtype or processing.get('dtype', DEFAULT_DTYPE)
+    get_scratch_space(processing.get('scratch_memory_mb'), processing.get('scratch_dir'), logger)
+    target_res = get_target_resolution(processing)
+    warp_plans = get_warp_plan_cache(processing, logger)
+
+    outputs: Dict[str, Optional[Path]] = {}
+    groups: Dict[Tuple, List[Tuple[str, xr.DataArray]]] = {}
+    quantize_specs = {
+        var_name: get_quantize_spec(var_config, processing)
+        for var_name, var_config in vars_to_process.items()
+    }
+
+    timers = {} if timers is None else timers
+    forecast_hour = forecast_hour_from_path(grib_file)
+
+    for var_name, var_config in vars_to_process.items():
+        logger.info(f"Loading variable: {var_name}")
+        timer = timers.setdefault(var_name, StageTimer(var_name, forecast_hour))
+        try:
+            data_array = load_variable(grib_file, var_config, config, logger, inventory, dtype,
+                                       timer, window)
+        except Exception as e:
+            logger.error(f"Error loading {var_name}: {e}", exc_info=True)
+            data_array = None
+        if data_array is None:
+            outputs[var_name] = None
+            continue
+        input_hash = (input_hashes or {}).get(var_name)
+        if input_hash is None and hashed_processing is not None:
+            input_hash = get_input_hash(inventory, var_config, config, hashed_processing)
+        if input_hash:
+            data_array.attrs[HASH_TAG] = input_hash
+        if processing.get('normalize_global_grid', True):
+            with timer.stage('normalize'):
+                data_array = normalize_geographic_grid(data_array, logger)
+
+        if needs_windowed_reproject(data_array, processing, target_res, logger):
+            outputs[var_name] = process_variable_windowed(
+                data_array, grib_file, var_name, var_config, config, output_dir,
+                timer, logger, colorize_dir, zarr_dir
+            )
+            continue
+
+        nodata = data_array.rio.nodata
+        key = (
+            get_resampling_method(var_config, processing).lower(),
+            data_array.rio.crs.to_wkt(),
+            tuple(data_array.rio.transform()),
+            data_array.shape,
+            str(data_array.dtype),
+            'nan' if nodata is None or np.isnan(nodata) else float(nodata),
+        )
+        groups.setdefault(key, []).append((var_name, data_array))
+
+    logger.info(f"Reprojecting {sum(len(g) for g in groups.values())} variables "
+                f"in {len(groups)} group(s)")
+
+    for key, members in groups.items():
+        resampling_method = key[0]
+        names = [name for name, _ in members]
+        arrays = [data_array for _, data_array in members]
+        members.clear()
+        start = time.perf_counter()
+
+        try:
+            plan = None
+            if warp_plans is not None:
+                plan = warp_plans.get(arrays[0], resampling_method, target_res)
+
+            if plan is not None:
+                reprojected = []
+                for data_array in arrays:
+                    nodata = data_array.rio.nodata
+                    values = plan.apply(data_array.values, nodata)
+                    reprojected.append(plan.to_data_array(values, data_array.attrs, nodata))
+                logger.info(f"Reprojected {len(arrays)} bands with warp plan")
+            else:
+                reprojected = reproject_stack_to_web_mercator(
+                    arrays, resampling_method, logger, target_resolution_meters=target_res
+                )
+        except Exception as e:
+            # Fall back to reprojecting this group one variable at a time
+            logger.warning(f"Batched reprojection failed ({', '.join(names)}): {e}")
+            reprojected = []
+            for data_array in arrays:
+                reprojected.append(reproject_to_web_mercator(
+                    data_array, resampling_method, logger, target_resolution_meters=target_res
+                ))
+        del arrays
+        elapsed = time.perf_counter() - start
+        for var_name in names:
+            timers[var_name].add('reproject', elapsed / len(names))
+
+        for var_name, data_array in zip(names, reprojected):
+            try:
+                with timers[var_name].stage('cog_write'):
+                    outputs[var_name] = write_variable_cog(
+                        data_array, grib_file, var_name, processing, output_dir, logger,
+                        quantize=quantize_specs[var_name],
+                        compression=get_compression_settings(vars_to_process[var_name], processing)
+                    )
+                timers[var_name].record_output(outputs[var_name])
+                if outputs[var_name] is not None and not write_derived_outputs(
+                    data_array, outputs[var_name], grib_file, var_name,
+                    vars_to_process[var_name], config, timers[var_name], logger,
+                    colorize_dir, zarr_dir
+                ):
+                    outputs[var_name] = None
+            except Exception as e:
+                logger.error(f"Error writing {var_name}: {e}", exc_info=True)
+                outputs[var_name] = None
+        del reprojected
+
+    return outputs
+
+
+# Per-process state for variable workers, set up by _init_variable_worker
+_worker_state: Dict[str, object] = {}
+
+
+def _init_variable_worker(
+    grib_file: Path,
+    bands: List[GribBand],
+    config_path: Path,
+    cache_mb: int,
+    num_threads: int,
+    log_level: int
+) -> None:
+    """
+    Initialize a variable worker process.
+
+    Each worker gets its own slice of the GDAL cache and thread budget,
+    and rebuilds the parent's band inventory from its parsed bands (no
+    rescan), opening its own dataset handle on first read.
+    """
+    gdal.SetCacheMax(cache_mb * 1024 * 1024)
+    gdal.SetConfigOption('GDAL_NUM_THREADS', str(num_threads))
+
+    logger = logging.getLogger('process_weather')
+    logger.setLevel(log_level)
+
+    _worker_state['inventory'] = GribInventory(grib_file, bands)
+    _worker_state['config'] = VariableConfig(config_path)
+    _worker_state['logger'] = logger
+
+
+def _memory_key(config: VariableConfig, var_name: str) -> str:
+    """Memory history key of a variable (model/variable)."""
+    return f"{config.config.get('model', 'unknown')}/{var_name}"
+
+
+def _process_variable_worker(
+    grib_file: Path,
+    var_name: str,
+    var_config: Dict,
+    output_dir: Path,
+    dtype: Optional[str],
+    input_hash: Optional[str],
+    colorize_dir: Optional[Path] = None,
+    zarr_dir: Optional[Path] = None,
+    window: Optional[PixelWindow] = None,
+    hashed_processing: Optional[Dict] = None
+) -> Tuple[Optional[Path], float, StageTimer]:
+    """
+    Process one variable in a worker process.
+
+    Returns:
+        (output path or None, peak RSS in MB, stage timings)
+    """
+    timer = StageTimer(var_name, forecast_hour_from_path(grib_file))
+    with track_peak_memory() as usage:
+        output_path = process_variable(
+            grib_file,
+            var_name,
+            var_config,
+            _worker_state['config'],
+            output_dir,
+            _worker_state['logger'],
+            _worker_state['inventory'],
+            dtype,
+            input_hash,
+            timer,
+            colorize_dir,
+            zarr_dir,
+            window,
+            hashed_processing
+        )
+    return output_path, usage['peak_rss_mb'], timer
+
+
+def process_grib_file(
+    grib_file: Path,
+    config: VariableConfig,
+    output_dir: Path,
+    priority: Optional[int],
+    variables: Optional[List[str]],
+    logger: logging.Logger,
+    use_inventory_cache: bool = True,
+    dtype: Optional[str] = None,
+    workers: int = 1,
+    batch_warp: bool = False,
+    incremental: bool = False,
+    metrics: bool = False,
+    colorize_dir: Optional[Path] = None,
+    zarr_dir: Optional[Path] = None,
+    bbox: Optional[Sequence[float]] = None,
+    memory_governor: Optional[MemoryGovernor] = None
+) -> Dict[str, Path]:
+    """
+    Process all enabled variables from a GRIB2 file.
+
+    Args:
+        grib_file: Input GRIB2 file
+        config: Variable configuration
+        output_dir: Output directory
+        priority: Filter by priority level
+        variables: Specific variables to process (None = all enabled)
+        logger: Logger instance
+        use_inventory_cache: Read/write the band inventory sidecar
+        dtype: Processing data type (default: processing.dtype, else float32)
+        workers: Number of worker processes for processing variables
+                 concurrently (1 = sequential, in this process)
+        batch_warp: Reproject variables that share a grid and resampling
+                    method together (see process_variables_batched);
+                    also enabled by processing.batch_warp
+        incremental: Skip variables whose existing COG records the same
+                     input hash (GRIB message, variable and processing config)
+        metrics: Send per-variable stage timings to CloudWatch
+                 (they are always logged)
+        colorize_dir: Also write colored RGBA COGs here, from the in-memory
+                      reprojected arrays (replaces apply_colormap.py)
+        zarr_dir: Also append each field to its per-cycle Zarr cube here
+        bbox: Area of interest (west, south, east, north) in degrees; only
+              this part of the grid is read and processed
+              (default: processing.aoi, else the whole grid)
+        memory_governor: Admits variable workers within a memory budget and
+                         learns their peaks (default: get_memory_governor)
+
+    Returns:
+        Dict mapping variable names to output file paths
+    """
+    logger.info(f"Processing GRIB2 file: {grib_file}")
+
+    # Get variables to process
+    vars_to_process = select_variables(config, priority, variables)
+
+    logger.info(f"Processing {len(vars_to_process)} variables")
+
+    # Parse band inventory once; every variable reuses it and its open dataset
+    inventory = GribInventory.load(grib_file, use_inventory_cache, logger)
+    logger.debug(f"Indexed {len(inventory)} bands in {grib_file.name}")
+
+    results = {}
+    success_count = 0
+    total_count = len(vars_to_process)
+
+    # Each variable's COG records a hash of its inputs. The variable's worker
+    # computes it; only --incremental needs the hashes up front, to skip
+    # outputs that are already current
+    processing = config.get_processing_config()
+    hashed_processing = dict(processing, dtype=dtype or processing.get('dtype', DEFAULT_DTYPE))
+    aoi = parse_bbox(bbox if bbox is not None else processing.get('aoi'))
+    if bbox is not None:
+        hashed_processing['aoi'] = list(aoi)
+    input_hashes: Dict[str, str] = {}
+
+    try:
+        if incremental:
+            for var_name in list(vars_to_process):
+                input_hash = get_input_hash(inventory, vars_to_process[var_name], config,
+                                            hashed_processing)
+                if input_hash is None:
+                    continue
+                input_hashes[var_name] = input_hash
+                output_path = get_output_path(grib_file, var_name, output_dir)
+                colored_current = colorize_dir is None or read_output_hash(
+                    get_colored_path(output_path, colorize_dir)
+                ) == input_hash
+                cube_current = zarr_dir is None or read_cube_hash(
+                    get_cube_path(grib_file, var_name, zarr_dir), forecast_hour_from_path(grib_file)
+                ) == input_hash
+                if (read_output_hash(output_path) == input_hash
+                        and colored_current and cube_current):
+                    logger.debug(f"Up to date: {output_path.name}")
+                    results[var_name] = output_path
+                    success_count += 1
+                    del vars_to_process[var_name]
+            logger.info(f"Incremental: {success_count} outputs up to date, "
+                        f"{len(vars_to_process)} to process")
+
+        # Process each variable
+        window = get_aoi_window(inventory.dataset, aoi, logger) if aoi and vars_to_process else None
+        governor = memory_governor or get_memory_governor(processing, logger)
+        grid_estimate_mb = estimate_grid_memory_mb(
+            inventory.dataset, processing, hashed_processing['dtype'], window
+        )
+        estimates = {
+            var_name: governor.estimate(_memory_key(config, var_name), grid_estimate_mb)
+            for var_name in vars_to_process
+        }
+    except Exception:
+        inventory.close()
+        raise
+    cloudwatch = get_metrics(logger=logger) if metrics else None
+    model = config.config.get('model')
+    forecast_hour = forecast_hour_from_path(grib_file)
+
+    def record(
+        var_name: str,
+        output_path: Optional[Path],
+        peak_mb: float,
+        timer: Optional[StageTimer] = None
+    ) -> None:
+        nonlocal success_count
+        governor.record(_memory_key(config, var_name), peak_mb, estimates[var_name])
+        if timer is not None and timer.durations:
+            report_stage_timings(timer, logger, cloudwatch, model)
+        if output_path:
+            results[var_name] = output_path
+            success_count += 1
+        else:
+            logger.warning(f"Failed to process variable: {var_name}")
+
+    workers = max(1, min(workers, len(vars_to_process)))
+    batch_warp = batch_warp or config.get_processing_config().get('batch_warp', False)
+    if batch_warp and workers > 1:
+        logger.warning("--workers is ignored with batched warping")
+        workers = 1
+
+    try:
+        if batch_warp:
+            timers: Dict[str, StageTimer] = {}
+            with track_peak_memory() as usage:
+                outputs = process_variables_batched(
+                    grib_file, vars_to_process, config, output_dir, logger, inventory, dtype,
+                    input_hashes, timers, colorize_dir, zarr_dir, window, hashed_processing
+                )
+            logger.info(f"Peak memory for {grib_file.name}: {usage['peak_rss_mb']:.1f} MB")
+            # All variables are held together, so each one is charged the
+            # batch's peak: file tasks are estimated by their largest variable
+            for var_name, output_path in outputs.items():
+                record(var_name, output_path, usage['peak_rss_mb'], timers.get(var_name))
+        elif workers == 1:
+            for var_name, var_config in vars_to_process.items():
+                timer = StageTimer(var_name, forecast_hour)
+                try:
+                    with track_peak_memory() as usage:
+                        output_path = process_variable(
+                            grib_file,
+                            var_name,
+                            var_config,
+                            config,
+                            output_dir,
+                            logger,
+                            inventory,
+                            dtype,
+                            input_hashes.get(var_name),
+                            timer,
+                            colorize_dir,
+                            zarr_dir,
+                            window,
+                            hashed_processing
+                        )
+                    record(var_name, output_path, usage['peak_rss_mb'], timer)
+
+                except Exception as e:
+                    logger.error(f"Error processing {var_name}: {e}", exc_info=True)
+        else:
+            cache_mb = max(MIN_WORKER_CACHE_MB, GDAL_CACHE_MB // workers)
+            num_threads = max(1, (os.cpu_count() or 1) // workers)
+            budget = f", {governor.budget_mb:.0f} MB memory budget" if governor.budget_mb else ''
+            logger.info(f"Using {workers} worker processes "
+                        f"({cache_mb} MB GDAL cache, {num_threads} threads each{budget})")
+
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_variable_worker,
+                initargs=(grib_file, inventory.bands, config.config_path,
+                          cache_mb, num_threads, logger.getEffectiveLevel())
+            ) as executor:
+                tasks = [
+                    Task(var_name, estimates[var_name], _process_variable_worker, (
+                        grib_file, var_name, var_config, output_dir, dtype,
+                        input_hashes.get(var_name), colorize_dir, zarr_dir, window,
+                        hashed_processing
+                    ))
+                    for var_name, var_config in vars_to_process.items()
+                ]
+                for task, future in submit_governed(executor, tasks, governor):
+                    var_name = task.name
+                    try:
+                        output_path, peak_mb, timer = future.result()
+                        record(var_name, output_path, peak_mb, timer)
+                    except Exception as e:
+                        logger.error(f"Error processing {var_name}: {e}", exc_info=True)
+    finally:
+        inventory.close()
+        if memory_governor is None:
+            governor.save()
+
+    logger.info(f"Processed {success_count}/{total_count} variables successfully")
+
+    return results
+
+
+def find_grib_files(inputs: List[Path]) -> List[Path]:
+    """
+    Expand input paths into a list of GRIB2 files.
+
+    Args:
+        inputs: GRIB2 files and/or directories containing *.grib2 files
+
+    Returns:
+        Sorted, de-duplicated list of GRIB2 file paths
+    """
+    grib_files = []
+    for input_path in inputs:
+        if input_path.is_dir():
+            grib_files.extend(input_path.glob('*.grib2'))
+        else:
+            grib_files.append(input_path)
+    return sorted(set(grib_files))
+
+
+def _init_file_worker(
+    config_path: Path,
+    cache_mb: int,
+    num_threads: int,
+    log_level: int,
+    history_path: Optional[Path] = None
+) -> None:
+    """Initialize a file worker process with its own config and GDAL budget."""
+    gdal.SetCacheMax(cache_mb * 1024 * 1024)
+    gdal.SetConfigOption('GDAL_NUM_THREADS', str(num_threads))
+
+    logger = logging.getLogger('process_weather')
+    logger.setLevel(log_level)
+
+    _worker_state['config'] = VariableConfig(config_path)
+    _worker_state['logger'] = logger
+    _worker_state['history_path'] = history_path
+
+
+def _process_file_worker(
+    grib_file: Path,
+    output_dir: Path,
+    kwargs: Dict
+) -> Tuple[Dict[str, Path], Dict[str, float]]:
+    """
+    Process one GRIB2 file in a file worker process.
+
+    Returns:
+        (variable -> output path, variable memory key -> observed peak MB)
+    """
+    governor = MemoryGovernor(
+        history_path=_worker_state['history_path'], logger=_worker_state['logger'], read_only=True
+    )
+    results = process_grib_file(
+        grib_file,
+        _worker_state['config'],
+        output_dir,
+        logger=_worker_state['logger'],
+        memory_governor=governor,
+        **kwargs
+    )
+    return results, governor.observations
+
+
+def select_variables(
+    config: VariableConfig,
+    priority: Optional[int],
+    variables: Optional[List[str]]
+) -> Dict[str, Dict]:
+    """
+    Variables to process: the named ones, else a priority level, else all enabled.
+
+    Args:
+        config: Variable configuration
+        priority: Filter by priority level
+        variables: Specific variables to process
+
+    Returns:
+        Variable name -> variable configuration dict
+    """
+    if variables:
+        all_vars = config.config.get('variables', {})
+        return {name: all_vars[name] for name in variables if name in all_vars}
+    if priority is not None:
+        return config.get_variables_by_priority(priority)
+    return config.get_enabled_variables()
+
+
+def estimate_file_memory_mb(
+    grib_file: Path,
+    config: VariableConfig,
+    var_names: List[str],
+    governor: MemoryGovernor,
+    dtype: Optional[str]
+) -> float:
+    """
+    Estimate a file task's peak memory: its largest variable.
+
+    The GRIB2 file is only opened when a variable has no learned peak.
+
+    Args:
+        grib_file: Input GRIB2 file
+        config: Variable configuration
+        var_names: Variables the file task will process
+        governor: Memory governor (learned peaks)
+        dtype: Processing data type override
+
+    Returns:
+        Estimated peak RSS in MB
+    """
+    processing = config.get_processing_config()
+    keys = [_memory_key(config, var_name) for var_name in var_names]
+    grid_estimate_mb = 0.0
+    if any(key not in governor.history for key in keys):
+        ds = gdal.Open(str(grib_file))
+        grid_estimate_mb = estimate_grid_memory_mb(
+            ds, processing, dtype or processing.get('dtype', DEFAULT_DTYPE)
+        )
+        ds = None
+    return max((governor.estimate(key, grid_estimate_mb) for key in keys), default=grid_estimate_mb)
+
+
+def process_grib_files(
+    grib_files: List[Path],
+    config: VariableConfig,
+    output_dir: Path,
+    priority: Optional[int],
+    variables: Optional[List[str]],
+    logger: logging.Logger,
+    use_inventory_cache: bool = True,
+    dtype: Optional[str] = None,
+    workers: int = 1,
+    file_workers: int = 1,
+    batch_warp: bool = False,
+    incremental: bool = False,
+    metrics: bool = False,
+    colorize_dir: Optional[Path] = None,
+    zarr_dir: Optional[Path] = None,
+    bbox: Optional[Sequence[float]] = None,
+    memory_budget_mb: Optional[float] = None
+) -> Dict[Path, Optional[Dict[str, Path]]]:
+    """
+    Process a batch of GRIB2 files in one process (or one worker pool).
+
+    Imports, GDAL setup and config parsing are paid once for the whole
+    batch instead of once per forecast hour.
+
+    Args:
+        grib_files: Input GRIB2 files
+        config: Variable configuration
+        output_dir: Output directory
+        priority: Filter by priority level
+        variables: Specific variables to process (None = all enabled)
+        logger: Logger instance
+        use_inventory_cache: Read/write the band inventory sidecar
+        dtype: Processing data type (default: processing.dtype, else float32)
+        workers: Worker processes per file for variables (sequential files only)
+        file_workers: Number of files processed concurrently
+        batch_warp: Reproject each file's variables in batches per grid
+        incremental: Skip variables whose outputs are already current
+        metrics: Send per-variable stage timings to CloudWatch
+        colorize_dir: Also write colored RGBA COGs here
+        zarr_dir: Also write per-cycle Zarr cubes here
+        bbox: Area of interest (west, south, east, north) in degrees
+              (default: processing.aoi)
+        memory_budget_mb: Memory budget for concurrent variables or files
+                          (default: processing.memory_budget_mb, else 80%
+                          of available memory)
+
+    Returns:
+        Dict mapping each GRIB2 file to its variable -> output path dict,
+        or None if the file failed outright
+    """
+    file_kwargs = dict(
+        priority=priority,
+        variables=variables,
+        use_inventory_cache=use_inventory_cache,
+        dtype=dtype,
+        batch_warp=batch_warp,
+        incremental=incremental,
+        metrics=metrics,
+        colorize_dir=colorize_dir,
+        zarr_dir=zarr_dir,
+        bbox=bbox,
+    )
+    all_results: Dict[Path, Optional[Dict[str, Path]]] = {}
+    file_workers = max(1, min(file_workers, len(grib_files)))
+    governor = get_memory_governor(config.get_processing_config(), logger, memory_budget_mb)
+
+    if file_workers == 1:
+        for index, grib_file in enumerate(grib_files, 1):
+            logger.info(f"File {index}/{len(grib_files)}: {grib_file.name}")
+            try:
+                all_results[grib_file] = process_grib_file(
+                    grib_file, config, output_dir, logger=logger,
+                    workers=workers, memory_governor=governor, **file_kwargs
+                )
+            except Exception as e:
+                logger.error(f"Failed to process {grib_file.name}: {e}", exc_info=True)
+                all_results[grib_file] = None
+        governor.save()
+        return all_results
+
+    # Nested process pools aren't supported, so variables run sequentially
+    # inside each file worker
+    if workers > 1:
+        logger.warning("--workers is ignored when --file-workers > 1")
+
+    cache_mb = max(MIN_WORKER_CACHE_MB, GDAL_CACHE_MB // file_workers)
+    num_threads = max(1, (os.cpu_count() or 1) // file_workers)
+    budget = f", {governor.budget_mb:.0f} MB memory budget" if governor.budget_mb else ''
+    logger.info(f"Processing {len(grib_files)} files with {file_workers} worker processes "
+                f"({cache_mb} MB GDAL cache, {num_threads} threads each{budget})")
+
+    var_names = list(select_variables(config, priority, variables))
+    tasks = [
+        Task(
+            grib_file,
+            estimate_file_memory_mb(grib_file, config, var_names, governor, dtype),
+            _process_file_worker,
+            (grib_file, output_dir, file_kwargs)
+        )
+        for grib_file in grib_files
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers=file_workers,
+        initializer=_init_file_worker,
+        initargs=(config.config_path, cache_mb, num_threads, logger.getEffectiveLevel(),
+                  governor.history_path)
+    ) as executor:
+        for task, future in submit_governed(executor, tasks, governor):
+            grib_file = task.name
+            try:
+                all_results[grib_file], observations = future.result()
+                governor.merge(observations)
+            except Exception as e:
+                logger.error(f"Failed to process {grib_file.name}: {e}", exc_info=True)
+                all_results[grib_file] = None
+
+    governor.save()
+
+    # Report in input order regardless of completion order
+    return {grib_file: all_results[grib_file] for grib_file in grib_files}
+
+
+def write_summary_json(
+    summary_path: Path,
+    all_results: Dict[Path, Optional[Dict[str, Path]]],
+    output_dir: Path
+) -> None:
+    """
+    Write a combined JSON summary of a batch run.
+
+    Args:
+        summary_path: Output JSON path
+        all_results: Results from process_grib_files
+        output_dir: Output directory of the run
+    """
+    files = []
+    for grib_file, results in all_results.items():
+        files.append({
+            'grib_file': str(grib_file),
+            'status': 'failed' if not results else 'ok',
+            'outputs': {
+                var_name: {
+                    'path': str(output_path),
+                    'size_bytes': output_path.stat().st_size,
+                }
+                for var_name, output_path in (results or {}).items()
+            },
+        })
+
+    summary = {
+        'generated_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'output_dir': str(output_dir),
+        'files_total': len(all_results),
+        'files_failed': sum(1 for results in all_results.values() if not results),
+        'cogs_created': sum(len(results or {}) for results in all_results.values()),
+        'files': files,
+    }
+
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Process HRRR GRIB2 files to Cloud Optimized GeoTIFFs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Process all enabled variables
+  %(prog)s --input /tmp/hrrr.grib2 --output /tmp/processed/
+
+  # Process only priority 1 variables
+  %(prog)s --input /tmp/hrrr.grib2 --output /tmp/processed/ --priority 1
+
+  # Process specific variables
+  %(prog)s --input /tmp/hrrr.grib2 --output /tmp/processed/ --variables temperature_2m wind_u_10m
+
+  # Process all enabled variables in 4 parallel worker processes
+  %(prog)s --input /tmp/hrrr.grib2 --output /tmp/processed/ --workers 4
+
+  # Reproject all variables sharing a grid with one warp
+  %(prog)s --input /tmp/hrrr.grib2 --output /tmp/processed/ --batch-warp
+
+  # Rerun a cycle, regenerating only outputs whose inputs changed
+  %(prog)s --input /tmp/downloads/ --output /tmp/processed/ --incremental
+
+  # Process every forecast hour in a directory, 3 files at a time
+  %(prog)s --input /tmp/downloads/ --output /tmp/processed/ --file-workers 3
+
+  # List available bands in GRIB2 file
+  %(prog)s --input /tmp/hrrr.grib2 --list-bands
+        """
+    )
+
+    parser.add_argument('--input', '-i', type=Path, nargs='+', required=True,
+                       help='Input GRIB2 file(s) and/or directories of *.grib2 files')
+    parser.add_argument('--output', '-o', type=Path,
+                       help='Output directory for COG files')
+    parser.add_argument('--config', '-c', type=Path,
+                       help='Path to variables.yaml (default: config/variables.yaml)')
+    parser.add_argument('--priority', type=int, choices=[1, 2, 3],
+                       help='Process only variables with this priority')
+    parser.add_argument('--variables', nargs='+',
                        help='Specific variables to process')
     parser.add_argument('--list-bands', action='store_true',
                        help='List all bands in GRIB2 file and exit')
+    parser.add_argument('--workers', '-j', type=int, default=1,
+                       help='Process variables concurrently in N worker processes (default: 1)')
+    parser.add_argument('--file-workers', type=int, default=1,
+                       help='Process N GRIB2 files concurrently (default: 1)')
+    parser.add_argument('--batch-warp', action='store_true',
+                       help='Reproject variables that share a grid and resampling method '
+                            'with one warp per group (default: processing.batch_warp)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Skip variables whose existing COG was built from the same inputs')
+    parser.add_argument('--colorize', nargs='?', const=True, type=Path, metavar='DIR',
+                       help='Also write colored RGBA COGs (*_colored.tif) from the in-memory '
+                            'arrays, to DIR (default: --output)')
+    parser.add_argument('--zarr', nargs='?', const=True, type=Path, metavar='DIR',
+                       help='Also write each field into a per-variable, per-cycle Zarr cube '
+                            '(forecast_hour, y, x) in DIR (default: --output)')
+    parser.add_argument('--bbox', nargs=4, type=float, metavar=('WEST', 'SOUTH', 'EAST', 'NORTH'),
+                       help='Only process this lon/lat area of interest (default: processing.aoi)')
+    parser.add_argument('--memory-budget-mb', type=float,
+                       help='Memory budget for concurrent variables/files (default: '
+                            'processing.memory_budget_mb, else 80%% of available memory)')
+    parser.add_argument('--metrics', action='store_true',
+                       help='Send per-variable stage timings, output bytes and pixel counts '
+                            'to CloudWatch')
+    parser.add_argument('--summary-json', type=Path,
+                       help='Write a combined JSON summary of all processed files')
+    parser.add_argument('--dtype', choices=sorted(GDAL_DTYPES),
+                       help=f'In-memory data type (default: processing.dtype, else {DEFAULT_DTYPE})')
+    parser.add_argument('--no-inventory-cache', action='store_true',
+                       help='Do not read or write the GRIB2 band inventory sidecar')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable debug logging')
 
@@ -688,21 +2270,31 @@ Examples:
     # Setup logging
     logger = setup_logging(args.verbose)
 
-    # Check input file exists
-    if not args.input.exists():
-        logger.error(f"Input file not found: {args.input}")
+    # Check inputs exist
+    for input_path in args.input:
+        if not input_path.exists():
+            logger.error(f"Input file not found: {input_path}")
+            return 2
+
+    grib_files = find_grib_files(args.input)
+    if not grib_files:
+        logger.error(f"No GRIB2 files found in {', '.join(str(p) for p in args.input)}")
         return 2
 
     # List bands mode
     if args.list_bands:
-        logger.info(f"Listing bands in {args.input}")
         try:
-            bands = list_grib_bands(args.input)
-            print(f"\n{'Band':<6} {'Element':<15} {'Short Name':<15} {'Description'}")
-            print("=" * 80)
-            for band_num, desc, element, short_name, metadata in bands:
-                print(f"{band_num:<6} {element:<15} {short_name:<15} {desc[:50]}")
-            print(f"\nTotal bands: {len(bands)}")
+            for grib_file in grib_files:
+                logger.info(f"Listing bands in {grib_file}")
+                bands = list_grib_bands(grib_file, not args.no_inventory_cache)
+                print(f"\n{'Band':<6} {'Element':<15} {'Short Name':<15} {'Offset':>12} {'Length':>10}  {'Description'}")
+                print("=" * 100)
+                for band in bands:
+                    offset = band.offset if band.offset is not None else '-'
+                    length = band.length if band.length is not None else '-'
+                    print(f"{band.band_number:<6} {band.element:<15} {band.short_name:<15} "
+                          f"{offset:>12} {length:>10}  {band.description[:50]}")
+                print(f"\nTotal bands: {len(bands)}")
             return 0
         except Exception as e:
             logger.error(f"Failed to list bands: {e}")
@@ -721,30 +2313,54 @@ Examples:
         logger.error(f"Failed to load configuration: {e}")
         return 2
 
-    # Process GRIB2 file
+    # Process GRIB2 files
     try:
-        results = process_grib_file(
-            args.input,
+        all_results = process_grib_files(
+            grib_files,
             config,
             args.output,
             args.priority,
             args.variables,
-            logger
+            logger,
+            use_inventory_cache=not args.no_inventory_cache,
+            dtype=args.dtype,
+            workers=args.workers,
+            file_workers=args.file_workers,
+            batch_warp=args.batch_warp,
+            incremental=args.incremental,
+            metrics=args.metrics,
+            colorize_dir=args.output if args.colorize is True else args.colorize,
+            zarr_dir=args.output if args.zarr is True else args.zarr,
+            bbox=args.bbox,
+            memory_budget_mb=args.memory_budget_mb
         )
 
         # Print summary
+        total_cogs = sum(len(results or {}) for results in all_results.values())
+        failed_files = [grib_file for grib_file, results in all_results.items() if not results]
+
         logger.info("\n" + "=" * 60)
         logger.info("Processing Complete")
         logger.info("=" * 60)
-        logger.info(f"Processed: {len(results)} variables")
+        logger.info(f"Files: {len(grib_files)} ({len(failed_files)} failed)")
+        logger.info(f"Processed: {total_cogs} variables")
         logger.info(f"Output directory: {args.output}")
 
-        for var_name, output_path in results.items():
-            size_mb = output_path.stat().st_size / 1024 / 1024
-            logger.info(f"  ✓ {var_name}: {output_path.name} ({size_mb:.2f} MB)")
-
-        if len(results) == 0:
-            logger.error("No variables processed successfully")
+        for grib_file, results in all_results.items():
+            if len(grib_files) > 1:
+                logger.info(f"{grib_file.name}:")
+            if not results:
+                logger.error(f"  ✗ No variables processed successfully")
+                continue
+            for var_name, output_path in results.items():
+                size_mb = output_path.stat().st_size / 1024 / 1024
+                logger.info(f"  ✓ {var_name}: {output_path.name} ({size_mb:.2f} MB)")
+
+        if args.summary_json:
+            write_summary_json(args.summary_json, all_results, args.output)
+            logger.info(f"Summary written to {args.summary_json}")
+
+        if failed_files:
             return 1
 
         return 0
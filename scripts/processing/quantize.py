@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Quantized Integer COG Output
+
+Stores a variable as 16-bit integers with GDAL scale/offset metadata
+instead of float32:
+- Codes span the variable's typical_range plus headroom on both sides
+  (physical value = code * scale + offset)
+- One code is reserved for nodata; values beyond the range are clipped
+- Readers that honour scale/offset (GDAL, rasterio, rioxarray with
+  mask_and_scale) see physical values; apply_colormap converts its color
+  stops to codes
+
+Enable per variable with `quantize: int16` (or uint16) in variables.yaml,
+or for every variable with processing.quantize.
+
+Report precision lost vs bytes saved for an existing float COG:
+    python quantize.py --input temperature_2m_hrrr.20260110.t21z.f00.tif
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+from osgeo import gdal
+
+# Add repository root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.config_manager import VariableConfig
+
+# dtype name -> (numpy type, lowest code, highest code, nodata code)
+QUANTIZED_DTYPES = {
+    'int16': (np.int16, -32767, 32767, -32768),
+    'uint16': (np.uint16, 0, 65534, 65535),
+}
+
+# Fraction of the typical_range width added below and above it
+DEFAULT_HEADROOM = 0.5
+
+# Rows converted per block
+BLOCK_ROWS = 256
+
+
+class QuantizeSpec(NamedTuple):
+    """Integer encoding of a variable: value = code * scale + offset."""
+    dtype: str
+    scale: float
+    offset: float
+    nodata: int
+
+    @classmethod
+    def from_range(
+        cls,
+        dtype: str,
+        low: float,
+        high: float,
+        headroom: float = DEFAULT_HEADROOM
+    ) -> 'QuantizeSpec':
+        """
+        Build the encoding that maps [low, high] plus headroom onto the codes.
+
+        Args:
+            dtype: 'int16' or 'uint16'
+            low: Lowest expected value (typical_range[0])
+            high: Highest expected value (typical_range[1])
+            headroom: Fraction of (high - low) added on both sides
+
+        Returns:
+            QuantizeSpec
+        """
+        if dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported quantize dtype '{dtype}' "
+                             f"(expected one of {sorted(QUANTIZED_DTYPES)})")
+        if not high > low:
+            raise ValueError(f"Invalid quantize range [{low}, {high}]")
+
+        _, code_min, code_max, nodata = QUANTIZED_DTYPES[dtype]
+        margin = (high - low) * headroom
+        low, high = low - margin, high + margin
+        scale = (high - low) / (code_max - code_min)
+        offset = low - code_min * scale
+        return cls(dtype, scale, offset, nodata)
+
+    @property
+    def numpy_dtype(self) -> type:
+        return QUANTIZED_DTYPES[self.dtype][0]
+
+    @property
+    def value_range(self) -> tuple:
+        """Physical values of the lowest and highest codes."""
+        _, code_min, code_max, _ = QUANTIZED_DTYPES[self.dtype]
+        return (code_min * self.scale + self.offset, code_max * self.scale + self.offset)
+
+
+def get_quantize_spec(variable_config: Dict, processing: Dict) -> Optional[QuantizeSpec]:
+    """
+    Get a variable's quantization, if enabled.
+
+    The variable's `quantize` setting wins over processing.quantize; set it
+    to null on a variable to keep that variable in float.
+
+    Args:
+        variable_config: Variable configuration dict
+        processing: Processing configuration dict
+
+    Returns:
+        QuantizeSpec, or None to write float
+    """
+    if 'quantize' in variable_config:
+        dtype = variable_config['quantize']
+    else:
+        dtype = processing.get('quantize')
+    if not dtype:
+        return None
+
+    typical_range = variable_config.get('typical_range')
+    if not typical_range or len(typical_range) != 2:
+        raise ValueError("quantize requires typical_range: [min, max]")
+
+    headroom = processing.get('quantize_headroom', DEFAULT_HEADROOM)
+    return QuantizeSpec.from_range(dtype, float(typical_range[0]), float(typical_range[1]), headroom)
+
+
+def quantize_array(
+    values: np.ndarray,
+    spec: QuantizeSpec,
+    nodata: Optional[float] = None
+) -> np.ndarray:
+    """
+    Encode float values as integer codes.
+
+    Args:
+        values: Float array
+        spec: Encoding
+        nodata: Source nodata value (NaN is always nodata)
+
+    Returns:
+        Integer array; nodata/NaN pixels are set to spec.nodata and values
+        beyond the range are clipped to the lowest/highest code
+    """
+    _, code_min, code_max, _ = QUANTIZED_DTYPES[spec.dtype]
+    codes = np.empty(values.shape, dtype=spec.numpy_dtype)
+    check_nodata = nodata is not None and not np.isnan(nodata)
+
+    for start in range(0, values.shape[0], BLOCK_ROWS):
+        block = values[start:start + BLOCK_ROWS]
+        scaled = (block - spec.offset) / spec.scale
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, code_min, code_max, out=scaled)
+        invalid = np.isnan(block)
+        if check_nodata:
+            invalid |= block == nodata
+        out = codes[start:start + BLOCK_ROWS]
+        out[...] = np.where(invalid, spec.nodata, scaled)
+
+    return codes
+
+
+def dequantize_array(codes: np.ndarray, spec: QuantizeSpec) -> np.ndarray:
+    """
+    Decode integer codes to float32 values (nodata becomes NaN).
+
+    Args:
+        codes: Integer array from quantize_array
+        spec: Encoding
+
+    Returns:
+        float32 array
+    """
+    values = codes.astype(np.float32) * np.float32(spec.scale) + np.float32(spec.offset)
+    values[codes == spec.nodata] = np.nan
+    return values
+
+
+def precision_report(
+    values: np.ndarray,
+    spec: QuantizeSpec,
+    nodata: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Measure the precision lost by quantizing values.
+
+    Args:
+        values: Float array
+        spec: Encoding
+        nodata: Source nodata value
+
+    Returns:
+        Dict with step (scale), max_abs_error, rms_error, clipped_pixels
+        and valid_pixels
+    """
+    codes = quantize_array(values, spec, nodata)
+    decoded = dequantize_array(codes, spec)
+    valid = ~np.isnan(values)
+    if nodata is not None and not np.isnan(nodata):
+        valid &= values != nodata
+
+    error = np.abs(decoded[valid].astype(np.float64) - values[valid])
+    low, high = spec.value_range
+    return {
+        'step': spec.scale,
+        'max_abs_error': float(error.max()) if error.size else 0.0,
+        'rms_error': float(np.sqrt(np.mean(error ** 2))) if error.size else 0.0,
+        'clipped_pixels': int(np.count_nonzero((values[valid] < low) | (values[valid] > high))),
+        'valid_pixels': int(np.count_nonzero(valid)),
+    }
+
+
+def _cog_size(src_ds: gdal.Dataset, creation_options: list) -> int:
+    """Write src_ds as a COG in /vsimem/ and return its size in bytes."""
+    path = '/vsimem/quantize_report.tif'
+    gdal.Translate(path, src_ds, options=gdal.TranslateOptions(
+        format='COG', creationOptions=creation_options
+    ))
+    size = gdal.VSIStatL(path).size
+    gdal.Unlink(path)
+    return size
+
+
+def main():
+    """Report precision lost vs bytes saved for a float COG."""
+    parser = argparse.ArgumentParser(
+        description='Report precision lost vs bytes saved by quantizing a float COG'
+    )
+    parser.add_argument('--input', '-i', type=Path, nargs='+', required=True,
+                       help='Float COG(s) written by process_weather.py')
+    parser.add_argument('--config', '-c', type=Path,
+                       help='Path to variables.yaml (default: config/variables.yaml)')
+    parser.add_argument('--variable',
+                       help='Variable name (default: inferred from the file name)')
+    parser.add_argument('--dtype', choices=sorted(QUANTIZED_DTYPES), default='int16',
+                       help='Quantized type when the variable has no quantize setting '
+                            '(default: int16)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger = logging.getLogger('quantize')
+
+    from scripts.processing.process_weather import cog_creation_options, get_compression_settings
+
+    gdal.UseExceptions()
+    config = VariableConfig(args.config)
+    processing = config.get_processing_config()
+
+    print(f"{'File':<45} {'Type':<7} {'Step':>10} {'Max err':>10} {'RMS err':>10} "
+          f"{'Clipped':>8} {'Float MB':>9} {'Quant MB':>9} {'Saved':>6}")
+    print("=" * 125)
+
+    for cog in args.input:
+        variables = config.config.get('variables', {})
+        name = args.variable or next(
+            (n for n in sorted(variables, key=len, reverse=True) if cog.name.startswith(n + '_')),
+            None
+        )
+        if name is None or name not in variables:
+            logger.error(f"{cog.name}: unknown variable (use --variable)")
+            continue
+
+        variable_config = dict(variables[name])
+        variable_config.setdefault('quantize', args.dtype)
+        spec = get_quantize_spec(variable_config, dict(processing, quantize=None))
+        if spec is None:
+            logger.error(f"{cog.name}: quantization disabled for {name}")
+            continue
+
+        ds = gdal.Open(str(cog))
+        band = ds.GetRasterBand(1)
+        values = band.ReadAsArray().astype(np.float32)
+        nodata = band.GetNoDataValue()
+        report = precision_report(values, spec, nodata)
+
+        codes = quantize_array(values, spec, nodata)
+        quant_ds = gdal.GetDriverByName('MEM').Create(
+            '', ds.RasterXSize, ds.RasterYSize, 1,
+            gdal.GDT_Int16 if spec.dtype == 'int16' else gdal.GDT_UInt16
+        )
+        quant_ds.SetGeoTransform(ds.GetGeoTransform())
+        quant_ds.SetProjection(ds.GetProjection())
+        quant_band = quant_ds.GetRasterBand(1)
+        quant_band.WriteArray(codes)
+        quant_band.SetNoDataValue(spec.nodata)
+        quant_band.SetScale(spec.scale)
+        quant_band.SetOffset(spec.offset)
+
+        float_size = cog.stat().st_size
+        creation_options = cog_creation_options(
+            get_compression_settings(variable_config, processing),
+            processing.get('tile_size', 512),
+            processing.get('overview_levels', [2, 4, 8, 16]),
+            quantized=True
+        )
+        quant_size = _cog_size(quant_ds, creation_options)
+        saved = 1 - quant_size / float_size if float_size else 0.0
+
+        print(f"{cog.name[:45]:<45} {spec.dtype:<7} {report['step']:>10.5f} "
+              f"{report['max_abs_error']:>10.5f} {report['rms_error']:>10.5f} "
+              f"{report['clipped_pixels']:>8} {float_size / 1024 / 1024:>9.2f} "
+              f"{quant_size / 1024 / 1024:>9.2f} {saved:>6.0%}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
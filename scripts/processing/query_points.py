@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Point and Time-Series Queries over Processed COGs
+
+Answers "the forecast at this lat/lon for every hour" without opening and
+transforming every COG by hand:
+- Indexes the gray COGs of an output directory by variable, cycle and
+  forecast hour, with each file's grid (geotransform, size, block size,
+  nodata, scale/offset). The index is cached in a JSON file in the
+  directory, keyed by file size and mtime, so only new or changed COGs
+  are opened
+- Transforms all query points to EPSG:3857 once, and to pixel offsets
+  once per distinct grid (all hours of a cycle normally share one)
+- Reads only the COG blocks that contain a point, once per block,
+  for all forecast hours in parallel
+- Keeps recent results in a small in-memory cache, dropped when any of
+  the underlying COGs change
+
+Quantized COGs are returned in physical units (scale/offset applied);
+nodata is returned as NaN.
+
+Usage:
+    python query_points.py --input /tmp/processed-weather/ \\
+        --variable temperature_2m --point 39.74 -104.99
+    python query_points.py --input /tmp/processed-weather/ \\
+        --variable temperature_2m wind_speed_10m --points-file points.csv --json out.json
+"""
+
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from osgeo import gdal
+from pyproj import Transformer
+
+# Add config directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.config_manager import VariableConfig
+from scripts.processing.stage_metrics import cycle_from_stem, forecast_hour_from_path
+
+gdal.UseExceptions()
+
+# Bump when the index layout changes so stale indexes are rebuilt
+INDEX_VERSION = 1
+INDEX_NAME = '.cog_index.json'
+
+# Query results kept in memory
+DEFAULT_CACHE_SIZE = 128
+
+# Threads reading COGs concurrently (GDAL releases the GIL during reads)
+DEFAULT_READ_WORKERS = 8
+
+_to_web_mercator = Transformer.from_crs('EPSG:4326', 'EPSG:3857', always_xy=True)
+
+
+class GridInfo(NamedTuple):
+    """Grid and encoding of a COG's first band."""
+    width: int
+    height: int
+    geotransform: Tuple[float, ...]
+    block_width: int
+    block_height: int
+    nodata: Optional[float]
+    scale: float
+    offset: float
+
+
+class IndexEntry(NamedTuple):
+    """One indexed COG."""
+    path: Path
+    variable: str
+    cycle: str
+    forecast_hour: int
+    grid: GridInfo
+    mtime_ns: int
+
+
+class QueryResult(NamedTuple):
+    """Values of one variable at a set of points for every forecast hour."""
+    variable: str
+    cycle: str
+    points: List[Tuple[float, float]]
+    forecast_hours: List[int]
+    values: np.ndarray  # (forecast hour, point), NaN = nodata or outside the grid
+
+
+def read_grid_info(cog_path: Path) -> GridInfo:
+    """Read the grid and encoding of a COG's first band."""
+    ds = gdal.Open(str(cog_path))
+    band = ds.GetRasterBand(1)
+    block_width, block_height = band.GetBlockSize()
+    return GridInfo(
+        ds.RasterXSize, ds.RasterYSize, tuple(ds.GetGeoTransform()),
+        block_width, block_height, band.GetNoDataValue(),
+        band.GetScale() or 1.0, band.GetOffset() or 0.0
+    )
+
+
+def parse_cog_name(cog_path: Path, variables: Sequence[str]) -> Optional[Tuple[str, str, int]]:
+    """
+    Split a COG name into variable, cycle and forecast hour.
+
+    Variable names may contain underscores, as may model names (gfs_wave),
+    so the longest configured variable that prefixes the name wins.
+
+    Args:
+        cog_path: COG path, e.g. wave_height_gfs_wave.20260110.t00z.f003.tif
+        variables: Configured variable names
+
+    Returns:
+        (variable, cycle, forecast hour), or None if the name doesn't match
+    """
+    stem = cog_path.stem
+    forecast_hour = forecast_hour_from_path(cog_path)
+    if forecast_hour is None:
+        return None
+    matches = [name for name in variables if stem.startswith(f"{name}_")]
+    if not matches:
+        return None
+    variable = max(matches, key=len)
+    cycle = cycle_from_stem(stem[len(variable) + 1:])
+    return variable, cycle, forecast_hour
+
+
+class COGIndex:
+    """
+    Index of the gray COGs in an output directory.
+
+    Usage:
+        index = COGIndex(Path('/tmp/processed-weather'), config_variables)
+        index.refresh()
+        entries = index.entries('temperature_2m', index.latest_cycle('temperature_2m'))
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        variables: Sequence[str],
+        logger: Optional[logging.Logger] = None,
+        persist: bool = True
+    ):
+        """
+        Args:
+            directory: Directory of COGs written by process_weather.py
+            variables: Configured variable names (used to parse file names)
+            logger: Logger instance
+            persist: Read and write the index file in directory
+        """
+        self.directory = Path(directory)
+        self.variables = list(variables)
+        self.logger = logger or logging.getLogger(__name__)
+        self.persist = persist
+        self._entries: Dict[Tuple[str, str], Dict[int, IndexEntry]] = {}
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / INDEX_NAME
+
+    def _read_cached(self) -> Dict[str, Dict]:
+        if not self.persist or not self.index_path.exists():
+            return {}
+        try:
+            cached = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        if cached.get('version') != INDEX_VERSION:
+            return {}
+        return cached.get('files', {})
+
+    def _write_cached(self, files: Dict[str, Dict]) -> None:
+        # Write atomically so concurrent readers never see a partial file; the
+        # temp name is per process since concurrent queries may refresh the index
+        temp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_text(json.dumps({'version': INDEX_VERSION, 'files': files}))
+            temp_path.replace(self.index_path)
+        except OSError as e:
+            self.logger.debug(f"Could not write COG index: {e}")
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def refresh(self) -> None:
+        """Rescan the directory, opening only new or changed COGs."""
+        cached = self._read_cached()
+        files: Dict[str, Dict] = {}
+        opened = 0
+        self._entries = {}
+
+        for cog_path in sorted(self.directory.glob('*.tif')):
+            if cog_path.stem.endswith('_colored'):
+                continue
+            parsed = parse_cog_name(cog_path, self.variables)
+            if parsed is None:
+                continue
+            variable, cycle, forecast_hour = parsed
+
+            stat = cog_path.stat()
+            record = cached.get(cog_path.name)
+            if not record or record['size'] != stat.st_size or record['mtime_ns'] != stat.st_mtime_ns:
+                try:
+                    grid = read_grid_info(cog_path)
+                except RuntimeError as e:
+                    self.logger.warning(f"Skipping unreadable COG {cog_path.name}: {e}")
+                    continue
+                record = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'grid': grid._asdict()}
+                opened += 1
+            files[cog_path.name] = record
+
+            grid = GridInfo(**dict(record['grid'], geotransform=tuple(record['grid']['geotransform'])))
+            self._entries.setdefault((variable, cycle), {})[forecast_hour] = IndexEntry(
+                cog_path, variable, cycle, forecast_hour, grid, stat.st_mtime_ns
+            )
+
+        if self.persist and (opened or files.keys() != cached.keys()):
+            self._write_cached(files)
+        self.logger.debug(f"Indexed {len(files)} COGs in {self.directory} ({opened} opened)")
+
+    def cycles(self, variable: str) -> List[str]:
+        """Cycles with COGs for a variable, oldest first."""
+        # Cycle names end in .YYYYMMDD.tHHz, so they sort by run time per model
+        return sorted(cycle for name, cycle in self._entries if name == variable)
+
+    def latest_cycle(self, variable: str) -> Optional[str]:
+        """Most recent cycle with COGs for a variable."""
+        cycles = self.cycles(variable)
+        return cycles[-1] if cycles else None
+
+    def entries(self, variable: str, cycle: str) -> List[IndexEntry]:
+        """COGs of a variable's cycle, by forecast hour."""
+        hours = self._entries.get((variable, cycle), {})
+        return [hours[hour] for hour in sorted(hours)]
+
+
+def points_to_web_mercator(points: Sequence[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Transform (lat, lon) points to EPSG:3857 x, y arrays."""
+    lats = np.array([lat for lat, _ in points], dtype=np.float64)
+    lons = np.array([lon for _, lon in points], dtype=np.float64)
+    return _to_web_mercator.transform(lons, lats)
+
+
+def pixel_offsets(x: np.ndarray, y: np.ndarray, grid: GridInfo) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pixel offsets of EPSG:3857 points on a north-up grid.
+
+    Returns:
+        (rows, cols, inside): integer offsets and a mask of points on the grid
+    """
+    gt = grid.geotransform
+    cols = np.floor((x - gt[0]) / gt[1]).astype(np.int64)
+    rows = np.floor((y - gt[3]) / gt[5]).astype(np.int64)
+    inside = (cols >= 0) & (cols < grid.width) & (rows >= 0) & (rows < grid.height)
+    return rows, cols, inside
+
+
+def read_points(entry: IndexEntry, rows: np.ndarray, cols: np.ndarray, inside: np.ndarray) -> np.ndarray:
+    """
+    Read a COG's values at pixel offsets, one read per block containing a point.
+
+    Args:
+        entry: Indexed COG
+        rows: Pixel rows of the points
+        cols: Pixel columns of the points
+        inside: Points on the grid (others are NaN)
+
+    Returns:
+        Values in physical units (NaN = nodata or outside the grid)
+    """
+    grid = entry.grid
+    values = np.full(rows.shape, np.nan, dtype=np.float64)
+    if not inside.any():
+        return values
+
+    ds = gdal.Open(str(entry.path))
+    band = ds.GetRasterBand(1)
+    point_index = np.flatnonzero(inside)
+    block_rows = rows[point_index] // grid.block_height
+    block_cols = cols[point_index] // grid.block_width
+    blocks_per_row = math.ceil(grid.width / grid.block_width)
+    block_ids = block_rows * blocks_per_row + block_cols
+
+    for block_id in np.unique(block_ids):
+        members = point_index[block_ids == block_id]
+        yoff = int(block_id // blocks_per_row) * grid.block_height
+        xoff = int(block_id % blocks_per_row) * grid.block_width
+        block = band.ReadAsArray(
+            xoff, yoff,
+            min(grid.block_width, grid.width - xoff),
+            min(grid.block_height, grid.height - yoff)
+        )
+        values[members] = block[rows[members] - yoff, cols[members] - xoff]
+    ds = None
+
+    if grid.nodata is not None:
+        values[values == grid.nodata] = np.nan
+    return values * grid.scale + grid.offset
+
+
+class PointQuery:
+    """
+    Point and time-series queries over a COGIndex, with a result cache.
+
+    Usage:
+        query = PointQuery(index)
+        result = query.query('temperature_2m', [(39.74, -104.99)])
+        result.values[:, 0]  # every forecast hour at the first point
+    """
+
+    def __init__(
+        self,
+        index: COGIndex,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        read_workers: int = DEFAULT_READ_WORKERS
+    ):
+        """
+        Args:
+            index: COG index (refreshed by the caller)
+            cache_size: Results kept in memory (0 = no cache)
+            read_workers: Threads reading COGs concurrently
+        """
+        self.index = index
+        self.cache_size = cache_size
+        self.read_workers = read_workers
+        self._cache: 'OrderedDict[Tuple, Tuple[Tuple, QueryResult]]' = OrderedDict()
+
+    def query(
+        self,
+        variable: str,
+        points: Sequence[Tuple[float, float]],
+        cycle: Optional[str] = None
+    ) -> Optional[QueryResult]:
+        """
+        Values of a variable at points for every forecast hour of a cycle.
+
+        Args:
+            variable: Variable name
+            points: (lat, lon) points in degrees
+            cycle: Cycle name, e.g. hrrr.20260110.t19z (default: latest)
+
+        Returns:
+            QueryResult, or None if the variable has no COGs
+        """
+        cycle = cycle or self.index.latest_cycle(variable)
+        entries = self.index.entries(variable, cycle) if cycle else []
+        if not entries:
+            return None
+
+        points = [(float(lat), float(lon)) for lat, lon in points]
+        key = (variable, cycle, tuple(points))
+        signature = tuple((entry.forecast_hour, entry.mtime_ns) for entry in entries)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == signature:
+            self._cache.move_to_end(key)
+            return cached[1]
+
+        # Points -> EPSG:3857 once; -> pixel offsets once per distinct grid
+        x, y = points_to_web_mercator(points)
+        offsets = {}
+        for entry in entries:
+            if entry.grid not in offsets:
+                offsets[entry.grid] = pixel_offsets(x, y, entry.grid)
+
+        workers = max(1, min(self.read_workers, len(entries)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            columns = list(executor.map(
+                lambda entry: read_points(entry, *offsets[entry.grid]), entries
+            ))
+
+        result = QueryResult(
+            variable, cycle, points,
+            [entry.forecast_hour for entry in entries],
+            np.vstack(columns)
+        )
+
+        if self.cache_size:
+            self._cache[key] = (signature, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+def read_points_file(points_file: Path) -> List[Tuple[float, float]]:
+    """
+    Read points from a CSV file with lat and lon columns.
+
+    Args:
+        points_file: CSV path (header row with lat/lon, or latitude/longitude)
+
+    Returns:
+        List of (lat, lon)
+    """
+    with open(points_file, newline='') as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        lat_field = fields.get('lat') or fields.get('latitude')
+        lon_field = fields.get('lon') or fields.get('longitude')
+        if not lat_field or not lon_field:
+            raise ValueError(f"{points_file} needs lat and lon columns")
+        return [(float(row[lat_field]), float(row[lon_field])) for row in reader]
+
+
+def result_to_dict(result: QueryResult, units: str = '') -> Dict:
+    """JSON-serializable form of a query result (nodata as null)."""
+    return {
+        'variable': result.variable,
+        'cycle': result.cycle,
+        'units': units,
+        'forecast_hours': result.forecast_hours,
+        'points': [
+            {
+                'lat': lat,
+                'lon': lon,
+                'values': [None if np.isnan(v) else round(float(v), 4) for v in result.values[:, i]],
+            }
+            for i, (lat, lon) in enumerate(result.points)
+        ],
+    }
+
+
+def print_result(result: QueryResult, units: str = '') -> None:
+    """Print a query result as a forecast hour x point table."""
+    labels = [f"{lat:.3f},{lon:.3f}" for lat, lon in result.points]
+    width = max(12, *(len(label) + 1 for label in labels))
+    print(f"\n{result.variable} ({result.cycle}){f' [{units}]' if units else ''}")
+    print(f"{'Hour':>5} " + ''.join(f"{label:>{width}}" for label in labels))
+    print("-" * (6 + width * len(labels)))
+    for row, hour in enumerate(result.forecast_hours):
+        cells = ''.join(
+            f"{'-':>{width}}" if np.isnan(value) else f"{value:>{width}.2f}"
+            for value in result.values[row]
+        )
+        print(f"{hour:>5} {cells}")
+
+
+def setup_logging(verbose: bool = False) -> logging.Logger:
+    """Configure logging."""
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    return logging.getLogger('query_points')
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Query processed COGs at lat/lon points for every forecast hour'
+    )
+    parser.add_argument('--input', '-i', type=Path, required=True,
+                       help='Directory of COGs written by process_weather.py')
+    parser.add_argument('--config', '-c', type=Path,
+                       help='Path to variables.yaml (default: config/variables.yaml)')
+    parser.add_argument('--variable', nargs='+', required=True, help='Variable(s) to query')
+    parser.add_argument('--cycle', help='Cycle, e.g. hrrr.20260110.t19z (default: latest per variable)')
+    parser.add_argument('--point', nargs=2, type=float, action='append', metavar=('LAT', 'LON'),
+                       help='Query point in degrees (repeatable)')
+    parser.add_argument('--points-file', type=Path, help='CSV file of points (lat, lon columns)')
+    parser.add_argument('--json', type=Path, help="Write results as JSON ('-' = stdout)")
+    parser.add_argument('--read-workers', type=int, default=DEFAULT_READ_WORKERS,
+                       help=f'Threads reading COGs concurrently (default: {DEFAULT_READ_WORKERS})')
+    parser.add_argument('--no-index-cache', action='store_true',
+                       help=f'Do not read or write the {INDEX_NAME} index file')
+    parser.add_argument('--list', action='store_true', help='List indexed variables and cycles and exit')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logger = setup_logging(args.verbose)
+    if not args.input.is_dir():
+        logger.error(f"Input directory not found: {args.input}")
+        return 2
+
+    config = VariableConfig(args.config)
+    variables = config.config.get('variables', {})
+    index = COGIndex(args.input, list(variables), logger, persist=not args.no_index_cache)
+    index.refresh()
+
+    if args.list:
+        for variable in args.variable:
+            cycles = index.cycles(variable)
+            for cycle in cycles:
+                hours = [entry.forecast_hour for entry in index.entries(variable, cycle)]
+                print(f"{variable:<28} {cycle:<28} {len(hours)} hours (f{min(hours):02d}-f{max(hours):02d})")
+            if not cycles:
+                print(f"{variable:<28} (no COGs)")
+        return 0
+
+    points = [tuple(point) for point in args.point or []]
+    if args.points_file:
+        points.extend(read_points_file(args.points_file))
+    if not points:
+        logger.error("No query points (use --point LAT LON or --points-file)")
+        return 2
+
+    query = PointQuery(index, read_workers=args.read_workers)
+    results = []
+    for variable in args.variable:
+        result = query.query(variable, points, args.cycle)
+        if result is None:
+            logger.error(f"No COGs for {variable}{f' in cycle {args.cycle}' if args.cycle else ''}")
+            continue
+        var_config = variables.get(variable, {})
+        units = var_config.get('units_display' if var_config.get('conversion') else 'units_source', '')
+        results.append(result_to_dict(result, units))
+        if args.json is None:
+            print_result(result, units)
+
+    if args.json is not None:
+        text = json.dumps(results, indent=2)
+        if str(args.json) == '-':
+            print(text)
+        else:
+            args.json.write_text(text)
+            logger.info(f"Results written to {args.json}")
+
+    return 0 if len(results) == len(args.variable) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
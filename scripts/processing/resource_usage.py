@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Process Resource Usage Helpers
+
+Measures peak resident memory (RSS) of the current process so processing
+steps can report how much memory each variable needed:
+- Reads VmHWM from /proc/self/status on Linux
+- Resets the high-water mark between variables via /proc/self/clear_refs
+- Falls back to getrusage() (lifetime peak only) elsewhere
+- Reads available system memory from /proc/meminfo (for memory budgets)
+"""
+
+import resource
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+PROC_STATUS = Path('/proc/self/status')
+PROC_CLEAR_REFS = Path('/proc/self/clear_refs')
+PROC_MEMINFO = Path('/proc/meminfo')
+
+
+def get_peak_rss_mb() -> float:
+    """
+    Get peak resident memory of this process since the last reset.
+
+    Returns:
+        Peak RSS in megabytes
+    """
+    try:
+        with open(PROC_STATUS, 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak RSS high-water mark to the current RSS.
+
+    Returns:
+        True if the reset is supported (Linux), False otherwise
+    """
+    try:
+        with open(PROC_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def track_peak_memory() -> Iterator[Dict[str, float]]:
+    """
+    Context manager that measures peak RSS of a code block.
+
+    Usage:
+        with track_peak_memory() as usage:
+            process_variable(...)
+        print(usage['peak_rss_mb'])
+
+    Yields:
+        Dict filled with 'peak_rss_mb' when the block exits, and
+        'resettable' telling whether the figure is block-local (Linux)
+        or the process lifetime peak
+    """
+    usage = {'resettable': reset_peak_rss()}
+    try:
+        yield usage
+    finally:
+        usage['peak_rss_mb'] = get_peak_rss_mb()
+
+
+def get_available_memory_mb() -> Optional[float]:
+    """
+    Get memory available for new allocations without swapping.
+
+    Returns:
+        MemAvailable from /proc/meminfo in megabytes, or None if unknown
+    """
+    try:
+        with open(PROC_MEMINFO, 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Scratch Space for Intermediate Rasters
+
+Intermediate files (warp fallbacks, colorized GeoTIFFs before they are
+moved into place) are short-lived and usually small, so writing them to
+local disk is wasted I/O on EBS-backed instances:
+- Scratch files go to GDAL's in-memory filesystem (/vsimem/) while the
+  total reserved size fits the memory budget
+- Anything that doesn't fit spills to a temp file on disk
+- Callers get a plain path string GDAL can open either way, and the file
+  is removed when the context exits
+
+Used by process_weather.py and apply_colormap.py.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from osgeo import gdal
+
+# Default in-memory budget for all live scratch files in a process
+DEFAULT_BUDGET_MB = 512
+
+VSIMEM_PREFIX = '/vsimem/weather-scratch'
+
+# Chunk size when copying a /vsimem/ file out to disk
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+class ScratchSpace:
+    """
+    Allocates scratch paths in /vsimem/ under a memory budget.
+
+    Usage:
+        scratch = ScratchSpace(budget_mb=512)
+        with scratch.path('.tif', estimated_mb=40) as tmp_path:
+            gdal.Warp(tmp_path, src_ds, ...)
+            scratch.move(tmp_path, output_path)
+    """
+
+    def __init__(
+        self,
+        budget_mb: float = DEFAULT_BUDGET_MB,
+        spill_dir: Optional[Path] = None,
+        logger: Optional[logging.Logger] = None
+    ):
+        """
+        Args:
+            budget_mb: Total size of live /vsimem/ scratch files (0 = always disk)
+            spill_dir: Directory for files that don't fit (default: system temp)
+            logger: Logger instance
+        """
+        self.budget_mb = budget_mb
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.logger = logger or logging.getLogger(__name__)
+        self._reserved_mb = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def reserved_mb(self) -> float:
+        """MB currently reserved by live /vsimem/ scratch files."""
+        return self._reserved_mb
+
+    def _reserve(self, estimated_mb: float) -> bool:
+        with self._lock:
+            if self._reserved_mb + estimated_mb > self.budget_mb:
+                return False
+            self._reserved_mb += estimated_mb
+            return True
+
+    def _release(self, estimated_mb: float) -> None:
+        with self._lock:
+            self._reserved_mb = max(0.0, self._reserved_mb - estimated_mb)
+
+    @contextmanager
+    def path(self, suffix: str = '.tif', estimated_mb: float = 0) -> Iterator[str]:
+        """
+        Allocate a scratch path for the duration of a with block.
+
+        Args:
+            suffix: File suffix (selects the GDAL driver for some tools)
+            estimated_mb: Expected file size, reserved against the budget
+
+        Yields:
+            /vsimem/ path if the estimate fits the budget, else a disk path
+        """
+        in_memory = self._reserve(estimated_mb)
+        if in_memory:
+            scratch_path = f"{VSIMEM_PREFIX}/{uuid.uuid4().hex}{suffix}"
+        else:
+            self.logger.debug(f"Scratch file ({estimated_mb:.0f} MB) exceeds memory budget, "
+                              f"spilling to disk")
+            fd, scratch_path = tempfile.mkstemp(
+                suffix=suffix, dir=str(self.spill_dir) if self.spill_dir else None
+            )
+            os.close(fd)
+
+        try:
+            yield scratch_path
+        finally:
+            remove(scratch_path)
+            if in_memory:
+                self._release(estimated_mb)
+
+    def move(self, scratch_path: str, output_path: Path) -> None:
+        """
+        Move a finished scratch file to its final location.
+
+        Args:
+            scratch_path: Path from path()
+            output_path: Destination on disk
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if not is_vsimem(scratch_path):
+            shutil.move(scratch_path, str(output_path))
+            return
+
+        src = gdal.VSIFOpenL(scratch_path, 'rb')
+        if src is None:
+            raise FileNotFoundError(scratch_path)
+        try:
+            with open(output_path, 'wb') as dst:
+                while True:
+                    chunk = gdal.VSIFReadL(1, COPY_CHUNK_BYTES, src)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+        finally:
+            gdal.VSIFCloseL(src)
+        gdal.Unlink(scratch_path)
+
+
+def is_vsimem(path: str) -> bool:
+    """Check whether a path is on GDAL's in-memory filesystem."""
+    return str(path).startswith('/vsimem/')
+
+
+def remove(path: str) -> None:
+    """Remove a scratch file (and GDAL sidecars such as .aux.xml) if present."""
+    for candidate in (path, f"{path}.aux.xml", f"{path}.ovr"):
+        if is_vsimem(candidate):
+            if gdal.VSIStatL(candidate) is not None:
+                gdal.Unlink(candidate)
+        elif os.path.exists(candidate):
+            os.unlink(candidate)
+
+
+# Process-wide scratch space (see get_scratch_space)
+_scratch_space: Optional[ScratchSpace] = None
+
+
+def get_scratch_space(
+    budget_mb: Optional[float] = None,
+    spill_dir: Optional[Path] = None,
+    logger: Optional[logging.Logger] = None
+) -> ScratchSpace:
+    """
+    Get the process-wide scratch space, creating it on first use.
+
+    The budget is shared by every caller in the process. Passing budget_mb
+    or spill_dir updates the settings of the existing space.
+
+    Args:
+        budget_mb: In-memory budget in MB (default: DEFAULT_BUDGET_MB)
+        spill_dir: Directory for files that spill to disk
+        logger: Logger instance
+
+    Returns:
+        ScratchSpace
+    """
+    global _scratch_space
+    if _scratch_space is None:
+        _scratch_space = ScratchSpace(
+            DEFAULT_BUDGET_MB if budget_mb is None else budget_mb, spill_dir, logger
+        )
+        return _scratch_space
+
+    if budget_mb is not None:
+        _scratch_space.budget_mb = budget_mb
+    if spill_dir is not None:
+        _scratch_space.spill_dir = Path(spill_dir)
+    return _scratch_space
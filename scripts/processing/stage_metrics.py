@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Per-Stage Timing for Variable Processing
+
+Records where each variable's processing time goes:
+- extract: GRIB2 band decode
+- convert: unit conversion
+- normalize: lat/lon grid clip and longitude roll (normalize_global_grid)
+- reproject: warp to EPSG:3857
+- cog_write: COG encode and write (fields on the windowed path reproject
+  while writing, so their warp time is counted here)
+- colorize: colored RGBA COG (--colorize)
+- zarr_write: per-cycle Zarr cube slice (--zarr)
+
+plus the output COG size and pixel count. Timings are logged per variable
+and, with process_weather.py --metrics, sent to CloudWatch like
+CloudWatchMetrics.timer() steps, tagged by model, variable and forecast hour.
+Stages are timed here rather than with timer() itself: they run in worker
+processes without a CloudWatch client, are logged without --metrics, and
+a batched warp's time is split across its variables.
+"""
+
+import logging
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from osgeo import gdal
+
+from scripts.common.cloudwatch_metrics import CloudWatchMetrics, MetricNames, MetricUnits
+
+STAGES = ('extract', 'convert', 'normalize', 'reproject', 'cog_write', 'colorize', 'zarr_write')
+
+# Forecast hour in GRIB2 file names, e.g. hrrr.t21z.wrfsfcf06.grib2 or *.f006.grib2
+FORECAST_HOUR_PATTERN = re.compile(r'f(\d{2,3})(?:\.|$)')
+
+# Forecast hour suffix of a file stem (removed to name the cycle)
+FORECAST_SUFFIX_PATTERN = re.compile(r'\.?f\d{2,3}$')
+
+
+def forecast_hour_from_path(grib_file: Path) -> Optional[int]:
+    """
+    Parse the forecast hour from a GRIB2 file name.
+
+    Args:
+        grib_file: GRIB2 file path
+
+    Returns:
+        Forecast hour, or None if the name doesn't contain one
+    """
+    match = FORECAST_HOUR_PATTERN.search(Path(grib_file).stem)
+    return int(match.group(1)) if match else None
+
+
+def cycle_from_stem(stem: str) -> str:
+    """Cycle part of a file stem, e.g. hrrr.20260110.t19z.f06 -> hrrr.20260110.t19z."""
+    return FORECAST_SUFFIX_PATTERN.sub('', stem)
+
+
+class StageTimer:
+    """
+    Stage durations and output size for one variable of one GRIB2 file.
+
+    Usage:
+        timer = StageTimer('temperature_2m', forecast_hour=6)
+        with timer.stage('extract'):
+            data_array = extract_variable_from_grib(...)
+        timer.record_output(output_path)
+    """
+
+    def __init__(self, variable: str, forecast_hour: Optional[int] = None):
+        """
+        Args:
+            variable: Variable name
+            forecast_hour: Forecast hour of the source file
+        """
+        self.variable = variable
+        self.forecast_hour = forecast_hour
+        self.durations: Dict[str, float] = {}
+        self.output_bytes = 0
+        self.output_pixels = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block and add it to the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add seconds to a stage (e.g. a share of a batched warp)."""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def record_output(self, output_path: Optional[Path]) -> None:
+        """Record the size and pixel count of the written COG."""
+        if output_path is None or not Path(output_path).exists():
+            return
+        self.output_bytes = Path(output_path).stat().st_size
+        ds = gdal.Open(str(output_path))
+        if ds is not None:
+            self.output_pixels = ds.RasterXSize * ds.RasterYSize
+
+    @property
+    def total(self) -> float:
+        return sum(self.durations.values())
+
+    def summary(self) -> str:
+        """One-line description for the log."""
+        stages = ', '.join(
+            f"{name} {self.durations[name]:.2f}s" for name in STAGES if name in self.durations
+        )
+        return (f"{stages} (total {self.total:.2f}s), "
+                f"{self.output_bytes / 1024 / 1024:.1f} MB, {self.output_pixels:,} px")
+
+    def output_metrics(self) -> List[Dict]:
+        """Output size entries for CloudWatchMetrics.put_metrics_batch."""
+        if not self.output_bytes:
+            return []
+        return [
+            {'name': MetricNames.OUTPUT_BYTES, 'value': self.output_bytes,
+             'unit': MetricUnits.BYTES},
+            {'name': MetricNames.OUTPUT_PIXELS, 'value': self.output_pixels,
+             'unit': MetricUnits.COUNT},
+        ]
+
+
+def report_stage_timings(
+    timer: StageTimer,
+    logger: logging.Logger,
+    metrics: Optional[CloudWatchMetrics] = None,
+    model: Optional[str] = None
+) -> None:
+    """
+    Log a variable's stage timings and send them to CloudWatch.
+
+    Args:
+        timer: Completed stage timer
+        logger: Logger instance
+        metrics: CloudWatch client (None = log only)
+        model: Model name dimension (e.g. hrrr)
+    """
+    hour = f" f{timer.forecast_hour:02d}" if timer.forecast_hour is not None else ''
+    logger.info(f"Timing {timer.variable}{hour}: {timer.summary()}")
+
+    if metrics is None:
+        return
+    dimensions = {'Variable': timer.variable}
+    if timer.forecast_hour is not None:
+        dimensions['ForecastHour'] = str(timer.forecast_hour)
+    if model:
+        dimensions['Model'] = model
+    for name in STAGES:
+        if name in timer.durations:
+            metrics.record_step_duration(name, timer.durations[name], dimensions=dimensions)
+    if timer.output_bytes:
+        metrics.put_metrics_batch(timer.output_metrics(), dimensions)
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Cached Warp Plans for Fixed Model Grids
+
+Model grids (HRRR Lambert conformal, GFS-Wave 0.25° lat/lon) never change
+between variables, forecast hours or cycles, so the source -> EPSG:3857
+pixel mapping only needs to be computed once:
+- A plan stores, for every output pixel, the source pixels it reads and
+  their resampling weights (nearest or bilinear)
+- Plans are keyed by source geotransform, CRS, shape, target resolution
+  and resampling method, and saved to disk as .npz files
+- Applying a plan is a vectorized gather plus a weighted sum, done in
+  row blocks, with no coordinate transforms
+- Geographic (lat/lon) sources get a separable plan (per-column and
+  per-row tables), which stays tiny even for upsampled global grids
+
+Used by process_weather.reproject_to_web_mercator when warp plan caching
+is enabled in the processing config.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import xarray as xr
+from affine import Affine
+from pyproj import Transformer
+from rasterio.warp import calculate_default_transform
+
+# Bump when the plan layout or math changes so cached plans are rebuilt
+PLAN_VERSION = 1
+
+TARGET_CRS = 'EPSG:3857'
+
+# Resampling methods a plan can reproduce
+SUPPORTED_METHODS = ('nearest', 'bilinear')
+
+# Output rows processed per block when building or applying a plan
+BLOCK_ROWS = 256
+
+
+def _axis_neighbors(
+    coord: np.ndarray,
+    size: int,
+    method: str,
+    wrap: bool = False
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find source neighbors along one axis for fractional pixel coordinates.
+
+    Args:
+        coord: Fractional source pixel coordinates (pixel centers at integers)
+        size: Source size along this axis
+        method: 'nearest' or 'bilinear'
+        wrap: Axis wraps around (global longitude)
+
+    Returns:
+        (index0, index1, weight1, valid) arrays; index1/weight1 are only
+        meaningful for bilinear (weight of index1, index0 gets 1 - weight1)
+    """
+    if wrap:
+        valid = np.ones(coord.shape, dtype=bool)
+    else:
+        valid = (coord >= -0.5) & (coord <= size - 0.5)
+
+    if method == 'nearest':
+        index0 = np.floor(coord + 0.5).astype(np.int64)
+        index0 = index0 % size if wrap else np.clip(index0, 0, size - 1)
+        zeros = np.zeros(coord.shape, dtype=np.float32)
+        return index0, index0, zeros, valid
+
+    base = np.floor(coord)
+    weight1 = (coord - base).astype(np.float32)
+    index0 = base.astype(np.int64)
+    index1 = index0 + 1
+    if wrap:
+        index0 %= size
+        index1 %= size
+    else:
+        # Past the outer pixel centers, hold the edge value
+        index0 = np.clip(index0, 0, size - 1)
+        index1 = np.clip(index1, 0, size - 1)
+    return index0, index1, weight1, valid
+
+
+def _combine(values: np.ndarray, weights: np.ndarray, valid: np.ndarray,
+             nodata: Optional[float], fill: float, dtype: np.dtype) -> np.ndarray:
+    """
+    Weighted sum of gathered neighbor values, skipping nodata neighbors.
+
+    Args:
+        values: Gathered source values, shape (k, ...)
+        weights: Neighbor weights, shape (k, ...)
+        valid: Neighbor validity from the plan, shape (k, ...)
+        nodata: Source nodata value (NaN is always treated as nodata)
+        fill: Value for output pixels with no valid neighbors
+        dtype: Output dtype
+
+    Returns:
+        Combined values, shape (...)
+    """
+    valid = valid & ~np.isnan(values)
+    if nodata is not None and not np.isnan(nodata):
+        valid &= values != nodata
+
+    weights = np.where(valid, weights, 0)
+    total = weights.sum(axis=0)
+    weighted = (np.where(valid, values, 0) * weights).sum(axis=0)
+
+    out = np.full(total.shape, fill, dtype=dtype)
+    has_data = total > 0
+    out[has_data] = weighted[has_data] / total[has_data]
+    return out
+
+
+class WarpPlan:
+    """
+    Precomputed source -> EPSG:3857 resampling plan for one grid.
+
+    Usage:
+        plan = WarpPlan.build(src_transform, src_crs, src_shape, 'bilinear', 3000)
+        dst_values = plan.apply(src_values, nodata=-9999.0)
+    """
+
+    def __init__(
+        self,
+        method: str,
+        src_shape: Tuple[int, int],
+        dst_shape: Tuple[int, int],
+        dst_transform: Affine,
+        arrays: Dict[str, np.ndarray],
+        separable: bool
+    ):
+        """
+        Args:
+            method: 'nearest' or 'bilinear'
+            src_shape: Source (rows, cols)
+            dst_shape: Destination (rows, cols)
+            dst_transform: Destination affine transform (EPSG:3857)
+            arrays: Plan tables (see build)
+            separable: Tables are per-axis (row*, col*) rather than per-pixel
+        """
+        self.method = method
+        self.src_shape = tuple(src_shape)
+        self.dst_shape = tuple(dst_shape)
+        self.dst_transform = dst_transform
+        self.arrays = arrays
+        self.separable = separable
+
+    @classmethod
+    def build(
+        cls,
+        src_transform: Affine,
+        src_crs,
+        src_shape: Tuple[int, int],
+        method: str,
+        target_resolution_meters: Optional[float] = None
+    ) -> 'WarpPlan':
+        """
+        Compute a plan for a source grid.
+
+        The destination grid is the one rasterio/rioxarray would choose
+        for the same reprojection (calculate_default_transform).
+
+        Args:
+            src_transform: Source affine transform
+            src_crs: Source CRS (rasterio CRS)
+            src_shape: Source (rows, cols)
+            method: 'nearest' or 'bilinear'
+            target_resolution_meters: Output resolution; None keeps native
+
+        Returns:
+            WarpPlan
+        """
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"Warp plans support {SUPPORTED_METHODS}, not '{method}'")
+
+        height, width = src_shape
+        left, top = src_transform * (0, 0)
+        right, bottom = src_transform * (width, height)
+        kwargs = {}
+        if target_resolution_meters is not None:
+            kwargs['resolution'] = target_resolution_meters
+        dst_transform, dst_width, dst_height = calculate_default_transform(
+            src_crs, TARGET_CRS, width, height,
+            left=min(left, right), bottom=min(top, bottom),
+            right=max(left, right), top=max(top, bottom),
+            **kwargs
+        )
+
+        transformer = Transformer.from_crs(TARGET_CRS, src_crs.to_wkt(), always_xy=True)
+        inverse = ~src_transform
+
+        # Lat/lon sources map x -> column and y -> row independently
+        separable = bool(src_crs.is_geographic) and src_transform.b == 0 and src_transform.d == 0
+        wrap = separable and abs(src_transform.a * width) >= 359.9
+
+        if separable:
+            xs = dst_transform.c + (np.arange(dst_width) + 0.5) * dst_transform.a
+            ys = dst_transform.f + (np.arange(dst_height) + 0.5) * dst_transform.e
+            lons, _ = transformer.transform(xs, np.zeros_like(xs))
+            _, lats = transformer.transform(np.zeros_like(ys), ys)
+            lons = np.asarray(lons)
+            if wrap:
+                lons = (lons - left) % 360.0 + left
+            cols = (lons - src_transform.c) / src_transform.a - 0.5
+            rows = (np.asarray(lats) - src_transform.f) / src_transform.e - 0.5
+
+            col0, col1, wx, col_valid = _axis_neighbors(cols, width, method, wrap)
+            row0, row1, wy, row_valid = _axis_neighbors(rows, height, method)
+            arrays = {
+                'col0': col0.astype(np.int32), 'col1': col1.astype(np.int32),
+                'wx': wx, 'col_valid': col_valid,
+                'row0': row0.astype(np.int32), 'row1': row1.astype(np.int32),
+                'wy': wy, 'row_valid': row_valid,
+            }
+        else:
+            neighbors = 1 if method == 'nearest' else 4
+            index = np.full((neighbors, dst_height * dst_width), -1, dtype=np.int32)
+            weights = np.zeros((neighbors, dst_height * dst_width), dtype=np.float32)
+            xs = dst_transform.c + (np.arange(dst_width) + 0.5) * dst_transform.a
+
+            for start in range(0, dst_height, BLOCK_ROWS):
+                stop = min(start + BLOCK_ROWS, dst_height)
+                ys = dst_transform.f + (np.arange(start, stop) + 0.5) * dst_transform.e
+                grid_x, grid_y = np.meshgrid(xs, ys)
+                src_x, src_y = transformer.transform(grid_x, grid_y)
+                cols, rows = inverse * (np.asarray(src_x), np.asarray(src_y))
+                cols = np.asarray(cols).ravel() - 0.5
+                rows = np.asarray(rows).ravel() - 0.5
+                finite = np.isfinite(cols) & np.isfinite(rows)
+                cols = np.where(finite, cols, -1.0)
+                rows = np.where(finite, rows, -1.0)
+
+                col0, col1, wx, col_valid = _axis_neighbors(cols, width, method)
+                row0, row1, wy, row_valid = _axis_neighbors(rows, height, method)
+                valid = col_valid & row_valid & finite
+
+                block = slice(start * dst_width, stop * dst_width)
+                if method == 'nearest':
+                    index[0, block] = np.where(valid, row0 * width + col0, -1)
+                    weights[0, block] = valid
+                else:
+                    corners = [
+                        (row0, col0, (1 - wy) * (1 - wx)),
+                        (row0, col1, (1 - wy) * wx),
+                        (row1, col0, wy * (1 - wx)),
+                        (row1, col1, wy * wx),
+                    ]
+                    for k, (r, c, w) in enumerate(corners):
+                        index[k, block] = np.where(valid, r * width + c, -1)
+                        weights[k, block] = np.where(valid, w, 0)
+
+            arrays = {'index': index, 'weights': weights}
+
+        return cls(method, src_shape, (dst_height, dst_width), dst_transform, arrays, separable)
+
+    def apply(self, src: np.ndarray, nodata: Optional[float] = None) -> np.ndarray:
+        """
+        Resample a source array onto the destination grid.
+
+        Args:
+            src: Source values, shape src_shape
+            nodata: Source nodata value (NaN is always treated as nodata)
+
+        Returns:
+            Destination array, shape dst_shape, same dtype as src; pixels
+            with no valid source data are set to nodata (or NaN)
+        """
+        if src.shape != self.src_shape:
+            raise ValueError(f"Plan is for shape {self.src_shape}, got {src.shape}")
+
+        dst_height, dst_width = self.dst_shape
+        fill = np.nan if nodata is None else nodata
+        out = np.empty(self.dst_shape, dtype=src.dtype)
+        a = self.arrays
+
+        for start in range(0, dst_height, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, dst_height)
+
+            if self.separable:
+                rows = slice(start, stop)
+                row_valid = a['row_valid'][rows][:, None]
+                top = src[a['row0'][rows]]
+                if self.method == 'nearest':
+                    values = top[:, a['col0']][None]
+                    weights = np.ones((1,) + values.shape[1:], dtype=np.float32)
+                    valid = (row_valid & a['col_valid'][None, :])[None]
+                else:
+                    bottom = src[a['row1'][rows]]
+                    wy = a['wy'][rows][:, None]
+                    wx = a['wx'][None, :]
+                    values = np.stack([
+                        top[:, a['col0']], top[:, a['col1']],
+                        bottom[:, a['col0']], bottom[:, a['col1']],
+                    ])
+                    weights = np.stack([
+                        (1 - wy) * (1 - wx), (1 - wy) * wx,
+                        wy * (1 - wx), wy * wx,
+                    ])
+                    valid = np.broadcast_to(row_valid & a['col_valid'][None, :], values.shape)
+            else:
+                block = slice(start * dst_width, stop * dst_width)
+                index = a['index'][:, block]
+                valid = index >= 0
+                values = src.ravel()[np.maximum(index, 0)]
+                weights = a['weights'][:, block]
+
+            combined = _combine(values, weights, valid, nodata, fill, src.dtype)
+            out[start:stop] = combined.reshape(stop - start, dst_width)
+
+        return out
+
+    def to_data_array(self, values: np.ndarray, attrs: Dict, nodata: Optional[float]) -> xr.DataArray:
+        """
+        Wrap destination values as a georeferenced DataArray (EPSG:3857).
+
+        Args:
+            values: Output of apply()
+            attrs: Attributes to carry over (GRIB metadata)
+            nodata: Nodata value written to the output (None = NaN)
+
+        Returns:
+            DataArray with x/y pixel-center coordinates, CRS and nodata
+        """
+        dst_height, dst_width = self.dst_shape
+        t = self.dst_transform
+        data_array = xr.DataArray(
+            values,
+            dims=['y', 'x'],
+            coords={
+                'x': t.c + (np.arange(dst_width) + 0.5) * t.a,
+                'y': t.f + (np.arange(dst_height) + 0.5) * t.e,
+            },
+            attrs=attrs
+        )
+        data_array = data_array.rio.write_crs(TARGET_CRS)
+        data_array = data_array.rio.write_transform(t)
+        return data_array.rio.write_nodata(np.nan if nodata is None else nodata)
+
+    def save(self, path: Path) -> None:
+        """Save the plan as an uncompressed .npz (fast to load)."""
+        meta = {
+            'version': PLAN_VERSION,
+            'method': self.method,
+            'src_shape': list(self.src_shape),
+            'dst_shape': list(self.dst_shape),
+            'dst_transform': list(self.dst_transform)[:6],
+            'separable': self.separable,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Per-process temp name: concurrent workers may save the same plan
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp.npz")
+        try:
+            np.savez(temp_path, meta=np.array(json.dumps(meta)), **self.arrays)
+            temp_path.replace(path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['WarpPlan']:
+        """Load a saved plan; returns None if it is unreadable or outdated."""
+        try:
+            with np.load(path) as npz:
+                meta = json.loads(str(npz['meta']))
+                if meta.get('version') != PLAN_VERSION:
+                    return None
+                arrays = {key: npz[key] for key in npz.files if key != 'meta'}
+        except Exception:
+            # Missing, truncated (BadZipFile, EOFError) or malformed
+            return None
+
+        return cls(
+            meta['method'],
+            tuple(meta['src_shape']),
+            tuple(meta['dst_shape']),
+            Affine(*meta['dst_transform']),
+            arrays,
+            meta['separable'],
+        )
+
+
+def plan_key(
+    src_transform: Affine,
+    src_crs,
+    src_shape: Tuple[int, int],
+    method: str,
+    target_resolution_meters: Optional[float]
+) -> str:
+    """
+    Cache key for a warp plan.
+
+    Args:
+        src_transform: Source affine transform
+        src_crs: Source CRS (rasterio CRS)
+        src_shape: Source (rows, cols)
+        method: Resampling method
+        target_resolution_meters: Output resolution (None = native)
+
+    Returns:
+        Hex digest identifying the plan
+    """
+    key = json.dumps({
+        'version': PLAN_VERSION,
+        'transform': [round(v, 9) for v in list(src_transform)[:6]],
+        'crs': src_crs.to_wkt(),
+        'shape': list(src_shape),
+        'method': method,
+        'resolution': target_resolution_meters,
+    }, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+class WarpPlanCache:
+    """
+    In-memory and on-disk cache of warp plans.
+
+    Usage:
+        cache = WarpPlanCache(Path('/tmp/weather-warp-plans'))
+        plan = cache.get(data_array, 'bilinear', 5000)
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            cache_dir: Directory for saved plans (None = memory only)
+            logger: Logger instance
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.logger = logger or logging.getLogger(__name__)
+        self._plans: Dict[str, WarpPlan] = {}
+
+    def get(
+        self,
+        data_array: xr.DataArray,
+        method: str,
+        target_resolution_meters: Optional[float] = None
+    ) -> Optional[WarpPlan]:
+        """
+        Get (or build and store) the plan for a data array's grid.
+
+        Args:
+            data_array: Source data (rioxarray CRS and transform)
+            method: Resampling method
+            target_resolution_meters: Output resolution (None = native)
+
+        Returns:
+            WarpPlan, or None if the method isn't supported by plans
+        """
+        method = method.lower()
+        if method not in SUPPORTED_METHODS:
+            return None
+
+        src_transform = data_array.rio.transform()
+        src_crs = data_array.rio.crs
+        src_shape = data_array.shape[-2:]
+        key = plan_key(src_transform, src_crs, src_shape, method, target_resolution_meters)
+
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        path = self.cache_dir / f"warp_plan_{key}.npz" if self.cache_dir else None
+        if path is not None and path.exists():
+            plan = WarpPlan.load(path)
+            if plan is not None:
+                self.logger.debug(f"Loaded warp plan {path.name}")
+
+        if plan is None:
+            self.logger.info(f"Building warp plan {key} ({method}, {src_shape[0]}x{src_shape[1]})")
+            plan = WarpPlan.build(src_transform, src_crs, src_shape, method, target_resolution_meters)
+            if path is not None:
+                try:
+                    plan.save(path)
+                    self.logger.debug(f"Saved warp plan {path.name}")
+                except OSError as e:
+                    self.logger.warning(f"Could not save warp plan: {e}")
+
+        self._plans[key] = plan
+        return plan
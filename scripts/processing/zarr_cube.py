@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Per-Cycle Zarr Cubes
+
+Collects a variable's reprojected fields for all forecast hours of a cycle
+in one chunked Zarr store, so time series and animations read a few
+contiguous chunks instead of one COG per forecast hour:
+- One store per variable per cycle, e.g.
+  temperature_2m_hrrr.20260110.t19z.zarr
+- Array (forecast_hour, y, x) float32 on the EPSG:3857 grid, NaN = nodata,
+  with x/y/forecast_hour coordinates and a spatial_ref grid mapping
+  (opens directly with xarray.open_zarr)
+- Chunks span several forecast hours and a square block of pixels, so a
+  map tile reads one chunk per hour group and a point series reads one
+  chunk column
+- Chunks that are entirely nodata (land for wave fields, the corners of
+  the HRRR warp) are not stored; reads fill them with NaN
+- Forecast hours are stored in the order they are processed; sort on the
+  forecast_hour coordinate when reading. Reprocessing an hour overwrites
+  its slice in place
+
+Writes to a store are serialized with a lock file, so concurrent file
+workers can append hours of the same cycle.
+
+Used by process_weather.py (--zarr).
+"""
+
+import fcntl
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import zarr
+from numcodecs import Blosc
+from osgeo import gdal
+
+from scripts.processing.stage_metrics import cycle_from_stem, forecast_hour_from_path
+
+# Default chunk shape (forecast_hour, y, x): 6 hours x 256 x 256 float32 is
+# 1.5 MB uncompressed
+DEFAULT_CHUNKS = (6, 256, 256)
+
+COMPRESSOR = Blosc(cname='zstd', clevel=5, shuffle=Blosc.SHUFFLE)
+
+# Store attribute holding each forecast hour's input hash
+HASHES_ATTR = 'input_hashes'
+
+
+def get_cube_path(grib_file: Path, variable_name: str, zarr_dir: Path) -> Optional[Path]:
+    """
+    Zarr store path for a variable of a GRIB2 file's cycle.
+
+    Args:
+        grib_file: GRIB2 file (e.g. hrrr.20260110.t19z.f06.grib2)
+        variable_name: Variable identifier
+        zarr_dir: Directory of Zarr stores
+
+    Returns:
+        Store path, or None if the file name has no forecast hour
+    """
+    if forecast_hour_from_path(grib_file) is None:
+        return None
+    return zarr_dir / f"{variable_name}_{cycle_from_stem(Path(grib_file).stem)}.zarr"
+
+
+def get_chunks(processing: Dict) -> Tuple[int, int, int]:
+    """Chunk shape (forecast_hour, y, x) from processing.zarr_chunks."""
+    chunks = processing.get('zarr_chunks') or {}
+    return (
+        int(chunks.get('forecast_hour', DEFAULT_CHUNKS[0])),
+        int(chunks.get('y', DEFAULT_CHUNKS[1])),
+        int(chunks.get('x', DEFAULT_CHUNKS[2])),
+    )
+
+
+@contextmanager
+def _store_lock(store_path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on a store (a sibling .lock file)."""
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(store_path.with_suffix('.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_cube_hash(store_path: Optional[Path], forecast_hour: Optional[int]) -> Optional[str]:
+    """
+    Read the input hash recorded for a forecast hour of a store.
+
+    Args:
+        store_path: Zarr store path
+        forecast_hour: Forecast hour
+
+    Returns:
+        Input hash, or None if the store or hour is missing
+    """
+    if store_path is None or forecast_hour is None or not store_path.exists():
+        return None
+    try:
+        group = zarr.open_group(str(store_path), mode='r')
+    except Exception:
+        return None
+    return group.attrs.get(HASHES_ATTR, {}).get(str(forecast_hour))
+
+
+def _create_store(
+    group: zarr.Group,
+    variable_name: str,
+    shape: Tuple[int, int],
+    geotransform: Sequence[float],
+    projection: str,
+    chunks: Tuple[int, int, int],
+    attrs: Dict
+) -> None:
+    """Create the data, coordinate and grid mapping arrays of a new store."""
+    height, width = shape
+    data = group.create_dataset(
+        variable_name, shape=(0, height, width), dtype='f4',
+        chunks=(chunks[0], min(chunks[1], height), min(chunks[2], width)),
+        compressor=COMPRESSOR, fill_value=np.nan
+    )
+    data.attrs.update(dict(attrs, _ARRAY_DIMENSIONS=['forecast_hour', 'y', 'x'],
+                           grid_mapping='spatial_ref'))
+
+    hours = group.create_dataset('forecast_hour', shape=(0,), dtype='i4', chunks=(1024,),
+                                 compressor=None, fill_value=-1)
+    hours.attrs.update({'_ARRAY_DIMENSIONS': ['forecast_hour'], 'long_name': 'forecast hour'})
+
+    # Pixel-center coordinates
+    x = geotransform[0] + (np.arange(width) + 0.5) * geotransform[1]
+    y = geotransform[3] + (np.arange(height) + 0.5) * geotransform[5]
+    for name, values in (('x', x), ('y', y)):
+        coord = group.create_dataset(name, data=values, chunks=values.shape, compressor=None)
+        coord.attrs.update({'_ARRAY_DIMENSIONS': [name], 'units': 'm',
+                            'standard_name': f'projection_{name}_coordinate'})
+
+    spatial_ref = group.create_dataset('spatial_ref', shape=(), dtype='i4', fill_value=0)
+    spatial_ref.attrs.update({
+        '_ARRAY_DIMENSIONS': [],
+        'crs_wkt': projection,
+        'spatial_ref': projection,
+        'GeoTransform': ' '.join(str(value) for value in geotransform),
+    })
+    group.attrs[HASHES_ATTR] = {}
+
+
+def write_cube_slice(
+    store_path: Path,
+    variable_name: str,
+    forecast_hour: int,
+    source: Union[np.ndarray, gdal.Dataset],
+    geotransform: Sequence[float],
+    projection: str,
+    logger: logging.Logger,
+    nodata: Optional[float] = None,
+    chunks: Tuple[int, int, int] = DEFAULT_CHUNKS,
+    attrs: Optional[Dict] = None,
+    input_hash: Optional[str] = None
+) -> bool:
+    """
+    Write one forecast hour of a variable into its cycle's Zarr store.
+
+    The store is created on first write. An hour already in the store is
+    overwritten in place; a new hour is appended.
+
+    Args:
+        store_path: Zarr store path (see get_cube_path)
+        variable_name: Variable identifier (the data array's name)
+        forecast_hour: Forecast hour of the field
+        source: 2D array of physical values, or a dataset to copy band 1
+                from in row blocks (fields too large to hold in memory)
+        geotransform: GDAL geotransform of the grid
+        projection: WKT of the grid
+        logger: Logger instance
+        nodata: Nodata value of an array source (written as NaN)
+        chunks: Chunk shape (forecast_hour, y, x) for a new store
+        attrs: Attributes of the data array for a new store (e.g. units)
+        input_hash: Input hash of the field, recorded per forecast hour
+
+    Returns:
+        True if successful
+    """
+    from_array = isinstance(source, np.ndarray)
+    if from_array:
+        shape = source.shape[-2:]
+    else:
+        shape = (source.RasterYSize, source.RasterXSize)
+        nodata = source.GetRasterBand(1).GetNoDataValue()
+
+    try:
+        with _store_lock(store_path):
+            group = zarr.open_group(str(store_path), mode='a')
+            if variable_name not in group:
+                _create_store(group, variable_name, shape, geotransform, projection,
+                              chunks, attrs or {})
+            # Empty-chunk skipping is an open option, not stored metadata
+            data = zarr.open_array(group.store, path=variable_name, mode='r+',
+                                   write_empty_chunks=False)
+            hours = group['forecast_hour']
+
+            stored_transform = group['spatial_ref'].attrs.get('GeoTransform', '')
+            if data.shape[1:] != tuple(shape) or not np.allclose(
+                [float(value) for value in stored_transform.split()], geotransform
+            ):
+                raise ValueError(f"grid {shape} differs from the store's {data.shape[1:]}; "
+                                 f"remove {store_path.name} to rebuild it")
+
+            existing = np.flatnonzero(hours[:] == forecast_hour)
+            if existing.size:
+                index = int(existing[0])
+            else:
+                index = data.shape[0]
+                data.resize((index + 1,) + data.shape[1:])
+                hours.resize((index + 1,))
+                hours[index] = forecast_hour
+
+            # Copy in row blocks aligned to the chunk height
+            block_rows = data.chunks[1]
+            for start in range(0, shape[0], block_rows):
+                rows = min(block_rows, shape[0] - start)
+                if from_array:
+                    block = source[start:start + rows]
+                else:
+                    block = source.GetRasterBand(1).ReadAsArray(0, start, shape[1], rows)
+                block = block.astype(np.float32)
+                if nodata is not None and not np.isnan(nodata):
+                    block[block == nodata] = np.nan
+                data[index, start:start + rows] = block
+
+            hashes = dict(group.attrs.get(HASHES_ATTR, {}))
+            if input_hash:
+                hashes[str(forecast_hour)] = input_hash
+            else:
+                hashes.pop(str(forecast_hour), None)
+            group.attrs[HASHES_ATTR] = hashes
+            zarr.consolidate_metadata(str(store_path))
+
+        logger.info(f"Wrote f{forecast_hour:02d} to {store_path.name} "
+                    f"({data.shape[0]} forecast hours)")
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to write {store_path.name} f{forecast_hour:02d}: {e}")
+        return False